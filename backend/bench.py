@@ -0,0 +1,469 @@
+"""
+Rendering benchmarks (dev tool, not used by the app).
+
+    python bench.py render                 # every theme, 40 slides, vs the old renderer; exits 1 on a regression
+    python bench.py render --slides 100 --repeat 7 --themes ppt1 ppt4
+    python bench.py render --style         # with font/color overrides (no old-renderer baseline)
+    python bench.py style --runs 3000      # cost of font/color overrides on a run-heavy deck
+    python bench.py save                   # save time / size per output profile and template
+    python bench.py thumbnails             # per-slide preview render time per theme; exits 1 past 20 ms
+    python bench.py serialize              # response validation + JSON encoding, before/after
+    python bench.py importtime             # cold `import main`; exits 1 past the budget
+
+Prints median wall and CPU time per theme. Runs in a temp dir, so nothing is
+written to ./storage.
+
+`importtime` reports the cold-start budget: it fails when the median
+`import main` time exceeds --budget, or when a module that must be loaded
+lazily (LAZY_MODULES) is imported at startup. tests/test_import_time.py
+runs the same check with the test suite.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# cold `import main` budget (median of --runs fresh interpreters)
+IMPORT_BUDGET_MS = 1500
+# heavy dependencies only the routes that use them may import
+LAZY_MODULES = ("google.generativeai", "grpc", "pptx", "docx", "services.thumbnails")
+
+# per-slide preview render time (cache cleared, theme already loaded), for
+# single thumbnails and for a whole deck strip
+THUMBNAIL_TARGET_MS = 20
+
+STYLE_CONFIG = {
+    "font_name": "Arial",
+    "font_color": "#222222",
+    "background_color": "#FAFAFA",
+    "accent_color": "#3366CC",
+}
+
+
+def sample_slides(n: int) -> list:
+    """A deck mixing every text layout (images would measure the network)."""
+    slides = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            slides.append({"layout": "title", "title": f"Section {i}"})
+        elif kind == 1:
+            slides.append(
+                {
+                    "layout": "bullet",
+                    "title": f"Key points {i}",
+                    "bullets": [f"Point {j} about the topic of slide {i}" for j in range(5)],
+                }
+            )
+        elif kind == 2:
+            slides.append(
+                {
+                    "layout": "two_column",
+                    "title": f"Compare {i}",
+                    "left": "Before: manual process, slow turnaround.",
+                    "right": "After: automated pipeline, same-day results.",
+                }
+            )
+        else:
+            slides.append(
+                {
+                    "layout": "image",
+                    "title": f"Figure {i}",
+                    "caption": "First sentence. Second sentence. Third sentence. Fourth.",
+                }
+            )
+    return slides
+
+
+def _timed(fn, repeat: int):
+    """(wall times, CPU times) of `repeat` calls; CPU time is less noisy on shared machines."""
+    wall, cpu = [], []
+    for _ in range(repeat):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        fn()
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - start_cpu)
+    return wall, cpu
+
+
+def _report(label: str, wall: list, cpu: list) -> None:
+    print(
+        f"{label}  wall median {statistics.median(wall) * 1000:8.1f} ms  "
+        f"cpu median {statistics.median(cpu) * 1000:8.1f} ms  min {min(cpu) * 1000:8.1f} ms"
+    )
+
+
+def cmd_render(args) -> None:
+    import bench_baseline
+    from services import render_cache
+    from services.pptx_generator import TEMPLATE_MAP, build_pptx
+
+    slides = sample_slides(args.slides)
+    themes = args.themes or sorted(TEMPLATE_MAP)
+    os.makedirs("storage", exist_ok=True)
+
+    regressions = []
+    for theme in themes:
+        config = {"theme_id": theme, **(STYLE_CONFIG if args.style else {})}
+
+        def render():
+            path = build_pptx(1, slides, config)
+            # force a full rebuild next time
+            os.remove(render_cache.manifest_path(path))
+
+        def legacy():
+            bench_baseline.build_pptx(2, slides, config)
+
+        render()  # warm-up: template index, imports
+        if args.style:
+            # the old renderer ignored font/color overrides: nothing to compare
+            _report(f"{theme:6} {args.slides:4d} slides", *_timed(render, args.repeat))
+            continue
+
+        legacy()
+        # alternate old and new runs, so machine load drifts hit both alike
+        old_wall, old_cpu, new_wall, new_cpu = [], [], [], []
+        for _ in range(args.repeat):
+            for fn, wall, cpu in ((legacy, old_wall, old_cpu), (render, new_wall, new_cpu)):
+                w, c = _timed(fn, 1)
+                wall += w
+                cpu += c
+        _report(f"{theme:6} {args.slides:4d} slides old", old_wall, old_cpu)
+        _report(f"{theme:6} {args.slides:4d} slides new", new_wall, new_cpu)
+        # median of the paired CPU-time ratios: neighbouring runs saw the same load
+        ratio = statistics.median(new / old for new, old in zip(new_cpu, old_cpu))
+        slower = ratio > 1 + args.tolerance
+        print(f"{theme:6} new/old {ratio:5.2f}{'  REGRESSION' if slower else ''}")
+        if slower:
+            regressions.append(theme)
+
+    if regressions:
+        print(f"FAIL: slower than the old renderer (> {args.tolerance:.0%}) on {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def cmd_style(args) -> None:
+    from services import render_cache
+    from services.pptx_generator import build_pptx
+
+    per_slide = 15
+    n_slides = max(args.runs // per_slide, 1)
+    slides = [
+        {
+            "layout": "bullet",
+            "title": f"Slide {i}",
+            "bullets": [f"Bullet {j} on slide {i}" for j in range(per_slide)],
+        }
+        for i in range(n_slides)
+    ]
+    runs = n_slides * (per_slide + 1)
+
+    results = {}
+    for label, extra in (("plain", {}), ("styled", STYLE_CONFIG)):
+        config = {"theme_id": args.theme, **extra}
+
+        def render():
+            path = build_pptx(1, slides, config)
+            os.remove(render_cache.manifest_path(path))
+
+        render()
+        wall, cpu = _timed(render, args.repeat)
+        results[label] = min(cpu)
+        _report(f"{label:6} {n_slides} slides / {runs} runs", wall, cpu)
+
+    overhead = results["styled"] - results["plain"]
+    print(f"styling overhead (min cpu): {overhead * 1000:.1f} ms ({overhead / runs * 1e6:.2f} us per run)")
+
+
+def cmd_save(args) -> None:
+    import io
+
+    from services import package_writer
+    from services.docx_generator import _build_document
+    from services.pptx_generator import TEMPLATE_MAP, _context, _generator, _load_template
+
+    def measure(label, save):
+        sizes = []
+
+        def run():
+            buf = io.BytesIO()
+            save(buf)
+            sizes.append(buf.tell())
+
+        run()  # warm-up (fills the image re-encode cache for "small")
+        wall, cpu = _timed(run, args.repeat)
+        print(
+            f"{label:22} {sizes[-1] / 1024:9.1f} KB  "
+            f"cpu median {statistics.median(cpu) * 1000:8.1f} ms  wall median {statistics.median(wall) * 1000:8.1f} ms"
+        )
+
+    slides = sample_slides(args.slides)
+    for theme in args.themes or sorted(TEMPLATE_MAP):
+        prs = _load_template(theme, TEMPLATE_MAP[theme], {})
+        ctx = _context(prs, TEMPLATE_MAP[theme], 1)
+        for slide_data in slides:
+            _generator.add_slide(ctx, slide_data)
+        for profile in package_writer.PROFILES:
+            measure(f"{theme} {profile}", lambda buf: package_writer.save_presentation(prs, buf, profile))
+
+    pages = {
+        p: [{"heading": f"Heading {p}.{i}", "content": "Body text sentence. " * 40} for i in range(2)]
+        for p in range(1, 41)
+    }
+    doc = _build_document("Benchmark document", pages)
+    for profile in package_writer.PROFILES:
+        measure(f"docx {profile}", lambda buf: package_writer.save_document(doc, buf, profile))
+
+
+def cmd_thumbnails(args) -> None:
+    from services import thumbnails
+    from services.pptx_generator import TEMPLATE_MAP
+
+    slides = sample_slides(args.slides)
+    over = []
+    for theme in args.themes or sorted(TEMPLATE_MAP):
+        config = {"theme_id": theme}
+        # first preview of a theme in this process: template read + theme look
+        thumbnails._looks.clear()
+        thumbnails._background_images.clear()
+        thumbnails._thumbs.clear()
+        start = time.process_time()
+        thumbnails.render_thumbnail(slides[0], config, args.width)
+        cold = time.process_time() - start
+        thumbnails.render_strip(slides, config, args.width)  # warm-up: glyphs, backgrounds
+
+        def render():
+            thumbnails._thumbs.clear()
+            for slide in slides:
+                thumbnails.render_thumbnail(slide, config, args.width)
+
+        def strip():
+            thumbnails._thumbs.clear()
+            thumbnails.render_strip(slides, config, args.width)
+
+        wall, cpu = _timed(render, args.repeat)
+        _, strip_cpu = _timed(strip, args.repeat)
+        per_slide = statistics.median(cpu) / len(slides) * 1000
+        strip_per_slide = statistics.median(strip_cpu) / len(slides) * 1000
+        _report(f"{theme:6} {args.slides:4d} slides", wall, cpu)
+        print(
+            f"       per slide cpu median {per_slide:6.2f} ms  strip {strip_per_slide:6.2f} ms/slide  "
+            f"first preview of the theme {cold * 1000:6.1f} ms"
+        )
+        if max(per_slide, strip_per_slide) > args.target:
+            over.append(theme)
+
+    if over:
+        print(f"FAIL: over {args.target} ms per slide on {', '.join(over)}")
+        sys.exit(1)
+
+
+def _legacy_models():
+    """The response schemas as they were before the tagged union (for `serialize`)."""
+    from typing import Dict, List, Optional, Union
+
+    from pydantic import BaseModel, ConfigDict
+
+    from models.enums import SlideLayout
+
+    class TitleSlide(BaseModel):
+        layout: SlideLayout
+        title: str
+
+    class BulletSlide(TitleSlide):
+        bullets: List[str]
+
+    class TwoColumnSlide(TitleSlide):
+        left: str
+        right: str
+
+    class ImageSlide(TitleSlide):
+        image_url: str
+
+    class PresentationOut(BaseModel):
+        model_config = ConfigDict(from_attributes=True)
+
+        presentation_id: int
+        topic: str
+        content: List[Union[TitleSlide, BulletSlide, TwoColumnSlide, ImageSlide]]
+        configuration: Optional[Dict]
+
+    return PresentationOut
+
+
+def cmd_serialize(args) -> None:
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from core import json_response
+    from models import schemas
+
+    # what FastAPI does with a response_model: validate (from attributes),
+    # dump to JSON-able Python, render with the route's response class
+    def via_model(model, response_class, obj):
+        adapter = TypeAdapter(model)
+        return lambda: response_class(adapter.dump_python(adapter.validate_python(obj, from_attributes=True), mode="json"))
+
+    slides = sample_slides(args.slides)
+    for slide in slides:
+        if slide["layout"] == "image":
+            slide["image_url"] = "https://example.com/figure.png"
+    deck = SimpleNamespace(presentation_id=1, topic="Benchmark", content=slides, configuration={"theme_id": "ppt1"})
+    now = datetime.now()
+    dashboard = {
+        "presentations": [
+            {
+                "id": i,
+                "title": f"Deck {i}",
+                "summary": "A short summary of the deck " * 4,
+                "type": "pptx",
+                "created_at": now,
+                "download_endpoint": f"/api/v1/presentations/{i}/download",
+                "content": sample_slides(8),
+            }
+            for i in range(args.items // 2)
+        ],
+        "projects": [
+            {
+                "id": i,
+                "title": f"Project {i}",
+                "summary": f"Project {i}",
+                "type": "docx",
+                "created_at": now,
+                "download_endpoint": f"/api/v1/documents/{i}/export",
+            }
+            for i in range(args.items - args.items // 2)
+        ],
+    }
+
+    print(f"fast JSON response class: {json_response.JSONResponse.__name__}")
+    cases = [
+        (f"deck {args.slides} slides  before", via_model(_legacy_models(), json_response.StdJSONResponse, deck)),
+        (f"deck {args.slides} slides  after ", via_model(schemas.PresentationOut, json_response.JSONResponse, deck)),
+        (
+            f"dashboard {args.items} items before",
+            lambda: json_response.StdJSONResponse(jsonable_encoder(dashboard)),
+        ),
+        (
+            f"dashboard {args.items} items after ",
+            via_model(schemas.DashboardOut, json_response.JSONResponse, dashboard),
+        ),
+    ]
+    bodies = {}
+    for label, run in cases:
+        bodies.setdefault(label.split()[0], set()).add(run().body)
+        run()
+        _report(label, *_timed(run, args.repeat))
+    for kind, seen in bodies.items():
+        print(f"{kind}: before/after bodies {'identical' if len(seen) == 1 else 'DIFFER'}")
+
+
+def _import_main_once() -> dict:
+    """{module: cumulative microseconds} from `python -X importtime -c "import main"` in a fresh interpreter."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")  # nothing touches it at import time
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import main failed:\n{proc.stderr[-2000:]}")
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cum.isdigit():
+            cumulative[name] = int(cum)
+    return cumulative
+
+
+def cmd_importtime(args) -> None:
+    runs = [_import_main_once() for _ in range(args.runs)]
+    totals = [run["main"] / 1000 for run in runs]
+    median = statistics.median(totals)
+    print(f"import main: median {median:.0f} ms  min {min(totals):.0f} ms  (budget {args.budget} ms)")
+
+    last = runs[-1]
+    top_level = {name: us for name, us in last.items() if "." not in name and name != "main"}
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in last]
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+    if median > args.budget:
+        print(f"FAIL: cold import {median:.0f} ms is over the {args.budget} ms budget")
+    if eager or median > args.budget:
+        sys.exit(1)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="full PPTX render time per theme")
+    render.add_argument("--slides", type=int, default=40)
+    render.add_argument("--repeat", type=int, default=9)
+    render.add_argument("--themes", nargs="*")
+    render.add_argument("--style", action="store_true", help="apply font/color overrides")
+    render.add_argument(
+        "--tolerance", type=float, default=0.05, help="allowed slowdown vs the old renderer (0.05 = 5%%)"
+    )
+    render.set_defaults(func=cmd_render)
+
+    style = sub.add_parser("style", help="cost of config styling on a deck with many runs")
+    style.add_argument("--runs", type=int, default=3000)
+    style.add_argument("--repeat", type=int, default=5)
+    style.add_argument("--theme", default="ppt1")
+    style.set_defaults(func=cmd_style)
+
+    save = sub.add_parser("save", help="save time and file size per output profile")
+    save.add_argument("--slides", type=int, default=40)
+    save.add_argument("--repeat", type=int, default=5)
+    save.add_argument("--themes", nargs="*")
+    save.set_defaults(func=cmd_save)
+
+    thumbs = sub.add_parser("thumbnails", help="slide preview render time per theme (cache cleared)")
+    thumbs.add_argument("--slides", type=int, default=40)
+    thumbs.add_argument("--repeat", type=int, default=5)
+    thumbs.add_argument("--width", type=int, default=320)
+    thumbs.add_argument("--themes", nargs="*")
+    thumbs.add_argument(
+        "--target", type=float, default=THUMBNAIL_TARGET_MS, help="ms per slide (thumbnail or strip), exit 1 when over"
+    )
+    thumbs.set_defaults(func=cmd_thumbnails)
+
+    serialize = sub.add_parser("serialize", help="response validation + JSON encoding time, old vs new schemas")
+    serialize.add_argument("--slides", type=int, default=100)
+    serialize.add_argument("--items", type=int, default=1000)
+    serialize.add_argument("--repeat", type=int, default=20)
+    serialize.set_defaults(func=cmd_serialize)
+
+    importtime = sub.add_parser("importtime", help="cold `import main` time vs a budget (exit 1 when over)")
+    importtime.add_argument("--runs", type=int, default=5)
+    importtime.add_argument("--budget", type=int, default=IMPORT_BUDGET_MS, help="ms")
+    importtime.add_argument("--top", type=int, default=10, help="slowest top-level packages to list")
+    importtime.set_defaults(func=cmd_importtime)
+
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
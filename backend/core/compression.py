@@ -0,0 +1,212 @@
+"""
+Negotiated response compression (gzip, and brotli when installed).
+
+Only text-like bodies (JSON, text/*, XML, SVG) at least
+COMPRESSION_MIN_SIZE bytes long are compressed. Everything else passes
+through untouched: PPTX/DOCX/ZIP downloads and JPEG previews by content
+type, plus partial (206) and already-encoded responses.
+
+Compressed bodies of responses that carry an ETag (presentations, projects)
+are kept in a small LRU keyed by (ETag, encoding), so polling an unchanged
+deck costs a dict lookup instead of a recompression. Their ETag is sent as
+weak (W/"..."): the compressed bytes differ from the identity ones, and
+If-None-Match compares weakly anyway (core/http_cache.py).
+"""
+
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from core.config import Config
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # about gzip -6 speed at a better ratio
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# no body, or a byte range of the identity representation
+_SKIP_STATUS = frozenset((204, 206, 304))
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best of "br" / "gzip" the client accepts (q > 0), preferring br on ties; else None."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    wildcard = weights.get("*", 0.0)
+    offered = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0: same body, same bytes
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _stream_compressor(encoding: str):
+    """Object with compress(chunk) / flush() for bodies sent in several messages."""
+    if encoding == "br":
+        return _BrotliStream()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies by (ETag, encoding)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses for clients that accept it."""
+
+    def __init__(self, app, minimum_size: Optional[int] = None, cache_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = Config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.cache = CompressedBodyCache(Config.COMPRESSION_CACHE_SIZE if cache_size is None else cache_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        mode = None  # None: undecided, "pass", "stream"
+        stream = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, mode, stream
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] in _SKIP_STATUS or not compressible(headers):
+                    mode = "pass"
+                    await send(message)
+                else:
+                    MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                    start_message = message  # held until the body shows whether to compress
+                return
+
+            if message["type"] != "http.response.body" or mode == "pass":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if mode == "stream":
+                chunk = stream.compress(body)
+                if not more_body:
+                    chunk += stream.flush()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            if not more_body and len(body) < self.minimum_size:
+                mode = "pass"
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+            if more_body:
+                # streamed body: compress as it goes, length unknown
+                mode = "stream"
+                stream = _stream_compressor(encoding)
+                del headers["Content-Length"]
+                await send(start_message)
+                await send({"type": "http.response.body", "body": stream.compress(body), "more_body": True})
+                return
+
+            mode = "pass"
+            key = (etag, encoding) if etag else None
+            compressed = self.cache.get(key) if key else None
+            if compressed is None:
+                compressed = compress(body, encoding)
+                if key:
+                    self.cache.put(key, compressed)
+            headers["Content-Length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
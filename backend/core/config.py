@@ -5,4 +5,75 @@ load_dotenv()
 
 class Config:
     DATABASE_URL = os.getenv("DATABASE_URL")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+    # tracing: JSON-lines span export (unset = in-memory only) and the
+    # /debug/traces endpoint (off unless DEBUG_TRACES=1)
+    TRACE_FILE = os.getenv("TRACE_FILE")
+    DEBUG_TRACES = os.getenv("DEBUG_TRACES", "0") == "1"
+
+    # derived (restyled) PPTX templates kept on disk, least recently used evicted
+    TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join("storage", "template_cache"))
+    TEMPLATE_CACHE_MAX = int(os.getenv("TEMPLATE_CACHE_MAX", "64"))
+
+    # zip/output profile for saved .pptx/.docx when a request doesn't pick one:
+    # "default" | "fast" | "small" (see services/package_writer.py)
+    OUTPUT_PROFILE = os.getenv("OUTPUT_PROFILE", "default")
+
+    # where rendered downloads are published (see services/artifacts.py):
+    # "local" (ARTIFACT_DIR, a shared volume for several replicas) or "s3"
+    ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "local")
+    ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join("storage", "artifacts"))
+    ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+    ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "artifacts")
+    ARTIFACT_S3_ENDPOINT_URL = os.getenv("ARTIFACT_S3_ENDPOINT_URL")  # MinIO / local stand-in
+    # redirect downloads to a signed URL (presigned S3, or HMAC-signed
+    # /api/v1/artifacts/... for the local store when ARTIFACT_URL_SECRET is set)
+    ARTIFACT_DIRECT_DOWNLOADS = os.getenv("ARTIFACT_DIRECT_DOWNLOADS", "0") == "1"
+    ARTIFACT_URL_SECRET = os.getenv("ARTIFACT_URL_SECRET", "")
+    ARTIFACT_URL_TTL = int(os.getenv("ARTIFACT_URL_TTL", "300"))  # seconds
+
+    # scheduler lanes (core/scheduler.py): worker threads for interactive
+    # routes, and per heavy lane the concurrent slots plus how many requests
+    # may wait for one (beyond that: 429); waiting longer than
+    # SCHED_QUEUE_TIMEOUT seconds gives a 503
+    SCHED_INTERACTIVE_THREADS = int(os.getenv("SCHED_INTERACTIVE_THREADS", "40"))
+    SCHED_GENERATION_CONCURRENCY = int(os.getenv("SCHED_GENERATION_CONCURRENCY", "4"))
+    SCHED_GENERATION_QUEUE = int(os.getenv("SCHED_GENERATION_QUEUE", "16"))
+    SCHED_RENDER_CONCURRENCY = int(os.getenv("SCHED_RENDER_CONCURRENCY", "4"))
+    SCHED_RENDER_QUEUE = int(os.getenv("SCHED_RENDER_QUEUE", "32"))
+    SCHED_QUEUE_TIMEOUT = float(os.getenv("SCHED_QUEUE_TIMEOUT", "30"))
+
+    # per-user limits on the Gemini generation routes (services/quotas.py);
+    # 0 = unlimited
+    QUOTA_MAX_CONCURRENT = int(os.getenv("QUOTA_MAX_CONCURRENT", "2"))
+    QUOTA_REQUESTS_PER_MINUTE = int(os.getenv("QUOTA_REQUESTS_PER_MINUTE", "10"))
+    QUOTA_DAILY_TOKENS = int(os.getenv("QUOTA_DAILY_TOKENS", "500000"))
+
+    # Idempotency-Key on generation / creation POSTs (services/idempotency.py):
+    # how long a response is replayed, how long a duplicate waits for the
+    # first request, after how long an unfinished claim is abandoned (seconds)
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "90"))
+    IDEMPOTENCY_PENDING_TIMEOUT = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "600"))
+
+    # storage GC (services/storage_gc.py): seconds between background runs
+    # (0 = off; `python -m services.storage_gc` runs it once), renders
+    # untouched for RENDER_MAX_AGE seconds are dropped (0 = keep), leftover
+    # temp files after TMP_MAX_AGE, oldest renders beyond MAX_BYTES (0 = no
+    # budget); deletes go in batches with a pause between them
+    STORAGE_GC_INTERVAL = int(os.getenv("STORAGE_GC_INTERVAL", "21600"))
+    STORAGE_GC_RENDER_MAX_AGE = int(os.getenv("STORAGE_GC_RENDER_MAX_AGE", str(7 * 86400)))
+    STORAGE_GC_TMP_MAX_AGE = int(os.getenv("STORAGE_GC_TMP_MAX_AGE", "3600"))
+    STORAGE_GC_MAX_BYTES = int(os.getenv("STORAGE_GC_MAX_BYTES", "0"))
+    STORAGE_GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", "200"))
+    STORAGE_GC_BATCH_PAUSE = float(os.getenv("STORAGE_GC_BATCH_PAUSE", "0.05"))  # seconds
+
+    # create missing tables / search index when the app starts; set to 0 when
+    # a separate deploy step runs main.migrate() (faster container start)
+    INIT_DB_ON_STARTUP = os.getenv("INIT_DB_ON_STARTUP", "1") == "1"
+
+    # response compression: smallest body worth compressing (bytes) and how
+    # many compressed ETag'd bodies to keep (see core/compression.py)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "256"))
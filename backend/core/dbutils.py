@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from core.config import Config
@@ -13,4 +15,38 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class QueryCounter:
+    """
+    Collects every SQL statement executed on an engine while active.
+
+    Used to check that a route issues a bounded number of queries, e.g.:
+
+        with count_queries() as counter:
+            client.get("/api/v1/documents/1")
+        assert counter.count <= 3
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(bind=None):
+    """Count the SQL statements executed on `bind` (default: app engine)."""
+    target = bind if bind is not None else engine
+    counter = QueryCounter()
+    event.listen(target, "before_cursor_execute", counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", counter._on_execute)
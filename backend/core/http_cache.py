@@ -0,0 +1,131 @@
+"""
+Conditional GET helpers.
+
+    tag = http_cache.etag("presentation", version, config)
+    if http_cache.is_fresh(request, tag):
+        return http_cache.not_modified(tag)
+    ...
+    response.headers.update(http_cache.headers(tag))
+
+ETags are strong: a hash of whatever determines the response body (row
+versions, config, renderer versions, the digest of a rendered file),
+computed from a few columns so a matching If-None-Match is answered before
+any rendering or serialization.
+
+Byte ranges: FileResponse already serves Range / If-Range (compared with
+the ETag it is given); content_response() does the same for bodies built
+in memory, and routers/artifacts.py for blobs streamed from a remote
+store (requested_range), so every kind of download can be resumed.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# clients may keep a copy but must revalidate it on every use
+REVALIDATE = "private, no-cache"
+
+
+def etag(*parts: Any) -> str:
+    """Quoted strong ETag for `parts` (JSON-serializable; datetimes via str)."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def is_fresh(request: Request, tag: str) -> bool:
+    """True if the request's If-None-Match already names `tag` (or is `*`)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    sent = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in sent or tag in sent
+
+
+def headers(tag: str, cache_control: str = REVALIDATE) -> Dict[str, str]:
+    return {"ETag": tag, "Cache-Control": cache_control}
+
+
+def not_modified(tag: str, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=304, headers=headers(tag, cache_control))
+
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end exclusive) for a single-range Range header, or None when the
+    header should be ignored (malformed, not bytes, several ranges; a full
+    200 is a valid answer to those). Raises RangeNotSatisfiable when it
+    starts past the end.
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":  # suffix: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size
+    start = int(first)
+    end = size if last == "" else min(int(last) + 1, size)
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end <= start:
+        return None
+    return start, end
+
+
+def requested_range(request: Request, tag: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The byte range to answer with a 206: the request's Range (see
+    byte_range) when it has no If-Range or its If-Range still names `tag`;
+    else None for a full 200. Raises RangeNotSatisfiable.
+    """
+    requested = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if not requested or (if_range is not None and if_range != tag):
+        return None
+    return byte_range(requested, size)
+
+
+def not_satisfiable(size: int, response_headers: Dict[str, str]) -> Response:
+    return Response(status_code=416, headers={**response_headers, "Content-Range": f"bytes */{size}"})
+
+
+def content_response(
+    request: Request,
+    tag: str,
+    render: Callable[[], bytes],
+    media_type: str,
+    cache_control: str = REVALIDATE,
+) -> Response:
+    """
+    Conditional, range-aware response for a body built in memory: 304 on a
+    matching If-None-Match (render is not called), 206 for a Range whose
+    If-Range (if any) still names `tag`, else 200.
+    """
+    if is_fresh(request, tag):
+        return not_modified(tag, cache_control)
+    body = render()
+    response_headers = {**headers(tag, cache_control), "Accept-Ranges": "bytes"}
+
+    try:
+        span = requested_range(request, tag, len(body))
+    except RangeNotSatisfiable:
+        return not_satisfiable(len(body), response_headers)
+    if span is not None:
+        start, end = span
+        response_headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(body)}"
+        return Response(body[start:end], status_code=206, media_type=media_type, headers=response_headers)
+    return Response(body, media_type=media_type, headers=response_headers)
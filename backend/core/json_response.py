@@ -0,0 +1,25 @@
+"""
+Default JSON response class for the API.
+
+orjson is optional: when it is installed responses are rendered with
+ORJSONResponse, otherwise with Starlette's stdlib-json JSONResponse. Both
+produce the same compact UTF-8 JSON for what our routes return (dicts,
+lists, strings, numbers, ISO datetimes), so clients can't tell which one
+is in use.
+
+    app = FastAPI(default_response_class=json_response.JSONResponse)
+"""
+
+from fastapi.responses import JSONResponse as StdJSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as JSONResponse
+else:
+    JSONResponse = StdJSONResponse
+
+FAST = orjson is not None
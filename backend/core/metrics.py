@@ -0,0 +1,313 @@
+"""
+In-process metrics exposed in Prometheus text format on /metrics.
+
+No client library or external service is needed: counters, gauges and
+histograms live in this module and are rendered on scrape.
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_fmt_labels(self.label_names, key)} {_fmt_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count], sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            items = [(k, (list(v[0]), v[1])) for k, v in self._values.items()]
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {running}"
+            yield f"{self.name}_sum{_fmt_labels(self.label_names, key)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.label_names, key)} {running}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, doc, labels=()) -> Counter:
+        return self.register(Counter(name, doc, labels))
+
+    def gauge(self, name, doc, labels=()) -> Gauge:
+        return self.register(Gauge(name, doc, labels))
+
+    def histogram(self, name, doc, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, doc, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------------- HTTP ----------------
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being served.")
+
+# ---------------- DB ----------------
+DB_QUERIES = REGISTRY.counter("db_queries_total", "SQL statements executed.")
+DB_QUERY_SECONDS = REGISTRY.counter("db_query_seconds_total", "Time spent executing SQL.")
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request", "SQL statements per HTTP request.", ("route",), COUNT_BUCKETS
+)
+DB_SECONDS_PER_REQUEST = REGISTRY.histogram(
+    "db_seconds_per_request", "SQL time per HTTP request.", ("route",)
+)
+
+# ---------------- LLM ----------------
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Gemini call latency.", ("operation",), LLM_BUCKETS
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Gemini calls by outcome.", ("operation", "status")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Gemini tokens used.", ("operation", "kind")
+)
+
+# ---------------- Rendering ----------------
+RENDER_LATENCY = REGISTRY.histogram(
+    "render_duration_seconds", "PPTX/DOCX render time.", ("kind",)
+)
+RENDER_BYTES = REGISTRY.histogram(
+    "render_output_bytes", "Size of rendered PPTX/DOCX files.", ("kind",), BYTES_BUCKETS
+)
+
+
+# ---------------- Scheduler lanes ----------------
+SCHED_RUNNING = REGISTRY.gauge("scheduler_lane_running", "Requests running in a scheduler lane.", ("lane",))
+SCHED_QUEUED = REGISTRY.gauge("scheduler_lane_queued", "Requests waiting for a scheduler lane slot.", ("lane",))
+SCHED_REJECTED = REGISTRY.counter(
+    "scheduler_rejected_total", "Requests turned away by lane admission control.", ("lane", "reason")
+)
+
+# ---------------- Storage GC ----------------
+STORAGE_GC_FILES = REGISTRY.counter(
+    "storage_gc_deleted_files_total", "Files deleted by the storage GC.", ("reason",)
+)
+STORAGE_GC_BYTES = REGISTRY.counter(
+    "storage_gc_reclaimed_bytes_total", "Bytes reclaimed by the storage GC.", ("reason",)
+)
+STORAGE_GC_LATENCY = REGISTRY.histogram(
+    "storage_gc_duration_seconds", "Storage GC run time.", buckets=LLM_BUCKETS
+)
+
+# ---------------- Per-request DB accounting ----------------
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+# cursor-execute start times, per connection (a connection is used by one thread at a time)
+_query_start = threading.local()
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every SQL statement executed through `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        _query_start.t = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(_query_start, "t", time.perf_counter())
+        DB_QUERIES.inc()
+        DB_QUERY_SECONDS.inc(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and DB usage per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+
+            # label by route template (/api/v1/presentations/{presentation_id})
+            # rather than raw path to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status["code"])
+            HTTP_LATENCY.observe(elapsed, method=method, route=route_path)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route=route_path)
+            DB_SECONDS_PER_REQUEST.observe(stats.db_seconds, route=route_path)
+
+
+# ---------------- Helpers for services ----------------
+
+def record_llm_call(operation: str, seconds: float, ok: bool, response=None) -> None:
+    LLM_LATENCY.observe(seconds, operation=operation)
+    LLM_REQUESTS.inc(operation=operation, status="ok" if ok else "error")
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, operation=operation, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, operation=operation, kind="completion")
+
+
+def instrument_render(kind: str):
+    """Decorator for renderers that return the path of the written file."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            path = fn(*args, **kwargs)
+            RENDER_LATENCY.observe(time.perf_counter() - start, kind=kind)
+            try:
+                RENDER_BYTES.observe(os.path.getsize(path), kind=kind)
+            except (OSError, TypeError):
+                pass
+            return path
+
+        return wrapper
+
+    return decorator
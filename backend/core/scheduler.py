@@ -0,0 +1,170 @@
+"""
+Priority lanes for blocking route work.
+
+Sync routes normally all share AnyIO's default thread pool, so a burst of
+multi-second Gemini generations or renders could hold every worker
+thread while slide edits queue behind them. Heavy routes are instead run in
+their own lane, and each lane has its own concurrency limit:
+
+    @router.post("/")
+    @scheduler.lane("generation")
+    def create_presentation(...): ...
+
+A sync route whose expensive step is only one part of it (a download that
+is usually answered from the artifact store or with a 304) submits just
+that step instead, so the cheap answers never queue:
+
+    path = scheduler.run_in_lane("render", build_pptx, presentation_id, ...)
+
+    interactive  everything not in a lane: edits, reads, dashboard. This is
+                 the default pool, sized by SCHED_INTERACTIVE_THREADS, which
+                 the heavy lanes no longer use up
+    generation   Gemini calls (create / refine): SCHED_GENERATION_*
+    render       PPTX / DOCX / thumbnail rendering: SCHED_RENDER_*
+
+Admission control: when a lane's slots are all busy and
+SCHED_<LANE>_QUEUE requests are already waiting, a new request is turned
+away at once with 429. A request that waits longer than
+SCHED_QUEUE_TIMEOUT seconds for a slot gets a 503. Both send a Retry-After
+estimated from the lane's recent run times, so clients back off instead of
+piling up behind a saturated lane.
+"""
+
+import functools
+import math
+import time
+from typing import Callable, Dict, Optional
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+from fastapi import HTTPException
+
+from core import metrics, tracing
+from core.config import Config
+
+INTERACTIVE = "interactive"
+GENERATION = "generation"
+RENDER = "render"
+
+# Retry-After bounds (seconds)
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+# weight of the latest run in the lane's average run time
+_EWMA_ALPHA = 0.2
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.waiting = 0
+        self.avg_seconds = 1.0
+        self._slots: Optional[anyio.CapacityLimiter] = None
+        # threads for the admitted calls; a slot is already held, so never waits
+        self._threads: Optional[anyio.CapacityLimiter] = None
+
+    def _limiters(self):
+        # created on first use, inside the event loop that will use them
+        if self._slots is None:
+            self._slots = anyio.CapacityLimiter(self.concurrency)
+            self._threads = anyio.CapacityLimiter(self.concurrency)
+        return self._slots, self._threads
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely get a slot."""
+        backlog = (self.waiting + 1) / self.concurrency
+        return min(max(math.ceil(backlog * self.avg_seconds), MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> HTTPException:
+        metrics.SCHED_REJECTED.inc(lane=self.name, reason=reason)
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def run(self, fn: Callable, *args):
+        """Run blocking `fn(*args)` in a worker thread once the lane has a free slot."""
+        slots, threads = self._limiters()
+        if slots.available_tokens == 0 and self.waiting >= self.max_queue:
+            raise self._reject(429, "queue_full", f"Too many {self.name} requests queued, retry later")
+
+        self.waiting += 1
+        metrics.SCHED_QUEUED.inc(lane=self.name)
+        try:
+            with tracing.span("queue", lane=self.name), anyio.move_on_after(self.queue_timeout) as scope:
+                await slots.acquire()
+        finally:
+            self.waiting -= 1
+            metrics.SCHED_QUEUED.dec(lane=self.name)
+        if scope.cancelled_caught:
+            raise self._reject(503, "timeout", f"No {self.name} capacity available, retry later")
+
+        self.running += 1
+        metrics.SCHED_RUNNING.inc(lane=self.name)
+        start = time.perf_counter()
+        try:
+            return await anyio.to_thread.run_sync(fn, *args, limiter=threads)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.avg_seconds += _EWMA_ALPHA * (elapsed - self.avg_seconds)
+            self.running -= 1
+            metrics.SCHED_RUNNING.dec(lane=self.name)
+            slots.release()
+
+
+_lanes: Dict[str, Lane] = {}
+
+
+def _build_lane(name: str) -> Lane:
+    if name == GENERATION:
+        return Lane(name, Config.SCHED_GENERATION_CONCURRENCY, Config.SCHED_GENERATION_QUEUE, Config.SCHED_QUEUE_TIMEOUT)
+    if name == RENDER:
+        return Lane(name, Config.SCHED_RENDER_CONCURRENCY, Config.SCHED_RENDER_QUEUE, Config.SCHED_QUEUE_TIMEOUT)
+    raise ValueError(f"Unknown scheduler lane: {name}")
+
+
+def get_lane(name: str) -> Lane:
+    if name not in _lanes:
+        _lanes[name] = _build_lane(name)
+    return _lanes[name]
+
+
+def reset() -> None:
+    """Drop the lanes (config changes, a new event loop); rebuilt on next use."""
+    _lanes.clear()
+
+
+def lane(name: str):
+    """
+    Route decorator: run the (sync) endpoint in lane `name`. Goes under the
+    @router.* decorator; FastAPI still sees the original signature.
+    """
+    _build_lane(name)  # fail at import time on a typo
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await get_lane(name).run(functools.partial(fn, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def run_in_lane(name: str, fn: Callable, *args, **kwargs):
+    """
+    From a sync route (an AnyIO worker thread): run blocking `fn(*args,
+    **kwargs)` in lane `name` and return its result. The calling thread
+    waits meanwhile, bounded by the lane's queue limit and SCHED_QUEUE_TIMEOUT.
+    """
+    return anyio.from_thread.run(get_lane(name).run, functools.partial(fn, *args, **kwargs))
+
+
+def configure_interactive() -> None:
+    """Size AnyIO's default thread pool (the interactive lane). Call from startup."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = Config.SCHED_INTERACTIVE_THREADS
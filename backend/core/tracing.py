@@ -0,0 +1,272 @@
+"""
+Lightweight in-process tracing.
+
+    with tracing.span("render.pptx", slides=12):
+        ...
+
+Spans nest through a contextvar (which also follows sync routes into the
+threadpool). Finished spans are written as JSON lines to
+Config.TRACE_FILE (if set; by a background thread) and kept in a small
+in-memory buffer served by /debug/traces. TracingMiddleware opens one root
+span per request and returns its id in the X-Trace-Id header.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import PlainTextResponse
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+_TRACE_ID_RE = re.compile(r"^[0-9a-fA-F]{16,32}$")
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "_t0", "duration_ms", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = dict(attributes)
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# ---------------- Export ----------------
+
+class _TraceFileWriter:
+    """
+    Appends span records to Config.TRACE_FILE from a background thread, so
+    a request only enqueues them. The file stays open between writes and is
+    reopened when Config.TRACE_FILE changes.
+    """
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, path: str, record: Dict[str, Any]) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+        self._queue.put((path, record))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until everything enqueued so far is written."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        f = None
+        current = None
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for path, record in items:
+                if path is None:  # flush marker
+                    if f is not None:
+                        f.flush()
+                    record.set()
+                    continue
+                try:
+                    if path != current:
+                        if f is not None:
+                            f.close()
+                        f = open(path, "a", encoding="utf-8")
+                        current = path
+                    f.write(json.dumps(record, default=str) + "\n")
+                except OSError as e:
+                    f, current = None, None
+                    logger.warning("Could not write trace file %s: %s", path, e)
+            if f is not None:
+                try:
+                    f.flush()
+                except OSError as e:
+                    logger.warning("Could not write trace file %s: %s", current, e)
+
+
+class _Exporter:
+    """JSON-lines file (optional) + ring buffer of the most recent traces."""
+
+    def __init__(self, max_traces: int = 200):
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.max_traces = max_traces
+        self._file = _TraceFileWriter()
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(record)
+
+        if Config.TRACE_FILE:
+            self._file.write(Config.TRACE_FILE, record)
+
+    def flush(self) -> None:
+        """Write out the spans still queued for the trace file."""
+        self._file.flush()
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._traces.items())[-limit:]
+        return [{"trace_id": tid, "spans": list(spans)} for tid, spans in reversed(items)]
+
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return list(spans) if spans is not None else None
+
+
+exporter = _Exporter()
+
+
+# ---------------- API ----------------
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str] = None, **attributes):
+    """Open a span as a child of the current one (or start a new trace)."""
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id = parent.trace_id
+    current = Span(name, trace_id or uuid.uuid4().hex, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        exporter.export(current)
+
+
+def traced(name: str):
+    """Decorator form of span() for service functions."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware: one root span per request, id returned in X-Trace-Id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # reuse a caller-supplied trace id so client and server logs line up
+        incoming = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-trace-id":
+                candidate = value.decode("latin-1")
+                if _TRACE_ID_RE.match(candidate):
+                    incoming = candidate
+                break
+
+        method = scope.get("method", "")
+        started = False
+        with span(f"{method} {scope.get('path', '')}", trace_id=incoming, method=method) as root:
+
+            async def send_wrapper(message):
+                nonlocal started
+                if message["type"] == "http.response.start":
+                    started = True
+                    MutableHeaders(scope=message)[TRACE_HEADER] = root.trace_id
+                    root.set(status=message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception:
+                # answer the 500 here so it still carries the trace id;
+                # the outer error middleware sees the response as started
+                if not started:
+                    response = PlainTextResponse(
+                        "Internal Server Error",
+                        status_code=500,
+                        headers={TRACE_HEADER: root.trace_id},
+                    )
+                    root.set(status=500)
+                    await response(scope, receive, send)
+                raise
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{method} {route.path}"
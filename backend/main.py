@@ -1,14 +1,25 @@
+import asyncio
 import os
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 
-from core.dbutils import engine
+from core import compression, json_response, metrics, scheduler, tracing
+from core.config import Config
+from core.dbutils import SessionLocal, engine
 from models import models
-from routers import presentations, documents, dashboard_auth
+from routers import presentations, documents, dashboard_auth, search, artifacts
+from services import idempotency, section_history, storage_gc
+from services.search_index import ensure_search_index
 
 # 🔐 auth imports
+# Not lazy: the auth routes below and the current_active_user dependency of
+# every authenticated route (routers/auth_bridge.py) must exist when the
+# routes are declared. This costs ~0.1 s of the cold import (mostly
+# fastapi_users and its JWT/password hashing deps); the OAuth clients
+# themselves are ~1 ms.
 from auth.db import create_db_and_tables
 from auth.schemas import UserRead, UserCreate, UserUpdate
 from auth.users import (
@@ -23,10 +34,30 @@ from auth.users import (
 # Frontend URL for redirects after OAuth
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
-app = FastAPI(title="AI PPT & Document Generator API")
+# orjson-backed JSON rendering when orjson is installed (core/json_response.py)
+app = FastAPI(
+    title="AI PPT & Document Generator API",
+    default_response_class=json_response.JSONResponse,
+)
+
+# ========= 🔁 IDEMPOTENCY =========
+# stores responses of POSTs sent with an Idempotency-Key (innermost, so it
+# sees the uncompressed body); retries get them back via the Replay handler
+app.add_middleware(idempotency.IdempotencyMiddleware)
+app.add_exception_handler(idempotency.Replay, idempotency.replay_response)
+
+# ========= 🗜 COMPRESSION =========
+# gzip/brotli for JSON and other text bodies; downloads pass through untouched
+app.add_middleware(compression.CompressionMiddleware)
+
+# ========= 📈 METRICS =========
+# per-route latency / in-flight / DB usage; scraped from /metrics
+metrics.instrument_engine(engine)
+app.add_middleware(metrics.MetricsMiddleware)
 
-# ========= 🗄 EXISTING SQLALCHEMY TABLES (PPT/DOC PART) =========
-models.Base.metadata.create_all(bind=engine)
+# ========= 🧵 TRACING =========
+# one root span per request; trace id returned as X-Trace-Id
+app.add_middleware(tracing.TracingMiddleware)
 
 # ========= 🌐 CORS =========
 app.add_middleware(
@@ -43,6 +74,30 @@ def read_root():
     return {"message": "Welcome to PPT & Document Generator API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/traces", include_in_schema=False)
+def read_traces(limit: int = 50):
+    """Most recent request traces (only when DEBUG_TRACES=1)."""
+    if not Config.DEBUG_TRACES:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return tracing.exporter.recent(limit)
+
+
+@app.get("/debug/traces/{trace_id}", include_in_schema=False)
+def read_trace(trace_id: str):
+    if not Config.DEBUG_TRACES:
+        raise HTTPException(status_code=404, detail="Not Found")
+    spans = tracing.exporter.get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": spans}
+
+
 # ========= 🔐 AUTH ROUTES =========
 
 # 1) Email/password JWT login
@@ -120,12 +175,69 @@ app.include_router(
 )
 
 
+# SEARCH router -> /api/v1/search
+app.include_router(
+    search.router,
+    prefix="/api/v1",
+    tags=["search"],
+)
+
+
+# ARTIFACTS router (signed download links) -> /api/v1/artifacts/...
+app.include_router(
+    artifacts.router,
+    prefix="/api/v1",
+    tags=["artifacts"],
+)
+
+
+# ========= 🗄 SCHEMA (PPT/DOC PART) =========
+
+def init_db() -> None:
+    """
+    Create missing tables and the search index (first run: fills it), and
+    move legacy section history into revision rows.
+    """
+    models.Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    with SessionLocal() as db:
+        section_history.migrate_all_legacy_history(db)
+
+
+def migrate() -> None:
+    """
+    Schema step for every database (app tables + auth tables).
+
+    Runs on startup unless INIT_DB_ON_STARTUP=0; deployments that migrate
+    in a separate step run it once instead:
+
+        python -c "import main; main.migrate()"
+    """
+    init_db()
+    asyncio.run(create_db_and_tables())
+
+
 # ========= 🚀 STARTUP HOOK =========
 
 @app.on_event("startup")
 async def on_startup():
-    # create auth tables (User + OAuthAccount) in ppt_generator.db (async engine)
-    await create_db_and_tables()
+    # worker threads for routes outside the generation / render lanes
+    scheduler.configure_interactive()
+    if Config.INIT_DB_ON_STARTUP:
+        init_db()
+        # create auth tables (User + OAuthAccount) in ppt_generator.db (async engine)
+        await create_db_and_tables()
+    if Config.STORAGE_GC_INTERVAL > 0:
+        # orphaned / expired renders and temp files (services/storage_gc.py)
+        app.state.storage_gc = asyncio.create_task(storage_gc.run_periodically(Config.STORAGE_GC_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    task = getattr(app.state, "storage_gc", None)
+    if task is not None:
+        task.cancel()
+    tracing.exporter.flush()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey
+from sqlalchemy import (
+    Boolean, Column, Integer, Float, String, Text, JSON, DateTime, ForeignKey, Index,
+    LargeBinary, UniqueConstraint,
+)
 from core.dbutils import Base
-from sqlalchemy.orm import declarative_mixin, relationship
+from sqlalchemy.orm import declarative_mixin, deferred, relationship
 from datetime import datetime
 from models.enums import DocumentType
 
@@ -26,13 +29,56 @@ class Presentation(Timestamp, Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     topic = Column(String)
-    content = Column(JSON)
+    # old decks stored every slide in one JSON blob; they are moved into
+    # `slides` rows on their first write (see services/slide_store.py)
+    legacy_content = Column("content", JSON)
     configuration = Column(JSON, nullable=True)
+    # legacy: local path of the last render; downloads now go through
+    # `artifacts` (see services/artifacts.py)
     pptx_path = Column(String, nullable=True)
 
     # relationship back to User
     owner = relationship("User", back_populates="presentations")
 
+    # one row per slide, kept in deck order
+    slides = relationship(
+        "Slide",
+        back_populates="presentation",
+        cascade="all, delete-orphan",
+        order_by="Slide.position",
+    )
+
+    @property
+    def content(self):
+        """Assembled slide list (what PresentationOut.content returns)."""
+        if self.legacy_content is not None:
+            return self.legacy_content
+        return [slide.as_dict() for slide in self.slides]
+
+
+# ---------------------- SLIDE MODEL (PPT) ----------------------
+class Slide(Timestamp, Base):
+    __tablename__ = "slides"
+    __table_args__ = (
+        Index("ix_slides_presentation_position", "presentation_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    presentation_id = Column(
+        Integer, ForeignKey("presentations.presentation_id"), nullable=False
+    )
+
+    # sparse sort key: inserting or moving a slide only rewrites that row
+    position = Column(Float, nullable=False)
+    layout = Column(String, nullable=False)
+    # every slide field except "layout" (title, bullets, left/right, image_url, caption...)
+    payload = Column(JSON, nullable=False)
+
+    presentation = relationship("Presentation", back_populates="slides")
+
+    def as_dict(self) -> dict:
+        return {"layout": self.layout, **(self.payload or {})}
+
 
 # ---------------------- USER MODEL ----------------------
 class User(Timestamp, Base):
@@ -78,6 +124,7 @@ class Project(Timestamp, Base):
         "Section",
         back_populates="project",
         cascade="all, delete",
+        order_by="Section.order_index",
     )
 
 
@@ -93,7 +140,10 @@ class Section(Timestamp, Base):
     content = Column(Text, nullable=True)
     feedback = Column(String, nullable=True)
     comment = Column(Text, nullable=True)
-    history = Column(JSON, nullable=True)
+    # legacy full-copy history; new versions go to `section_revisions`
+    # (see services/section_history.py). Deferred so it is never loaded
+    # with the section unless explicitly touched.
+    history = deferred(Column(JSON, nullable=True))
 
     # page-wise positioning
     # page_number: which page this section belongs to (1-based)
@@ -102,3 +152,91 @@ class Section(Timestamp, Base):
     section_index = Column(Integer, nullable=True)
 
     project = relationship("Project", back_populates="sections")
+
+
+# ---------------------- SECTION REVISION MODEL ----------------------
+class SectionRevision(Timestamp, Base):
+    """
+    One version of a section's content (append-only).
+
+    Every SNAPSHOT_EVERY-th version stores the full text in `content`;
+    the others store a line delta against the previous version in `delta`.
+    """
+    __tablename__ = "section_revisions"
+    __table_args__ = (
+        UniqueConstraint("section_id", "version", name="uq_section_revisions_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    section_id = Column(Integer, ForeignKey("sections.id"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    prompt = Column(Text, nullable=True)
+
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    content = Column(Text, nullable=True)   # set for snapshots
+    delta = Column(JSON, nullable=True)     # set for deltas
+
+
+# ---------------------- ARTIFACT MODEL ----------------------
+class Artifact(Timestamp, Base):
+    """
+    Pointer from a rendered download to its bytes in the artifact store.
+
+    One row per (kind, object, output profile): `version_key` hashes what
+    the render was made from (deck/project version, styling, renderer,
+    profile), `digest` is the sha256 of the file, stored once under
+    `storage_key` however many rows point to it (see services/artifacts.py).
+    """
+    __tablename__ = "artifacts"
+    __table_args__ = (
+        UniqueConstraint("kind", "object_id", "profile", name="uq_artifacts_object_profile"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)        # "pptx" | "docx"
+    object_id = Column(Integer, nullable=False)  # presentation_id / project id
+    profile = Column(String, nullable=False)
+    version_key = Column(String, nullable=False)
+    digest = Column(String, nullable=False, index=True)
+    storage_key = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+
+
+# ---------------------- USAGE MODEL ----------------------
+class UserUsage(Timestamp, Base):
+    """
+    Generation requests and Gemini tokens a user spent on one (UTC) day;
+    the persistent side of the per-user quotas (see services/quotas.py).
+    """
+    __tablename__ = "user_usage"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_user_usage_user_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(String, nullable=False)  # "YYYY-MM-DD", UTC
+    requests = Column(Integer, default=0, nullable=False)
+    tokens = Column(Integer, default=0, nullable=False)
+
+
+# ------------------- IDEMPOTENCY KEY MODEL -------------------
+class IdempotencyKey(Timestamp, Base):
+    """
+    A client's Idempotency-Key for a POST: the request fingerprint, and once
+    the request succeeded its response, replayed for retries with the same
+    key (see services/idempotency.py).
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String, nullable=False)  # sha256 of method, path and body
+    status = Column(String, nullable=False)       # "pending" | "done"
+    response_status = Column(Integer, nullable=True)
+    response_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
@@ -1,36 +1,45 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 import re
-from typing import Optional, List, Dict, Union
+from datetime import datetime
+from typing import Annotated, Any, Optional, List, Dict, Literal, Union
 from models.enums import SlideLayout, DocumentType  
 
 
 # ---------------------- PPT SCHEMAS ----------------------
 
+# Each slide model is picked by its `layout` (a tagged union), so a slide is
+# validated against one model instead of trying all four in turn. Fields
+# beyond the title default to empty: stored slides edited as free-form dicts
+# may lack them, and the renderer treats missing and empty the same.
+
 class TitleSlide(BaseModel):
-    layout: SlideLayout
+    layout: Literal[SlideLayout.title]
     title: str
 
 
 class BulletSlide(BaseModel):
-    layout: SlideLayout
+    layout: Literal[SlideLayout.bullet]
     title: str
-    bullets: List[str]
+    bullets: List[str] = []
 
 
 class TwoColumnSlide(BaseModel):
-    layout: SlideLayout
+    layout: Literal[SlideLayout.two_column]
     title: str
-    left: str
-    right: str
+    left: str = ""
+    right: str = ""
 
 
 class ImageSlide(BaseModel):
-    layout: SlideLayout
+    layout: Literal[SlideLayout.image]
     title: str
-    image_url: str
+    image_url: str = ""
 
 
-SlideContent = Union[TitleSlide, BulletSlide, TwoColumnSlide, ImageSlide]
+SlideContent = Annotated[
+    Union[TitleSlide, BulletSlide, TwoColumnSlide, ImageSlide],
+    Field(discriminator="layout"),
+]
 
 
 class PresentationCreate(BaseModel):
@@ -54,6 +63,12 @@ ALLOWED_FONTS = {
 
 HEX_COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{3}){1,2}$")
 
+# PPT templates in services/ppt_templates (pptx_generator.TEMPLATE_MAP)
+THEME_IDS = ("ppt1", "ppt2", "ppt3", "ppt4", "ppt5", "ppt6", "ppt7", "ppt8", "ppt9")
+
+# zip/output profile for downloads (services/package_writer.PROFILES)
+OutputProfile = Literal["default", "fast", "small"]
+
 
 class ConfigurationUpdate(BaseModel):
     """
@@ -68,6 +83,14 @@ class ConfigurationUpdate(BaseModel):
     background_color: Optional[str] = None
     accent_color: Optional[str] = None
 
+    @field_validator("theme_id")
+    def validate_theme(cls, v):
+        if v and v not in THEME_IDS:
+            raise ValueError(
+                f"Theme '{v}' does not exist. Allowed themes: {', '.join(THEME_IDS)}"
+            )
+        return v
+
     @field_validator("font_name")
     def validate_font(cls, v):
         if v and v not in ALLOWED_FONTS:
@@ -107,8 +130,7 @@ class PresentationOut(BaseModel):
     content: List[SlideContent]
     configuration: Optional[Dict]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ------------------------------------------------------------------
@@ -134,8 +156,7 @@ class SectionOut(SectionBase):
     feedback: Optional[str] = None
     comment: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # NEW: config for one page → its section headings
@@ -167,8 +188,7 @@ class ProjectOut(ProjectBase):
     id: int
     sections: List[SectionOut]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SectionRefineRequest(BaseModel):
@@ -176,7 +196,56 @@ class SectionRefineRequest(BaseModel):
     prompt: str
 
 
+class SectionRevisionOut(BaseModel):
+    """One entry of a section's version history (no content)."""
+    version: int
+    prompt: Optional[str] = None
+    is_snapshot: bool
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SectionVersionOut(BaseModel):
+    """Full content of one version of a section."""
+    version: int
+    prompt: Optional[str] = None
+    content: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class SectionFeedbackRequest(BaseModel):
     """Body for like/dislike + comment on a section."""
     feedback: str   # e.g., "like" or "dislike"
     comment: Optional[str] = None
+
+
+# ------------------------------------------------------------------
+# DASHBOARD
+# ------------------------------------------------------------------
+# Declared so the (large) dashboard payload is validated and serialized by
+# pydantic-core instead of FastAPI's recursive jsonable_encoder.
+
+class DashboardPresentation(BaseModel):
+    id: int
+    title: Optional[str] = None
+    summary: str
+    type: str
+    created_at: datetime
+    download_endpoint: str
+    content: List[Any]
+
+
+class DashboardProject(BaseModel):
+    id: int
+    title: str
+    summary: str
+    type: str
+    created_at: datetime
+    download_endpoint: str
+
+
+class DashboardOut(BaseModel):
+    presentations: List[DashboardPresentation]
+    projects: List[DashboardProject]
@@ -0,0 +1,81 @@
+# backend/routers/artifacts.py
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from core import http_cache
+from core.config import Config
+from models.models import Artifact
+from services import artifacts
+
+router = APIRouter(prefix="/artifacts", tags=["artifacts"])
+
+
+def artifact_response(request: Request, artifact: Artifact, filename: str, tag: str) -> Response:
+    """
+    Download response for a published artifact:
+
+    - ARTIFACT_DIRECT_DOWNLOADS=1 and the store can sign: 307 to a signed
+      URL, so the bytes don't go through this worker
+    - local store: FileResponse (Range / If-Range against `tag`)
+    - remote store: streamed from the store in chunks; a Range (whose
+      If-Range, if any, still names `tag`) is fetched from the store as
+      that range and answered with a 206
+    """
+    store = artifacts.get_store()
+    key = artifact.storage_key
+    if Config.ARTIFACT_DIRECT_DOWNLOADS:
+        url = store.signed_url(key, filename, Config.ARTIFACT_URL_TTL)
+        if url:
+            # the URL expires: never reuse this redirect from a cache
+            return RedirectResponse(url, status_code=307, headers={"Cache-Control": "private, no-store"})
+
+    media_type = artifacts.media_type(key)
+    path = store.local_path(key)
+    if path:
+        return FileResponse(path, filename=filename, media_type=media_type, headers=http_cache.headers(tag))
+
+    response_headers = {
+        **http_cache.headers(tag),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    try:
+        span = http_cache.requested_range(request, tag, artifact.size)
+    except http_cache.RangeNotSatisfiable:
+        return http_cache.not_satisfiable(artifact.size, response_headers)
+    if span is None:
+        response_headers["Content-Length"] = str(artifact.size)
+        return StreamingResponse(store.iter_bytes(key), media_type=media_type, headers=response_headers)
+    start, end = span
+    response_headers["Content-Length"] = str(end - start)
+    response_headers["Content-Range"] = f"bytes {start}-{end - 1}/{artifact.size}"
+    return StreamingResponse(
+        store.iter_bytes(key, start, end), status_code=206, media_type=media_type, headers=response_headers
+    )
+
+
+@router.get("/{key:path}", summary="Download an artifact through a signed URL")
+def signed_download(
+    key: str,
+    expires: int = Query(...),
+    name: str = Query(...),
+    sig: str = Query(...),
+):
+    """
+    Target of the local store's signed URLs (ARTIFACT_URL_SECRET): no auth
+    or DB lookup, the signature covers key, expiry and filename.
+    """
+    store = artifacts.get_store()
+    if not isinstance(store, artifacts.LocalArtifactStore) or not store.verify(key, expires, name, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+    path = store.local_path(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    # content-addressed: the bytes behind a key never change
+    return FileResponse(
+        path,
+        filename=name,
+        media_type=artifacts.media_type(key),
+        headers={"ETag": f'"{key.rsplit("/", 1)[-1]}"', "Cache-Control": "private, max-age=86400, immutable"},
+    )
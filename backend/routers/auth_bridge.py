@@ -1,11 +1,15 @@
 # backend/routers/auth_bridge.py
 
-from fastapi import Depends, HTTPException
+from typing import Optional
+
+import anyio.to_thread
+from fastapi import Depends, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from core.dbutils import get_db
 from models import models
 from auth.users import current_active_user
+from services import idempotency, quotas
 
 
 def get_current_user(
@@ -38,3 +42,73 @@ def get_current_user(
         db.refresh(user)
 
     return user
+
+
+async def get_generation_user(
+    response: Response,
+    user: models.User = Depends(get_current_user),
+):
+    """
+    get_current_user for the Gemini generation routes, under the user's
+    quotas (services/quotas.py): 429 + Retry-After when one is used up,
+    otherwise the remaining quota is sent as X-RateLimit-* / X-Quota-*
+    headers and the request's Gemini tokens are charged to the user.
+
+    async so the ticket is set in the request's own context, which the
+    endpoint's worker thread inherits.
+    """
+    manager = quotas.get_manager()
+    try:
+        # DB read only on a user's first request of the day on this worker
+        ticket = await anyio.to_thread.run_sync(manager.acquire, user.id)
+    except quotas.QuotaExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Quota exceeded: {e.limit}",
+            headers={**e.headers, "Retry-After": str(e.retry_after)},
+        )
+    response.headers.update(ticket.headers)
+    quotas.activate(ticket)
+    try:
+        yield user
+    finally:
+        await anyio.to_thread.run_sync(ticket.release)
+
+
+async def check_idempotency_key(
+    request: Request,
+    user: models.User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias=idempotency.HEADER,
+        description="Retries with the same key get the first request's response instead of running again",
+    ),
+) -> None:
+    """
+    Route dependency for generation / creation POSTs (services/idempotency.py).
+    Listed in the route's `dependencies`, so it runs before the quota check
+    and the scheduler lane: a replay costs neither.
+    """
+    if idempotency_key is None:
+        return
+    if not idempotency_key or len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{idempotency.HEADER} must be 1-{idempotency.MAX_KEY_LENGTH} characters",
+        )
+    digest = idempotency.fingerprint(request.method, request.url.path, await request.body())
+    try:
+        claim = await idempotency.claim(user.id, idempotency_key, digest)
+    except idempotency.KeyMismatch:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{idempotency.HEADER} was already used for a different request",
+        )
+    except idempotency.StillPending:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A request with this {idempotency.HEADER} is still in progress",
+            headers={"Retry-After": "5"},
+        )
+    # the middleware stores the response (or drops the claim) once it is sent
+    request.state.idempotency_claim = claim
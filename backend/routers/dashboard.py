@@ -1,7 +1,7 @@
 # backend/routers/dashboard.py
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from core.dbutils import get_db
 from models import models
 import json
@@ -87,6 +87,7 @@ def get_dashboard_items(
 
     presentations = (
         db.query(models.Presentation)
+        .options(selectinload(models.Presentation.slides))
         .filter(models.Presentation.owner_id == user_id)
         .order_by(models.Presentation.created_at.desc())
         .all()
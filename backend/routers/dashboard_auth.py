@@ -1,9 +1,9 @@
 # backend/routers/dashboard_auth.py
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from core.dbutils import get_db
-from models import models
+from models import models, schemas
 from .auth_bridge import get_current_user  # 👈 use the bridge
 import json
 
@@ -69,7 +69,7 @@ def _make_summary_from_presentation(presentation_obj, char_limit=280):
     return candidate
 
 
-@router.get("/items")
+@router.get("/items", response_model=schemas.DashboardOut)
 def get_dashboard_items(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -83,6 +83,7 @@ def get_dashboard_items(
 
     presentations = (
         db.query(models.Presentation)
+        .options(selectinload(models.Presentation.slides))
         .filter(models.Presentation.owner_id == user_id)
         .order_by(models.Presentation.created_at.desc())
         .all()
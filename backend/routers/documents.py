@@ -1,28 +1,83 @@
 # backend/routers/documents.py
 
-from typing import List, Dict
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, contains_eager, selectinload
 
+from core import http_cache, scheduler, tracing
 from core.dbutils import get_db
 from models import models, schemas, enums
 from services.content_generator import (
     generate_word_sections_with_gemini,
     refine_word_section_with_gemini,
 )
-from services.docx_generator import build_docx_file
+from services import artifacts, package_writer, render_cache, search_index, section_history
 
-from .auth_bridge import get_current_user
+from .artifacts import artifact_response
+from .auth_bridge import check_idempotency_key, get_current_user, get_generation_user
 
 router = APIRouter(tags=["Documents"])
 
 
-@router.post("/", response_model=schemas.ProjectOut)
+def _get_project_with_sections(
+    db: Session, project_id: int, owner_id: int
+) -> models.Project | None:
+    """
+    Load a project and all of its sections (ordered by order_index) up front,
+    so serializing ProjectOut never triggers lazy loads.
+    """
+    return (
+        db.query(models.Project)
+        .options(selectinload(models.Project.sections))
+        .filter(
+            models.Project.id == project_id,
+            models.Project.owner_id == owner_id,
+        )
+        .first()
+    )
+
+
+def _project_version(db: Session, project_id: int, owner_id: Optional[int] = None):
+    """
+    (updated_at, doc_type, section count, newest section updated_at) of a
+    project in one aggregate query, without loading any section. Every
+    write bumps one of these, so they validate ETags for its responses.
+    """
+    query = (
+        db.query(
+            models.Project.updated_at,
+            models.Project.doc_type,
+            func.count(models.Section.id),
+            func.max(models.Section.updated_at),
+        )
+        .outerjoin(models.Section, models.Section.project_id == models.Project.id)
+        .filter(models.Project.id == project_id)
+    )
+    if owner_id is not None:
+        query = query.filter(models.Project.owner_id == owner_id)
+    version = query.group_by(models.Project.id).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return version
+
+
+def _docx_version_key(version, profile: str) -> str:
+    """What a rendered DOCX depends on: project version + renderer version + output profile."""
+    from services import docx_generator  # python-docx: loaded on first export
+
+    updated_at, _, section_count, sections_updated_at = version
+    return render_cache.content_hash(
+        [updated_at, section_count, sections_updated_at, docx_generator.RENDERER_VERSION, profile]
+    )
+
+
+@router.post("/", response_model=schemas.ProjectOut, dependencies=[Depends(check_idempotency_key)])
+@scheduler.lane(scheduler.GENERATION)
 def create_word_project(
     project_in: schemas.ProjectCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: models.User = Depends(get_generation_user),
 ):
     """
     Create a new Word (.docx) project and generate initial content.
@@ -43,6 +98,8 @@ def create_word_project(
     )
     db.add(project)
     db.flush()  # get project.id
+    project_id = project.id
+    section_rows: List[Dict] = []
 
     # 1️⃣ NEW PAGE-BASED MODE
     if project_in.pages and project_in.num_pages:
@@ -51,10 +108,11 @@ def create_word_project(
             for title in page_cfg.sections:
                 flat_headings.append(title)
 
-        generated_sections = generate_word_sections_with_gemini(
-            topic=project_in.topic,
-            section_headings=flat_headings,
-        )
+        with tracing.span("generate", sections=len(flat_headings)):
+            generated_sections = generate_word_sections_with_gemini(
+                topic=project_in.topic,
+                section_headings=flat_headings,
+            )
 
         content_by_heading: Dict[str, str] = {
             s["heading"]: s["content"] for s in generated_sections
@@ -76,40 +134,39 @@ def create_word_project(
                         instruction="Write a clear, professional section for this heading.",
                     )
 
-                section = models.Section(
-                    project_id=project.id,
-                    title=title,
-                    order_index=global_order_index,
-                    page_number=page_number,
-                    section_index=idx,
-                    content=content,
-                    history=[
-                        {
-                            "version": 1,
-                            "content": content,
-                            "prompt": "initial generation",
-                        }
-                    ],
+                section_rows.append(
+                    dict(
+                        project_id=project_id,
+                        title=title,
+                        order_index=global_order_index,
+                        page_number=page_number,
+                        section_index=idx,
+                        content=content,
+                    )
                 )
-                db.add(section)
                 global_order_index += 1
 
-        db.commit()
-        db.refresh(project)
-        return project
+        # one executemany for all sections instead of an INSERT per row
+        with tracing.span("persist", sections=len(section_rows)):
+            if section_rows:
+                db.execute(insert(models.Section), section_rows)
+                section_history.add_initial_revisions(db, project_id)
+            search_index.index_project(db, project_id)
+            db.commit()
+            return _get_project_with_sections(db, project_id, current_user.id)
 
     # 2️⃣ OLD FLAT SECTION MODE
     sorted_sections = sorted(project_in.sections, key=lambda s: s.order_index)
     headings = [s.title for s in sorted_sections]
 
-    generated_sections = generate_word_sections_with_gemini(
-        topic=project_in.topic,
-        section_headings=headings,
-    )
+    with tracing.span("generate", sections=len(headings)):
+        generated_sections = generate_word_sections_with_gemini(
+            topic=project_in.topic,
+            section_headings=headings,
+        )
 
     content_by_heading = {s["heading"]: s["content"] for s in generated_sections}
 
-    sections_db: List[models.Section] = []
     for section_in in sorted_sections:
         content = content_by_heading.get(section_in.title, "") or ""
 
@@ -121,40 +178,45 @@ def create_word_project(
                 instruction="Write a clear, professional section for this heading.",
             )
 
-        section = models.Section(
-            project_id=project.id,
-            title=section_in.title,
-            order_index=section_in.order_index,
-            content=content,
-            history=[
-                {"version": 1, "content": content, "prompt": "initial generation"}
-            ],
+        section_rows.append(
+            dict(
+                project_id=project_id,
+                title=section_in.title,
+                order_index=section_in.order_index,
+                content=content,
+            )
         )
-        db.add(section)
-        sections_db.append(section)
 
-    db.commit()
-    db.refresh(project)
-    return project
+    with tracing.span("persist", sections=len(section_rows)):
+        if section_rows:
+            db.execute(insert(models.Section), section_rows)
+            section_history.add_initial_revisions(db, project_id)
+        search_index.index_project(db, project_id)
+        db.commit()
+        return _get_project_with_sections(db, project_id, current_user.id)
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectOut)
 def get_word_project(
     project_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
     Fetch a single Word project with all its sections.
+
+    Sends an ETag; a matching If-None-Match gets a 304 before the sections
+    are loaded.
     """
-    project = (
-        db.query(models.Project)
-        .filter(
-            models.Project.id == project_id,
-            models.Project.owner_id == current_user.id,
-        )
-        .first()
-    )
+    version = _project_version(db, project_id, current_user.id)
+    tag = http_cache.etag("project", project_id, *version)
+    if http_cache.is_fresh(request, tag):
+        return http_cache.not_modified(tag)
+    response.headers.update(http_cache.headers(tag))
+
+    project = _get_project_with_sections(db, project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -164,20 +226,24 @@ def get_word_project(
 @router.post(
     "/{project_id}/sections/{section_id}/refine",
     response_model=schemas.SectionOut,
+    dependencies=[Depends(check_idempotency_key)],
 )
+@scheduler.lane(scheduler.GENERATION)
 def refine_section(
     project_id: int,
     section_id: int,
     body: schemas.SectionRefineRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: models.User = Depends(get_generation_user),
 ):
     """
     Refine a single section using Gemini based on user's prompt.
     """
+    # section.project.topic is needed for the prompt: load it in the same query
     section = (
         db.query(models.Section)
         .join(models.Project)
+        .options(contains_eager(models.Section.project))
         .filter(
             models.Section.id == section_id,
             models.Project.id == project_id,
@@ -188,26 +254,22 @@ def refine_section(
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
 
-    new_content = refine_word_section_with_gemini(
-        topic=section.project.topic,
-        heading=section.title,
-        current_content=section.content or "",
-        instruction=body.prompt,
-    )
+    with tracing.span("generate"):
+        new_content = refine_word_section_with_gemini(
+            topic=section.project.topic,
+            heading=section.title,
+            current_content=section.content or "",
+            instruction=body.prompt,
+        )
 
-    history = section.history or []
-    history.append(
-        {
-            "version": len(history) + 1,
-            "prompt": body.prompt,
-            "content": new_content,
-        }
-    )
-    section.content = new_content
-    section.history = history
+    with tracing.span("persist"):
+        # append a delta against the current content, then overwrite it
+        section_history.record_revision(db, section, new_content, body.prompt)
+        section.content = new_content
+        search_index.index_project(db, project_id)
 
-    db.commit()
-    db.refresh(section)
+        db.commit()
+        db.refresh(section)
     return section
 
 
@@ -243,16 +305,99 @@ def set_section_feedback(
     return {"status": "ok"}
 
 
+def _get_owned_section(
+    db: Session, project_id: int, section_id: int, owner_id: int
+) -> models.Section:
+    section = (
+        db.query(models.Section)
+        .join(models.Project)
+        .filter(
+            models.Section.id == section_id,
+            models.Project.id == project_id,
+            models.Project.owner_id == owner_id,
+        )
+        .first()
+    )
+    if not section:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return section
+
+
+@router.get(
+    "/{project_id}/sections/{section_id}/history",
+    response_model=List[schemas.SectionRevisionOut],
+)
+def get_section_history(
+    project_id: int,
+    section_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    List all versions of a section (prompt + timestamp, no content).
+    """
+    section = _get_owned_section(db, project_id, section_id, current_user.id)
+    return section_history.list_revisions(db, section)
+
+
+@router.get(
+    "/{project_id}/sections/{section_id}/history/{version}",
+    response_model=schemas.SectionVersionOut,
+)
+def get_section_version(
+    project_id: int,
+    section_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Return the full content of one past version of a section.
+    """
+    section = _get_owned_section(db, project_id, section_id, current_user.id)
+    revision = section_history.get_version(db, section, version)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return revision
+
+
 @router.get("/{project_id}/export")
 def export_docx(
     project_id: int,
+    request: Request,
+    profile: Optional[schemas.OutputProfile] = Query(
+        None, description="fast = quicker save, small = smaller file (default: server setting)"
+    ),
     db: Session = Depends(get_db),
 ):
     """
     Dev-friendly export:
     - No auth required
     - Export Word document by project_id only.
+
+    Like PPTX downloads, rendered files are published to the artifact
+    store and served again, without reading a section, while the project
+    version, renderer version and output profile are unchanged. The ETag
+    covers that version key and the file's digest (304 on If-None-Match,
+    Range + If-Range resumes only against the same bytes). Only the render
+    itself runs in the render lane.
     """
+    version = _project_version(db, project_id)
+    if version.doc_type != enums.DocumentType.DOCX:
+        raise HTTPException(status_code=400, detail="Project is not a Word document")
+    profile = package_writer.resolve_profile(profile)
+    version_key = _docx_version_key(version, profile)
+    filename = f"project_{project_id}.docx"
+
+    artifact = artifacts.current(db, "docx", project_id, profile, version_key)
+    if artifact is not None:
+        tag = http_cache.etag("docx", version_key, artifact.digest)
+        if http_cache.is_fresh(request, tag):
+            return http_cache.not_modified(tag)
+        if artifacts.available(artifact):
+            return artifact_response(request, artifact, filename, tag)
+
+    from services import docx_generator
 
     project = (
         db.query(models.Project)
@@ -262,11 +407,13 @@ def export_docx(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if project.doc_type != enums.DocumentType.DOCX:
-        raise HTTPException(status_code=400, detail="Project is not a Word document")
-
+    # only the columns the export uses; no Section objects are built
     sections = (
-        db.query(models.Section)
+        db.query(
+            models.Section.page_number,
+            models.Section.title,
+            models.Section.content,
+        )
         .filter(models.Section.project_id == project.id)
         .order_by(
             models.Section.page_number,
@@ -277,21 +424,32 @@ def export_docx(
     )
 
     pages: Dict[int, List[Dict[str, str]]] = {}
-    for s in sections:
-        page_num = s.page_number or 1
+    for page_number, heading, content in sections:
+        page_num = page_number or 1
         if page_num not in pages:
             pages[page_num] = []
         pages[page_num].append(
             {
-                "heading": s.title,
-                "content": (s.content or ""),
+                "heading": heading,
+                "content": (content or ""),
             }
         )
 
-    file_path = build_docx_file(project.id, project.title, pages)
-
-    return FileResponse(
-        path=file_path,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        filename=file_path.name,
-    )
+    # no other render of this project's file may land before it is published
+    with render_cache.render_lock(str(docx_generator.output_path(project.id))):
+        with tracing.span("render", sections=len(sections)):
+            file_path = scheduler.run_in_lane(
+                scheduler.RENDER, docx_generator.build_docx_file, project.id, project.title, pages, profile=profile
+            )
+        with tracing.span("publish"):
+            artifact = artifacts.publish(
+                db,
+                "docx",
+                project_id,
+                profile,
+                version_key,
+                str(file_path),
+            )
+    db.commit()
+    tag = http_cache.etag("docx", version_key, artifact.digest)
+    return artifact_response(request, artifact, filename, tag)
@@ -1,18 +1,21 @@
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
 
+from core import http_cache, scheduler, tracing
 from core.dbutils import get_db
-from models.models import Presentation, User
-from models.schemas import PresentationCreate, PresentationOut, ConfigurationUpdate
+from models.models import Presentation, Slide, User
+from models.schemas import PresentationCreate, PresentationOut, ConfigurationUpdate, OutputProfile, SlideContent
+from services import artifacts, package_writer, render_cache, search_index, slide_store
 from services.content_generator import generate_content_with_gemini
-from services.pptx_generator import build_pptx
 
 # ✅ your real auth dependency (same style as documents.py)
-from .auth_bridge import get_current_user
+from .artifacts import artifact_response
+from .auth_bridge import check_idempotency_key, get_current_user, get_generation_user
 
 import re
 
@@ -30,11 +33,21 @@ class SlideUpdate(BaseModel):
     image_url: Optional[str] = None
 
 
+# ---------- SlideInsert / SlideMove schemas (single-slide structure edits) ----------
+class SlideInsert(BaseModel):
+    index: Optional[int] = None  # 0-based position; None appends
+    slide: SlideContent          # validated against the model for its "layout"
+
+
+class SlideMove(BaseModel):
+    to_index: int
+
+
 # ---------- PresentationUpdate schema (for editing whole deck) ----------
 class PresentationUpdate(BaseModel):
     topic: Optional[str] = None
-    content: Optional[list] = None  # list of slide dicts
-    configuration: Optional[dict] = None
+    content: Optional[List[SlideContent]] = None
+    configuration: Optional[ConfigurationUpdate] = None
 
 
 def _sanitize_generated_content(content: list | None, original_prompt: str | None) -> list:
@@ -133,11 +146,113 @@ def _sanitize_generated_content(content: list | None, original_prompt: str | Non
     return cleaned
 
 
-@router.post("/", response_model=PresentationOut, summary="Create a new presentation")
+def _get_owned_presentation(
+    db: Session, presentation_id: int, owner_id: int, with_slides: bool = False
+) -> Presentation:
+    query = db.query(Presentation)
+    if with_slides:
+        query = query.options(selectinload(Presentation.slides))
+    presentation = query.filter(
+        Presentation.presentation_id == presentation_id,
+        Presentation.owner_id == owner_id,
+    ).first()
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    return presentation
+
+
+def _get_owned_slide(db: Session, presentation: Presentation, slide_index: int):
+    """Slide row for an edit (migrates a legacy deck; the route commits)."""
+    slide_store.ensure_slide_rows(db, presentation)
+    slide = slide_store.get_slide_at(db, presentation, slide_index)
+    if slide is None:
+        raise HTTPException(status_code=404, detail="Slide index out of range")
+    return slide
+
+
+def _deck_version(db: Session, presentation_id: int, owner_id: Optional[int] = None):
+    """
+    (updated_at, configuration, slide count, newest slide updated_at) of a
+    deck in one aggregate query, without loading any slide. Every write
+    bumps one of these, so they validate ETags for the deck's responses.
+    """
+    query = (
+        db.query(
+            Presentation.updated_at,
+            Presentation.configuration,
+            func.count(Slide.id),
+            func.max(Slide.updated_at),
+        )
+        .outerjoin(Slide, Slide.presentation_id == Presentation.presentation_id)
+        .filter(Presentation.presentation_id == presentation_id)
+    )
+    if owner_id is not None:
+        query = query.filter(Presentation.owner_id == owner_id)
+    version = query.group_by(Presentation.presentation_id).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    return version
+
+
+def _pptx_version_key(version, profile: str) -> str:
+    """
+    What a rendered PPTX depends on: deck version + render key (theme,
+    template, styling, renderer) + output profile. A published artifact
+    with this key can be served without rendering.
+    """
+    from services.pptx_generator import render_key
+
+    updated_at, config, slide_count, slides_updated_at = version
+    return render_cache.content_hash(
+        [updated_at, slide_count, slides_updated_at, render_key(config or {}), profile]
+    )
+
+
+def _commit_and_reload(
+    db: Session, presentation: Presentation, reindex: bool = False
+) -> Presentation:
+    """
+    Commit, then reload the deck with its slides in one extra query.
+
+    reindex=True refreshes the search index in the same transaction
+    (for writes that change topic or slide text).
+    """
+    presentation_id, owner_id = presentation.presentation_id, presentation.owner_id
+    if reindex:
+        search_index.index_presentation(db, presentation)
+    db.commit()
+    return _get_owned_presentation(db, presentation_id, owner_id, with_slides=True)
+
+
+def _image_response(request: Request, key: str, render, cache_control: str = http_cache.REVALIDATE) -> Response:
+    """
+    Thumbnail with its cache key as ETag; answers 304 when the client
+    already has it, so revalidating an unchanged preview costs a hash.
+    """
+    from services import thumbnails
+
+    tag = http_cache.etag("thumbnail", key)
+    return http_cache.content_response(request, tag, render, thumbnails.MEDIA_TYPE, cache_control)
+
+
+# Renderers (python-pptx, python-docx, thumbnails) are imported inside the
+# routes that use them, so importing the app stays fast (see
+# `bench.py importtime`). Width bounds mirror services/thumbnails
+# DEFAULT_WIDTH / MIN_WIDTH / MAX_WIDTH for the same reason.
+_THUMBNAIL_WIDTH = Query(320, ge=64, le=1280, description="Image width in px")
+
+
+@router.post(
+    "/",
+    response_model=PresentationOut,
+    summary="Create a new presentation",
+    dependencies=[Depends(check_idempotency_key)],
+)
+@scheduler.lane(scheduler.GENERATION)
 def create_presentation(
     presentation: PresentationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_generation_user),
 ):
     """
     Create a new PPT presentation for the current user.
@@ -147,30 +262,33 @@ def create_presentation(
     This endpoint sanitizes model output to avoid storing the original prompt text inside slides.
     """
     if presentation.custom_content:
-        raw_content = [slide.dict() for slide in presentation.custom_content]
+        raw_content = [slide.model_dump() for slide in presentation.custom_content]
     else:
         # If Gemini fails (429 etc.), generate_content_with_gemini must raise and be handled by caller
-        raw_content = generate_content_with_gemini(
-            presentation.topic,
-            presentation.num_slides,
-        )
+        with tracing.span("generate", num_slides=presentation.num_slides):
+            raw_content = generate_content_with_gemini(
+                presentation.topic,
+                presentation.num_slides,
+            )
 
     # Sanitize the generated content to remove prompt echoes and obvious duplicates
-    try:
-        cleaned_content = _sanitize_generated_content(raw_content, presentation.topic)
-    except Exception:
-        # Defensive fallback: use raw content if sanitize fails
-        cleaned_content = raw_content or []
-
-    db_presentation = Presentation(
-        topic=presentation.topic,
-        content=cleaned_content,
-        owner_id=current_user.id,
-    )
-    db.add(db_presentation)
-    db.commit()
-    db.refresh(db_presentation)
-    return db_presentation
+    with tracing.span("sanitize", slides_in=len(raw_content or [])) as sp:
+        try:
+            cleaned_content = _sanitize_generated_content(raw_content, presentation.topic)
+        except Exception:
+            # Defensive fallback: use raw content if sanitize fails
+            cleaned_content = raw_content or []
+        sp.set(slides_out=len(cleaned_content))
+
+    with tracing.span("persist"):
+        db_presentation = Presentation(
+            topic=presentation.topic,
+            owner_id=current_user.id,
+        )
+        db.add(db_presentation)
+        db.flush()  # get presentation_id for the slide rows
+        slide_store.replace_slides(db, db_presentation, cleaned_content)
+        return _commit_and_reload(db, db_presentation, reindex=True)
 
 
 @router.put(
@@ -187,32 +305,23 @@ def update_presentation(
     """
     Overwrite a presentation's topic/content/configuration for the current user.
     """
-    presentation = (
-        db.query(Presentation)
-        .filter(
-            Presentation.presentation_id == presentation_id,
-            Presentation.owner_id == current_user.id,
-        )
-        .first()
-    )
-    if not presentation:
-        raise HTTPException(status_code=404, detail="Presentation not found")
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
 
-    data = update.dict(exclude_unset=True)
+    data = update.model_dump(exclude_unset=True)
 
     if "topic" in data and data["topic"] is not None:
         presentation.topic = data["topic"]
 
     if "content" in data and data["content"] is not None:
-        # frontend sends list[dict] with fields: layout, title, bullets, etc.
-        presentation.content = data["content"]
+        # slides validated per layout (SlideContent), dumped to dicts by .model_dump()
+        slide_store.replace_slides(db, presentation, data["content"])
 
     if "configuration" in data and data["configuration"] is not None:
         presentation.configuration = data["configuration"]
 
-    db.commit()
-    db.refresh(presentation)
-    return presentation
+    return _commit_and_reload(
+        db, presentation, reindex="topic" in data or "content" in data
+    )
 
 
 @router.post(
@@ -229,21 +338,10 @@ def configure_presentation(
     """
     Update configuration (theme, etc.) for a PPT owned by the current user.
     """
-    presentation = (
-        db.query(Presentation)
-        .filter(
-            Presentation.presentation_id == presentation_id,
-            Presentation.owner_id == current_user.id,
-        )
-        .first()
-    )
-    if not presentation:
-        raise HTTPException(status_code=404, detail="Presentation not found")
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
 
-    presentation.configuration = config.dict()
-    db.commit()
-    db.refresh(presentation)
-    return presentation
+    presentation.configuration = config.model_dump()
+    return _commit_and_reload(db, presentation)
 
 
 @router.get(
@@ -253,23 +351,25 @@ def configure_presentation(
 )
 def get_presentation(
     presentation_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get a single PPT for the current user.
+
+    Sends an ETag; a matching If-None-Match gets a 304 before the slides
+    are loaded (cheap polling for editors).
     """
-    presentation = (
-        db.query(Presentation)
-        .filter(
-            Presentation.presentation_id == presentation_id,
-            Presentation.owner_id == current_user.id,
-        )
-        .first()
+    version = _deck_version(db, presentation_id, current_user.id)
+    tag = http_cache.etag("presentation", presentation_id, *version)
+    if http_cache.is_fresh(request, tag):
+        return http_cache.not_modified(tag)
+    response.headers.update(http_cache.headers(tag))
+    return _get_owned_presentation(
+        db, presentation_id, current_user.id, with_slides=True
     )
-    if not presentation:
-        raise HTTPException(status_code=404, detail="Presentation not found")
-    return presentation
 
 
 @router.put(
@@ -286,35 +386,159 @@ def update_slide(
 ):
     """
     Edit one slide (title/bullets/text/image) of a PPT owned by the current user.
+
+    Only that slide's row is rewritten; the rest of the deck is untouched.
     """
-    presentation = (
-        db.query(Presentation)
-        .filter(
-            Presentation.presentation_id == presentation_id,
-            Presentation.owner_id == current_user.id,
-        )
-        .first()
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
+    slide = _get_owned_slide(db, presentation, slide_index)
+
+    # Only overwrite fields that are provided in the request
+    slide_store.patch_slide(presentation, slide, slide_update.model_dump(exclude_unset=True))
+    return _commit_and_reload(db, presentation, reindex=True)
+
+
+@router.post(
+    "/{presentation_id}/slides",
+    response_model=PresentationOut,
+    summary="Insert a slide into the presentation",
+)
+def insert_slide(
+    presentation_id: int,
+    body: SlideInsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Insert one slide at `index` (or append it when no index is given).
+    """
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
+    slide_store.insert_slide(db, presentation, body.slide.model_dump(), body.index)
+    return _commit_and_reload(db, presentation, reindex=True)
+
+
+@router.delete(
+    "/{presentation_id}/slides/{slide_index}",
+    response_model=PresentationOut,
+    summary="Delete a single slide from the presentation",
+)
+def delete_slide(
+    presentation_id: int,
+    slide_index: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Remove one slide; the remaining slides keep their order.
+    """
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
+    slide = _get_owned_slide(db, presentation, slide_index)
+    slide_store.delete_slide(db, presentation, slide)
+    return _commit_and_reload(db, presentation, reindex=True)
+
+
+@router.post(
+    "/{presentation_id}/slides/{slide_index}/move",
+    response_model=PresentationOut,
+    summary="Move a single slide to another position",
+)
+def move_slide(
+    presentation_id: int,
+    slide_index: int,
+    body: SlideMove,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Reorder the deck by moving one slide to `to_index` (0-based).
+    """
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
+    slide = _get_owned_slide(db, presentation, slide_index)
+    slide_store.move_slide(db, presentation, slide, body.to_index)
+    return _commit_and_reload(db, presentation)
+
+
+@router.get(
+    "/themes/{theme_id}/preview",
+    summary="Preview strip of a theme",
+)
+@scheduler.lane(scheduler.RENDER)
+def theme_preview(theme_id: str, request: Request, width: int = _THUMBNAIL_WIDTH):
+    """
+    One thumbnail per slide layout, rendered with the theme, stacked in a
+    single image (for the theme picker; no deck needed).
+    """
+    from services import thumbnails
+    from services.pptx_generator import TEMPLATE_MAP
+
+    if theme_id not in TEMPLATE_MAP:
+        raise HTTPException(status_code=404, detail="Theme not found")
+    config = {"theme_id": theme_id}
+    slides = thumbnails.SAMPLE_SLIDES
+    return _image_response(
+        request,
+        thumbnails.strip_key(slides, config, width),
+        lambda: thumbnails.render_strip(slides, config, width),
+        cache_control="public, max-age=3600",
     )
-    if not presentation:
-        raise HTTPException(status_code=404, detail="Presentation not found")
 
+
+@router.get(
+    "/{presentation_id}/thumbnails",
+    summary="Preview strip of every slide",
+)
+@scheduler.lane(scheduler.RENDER)
+def deck_thumbnails(
+    presentation_id: int,
+    request: Request,
+    width: int = _THUMBNAIL_WIDTH,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    All slide thumbnails of a deck stacked top to bottom in one image
+    (slide i at y = i * (height + thumbnails.STRIP_GAP)).
+    """
+    from services import thumbnails
+
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id, with_slides=True)
+    config = presentation.configuration or {}
     slides = presentation.content or []
-    if slide_index < 0 or slide_index >= len(slides):
-        raise HTTPException(status_code=404, detail="Slide index out of range")
+    return _image_response(
+        request,
+        thumbnails.strip_key(slides, config, width),
+        lambda: thumbnails.render_strip(slides, config, width),
+    )
 
-    slide = slides[slide_index]
-    update_data = slide_update.dict(exclude_unset=True)
 
-    # Only overwrite fields that are provided in the request
-    for key, value in update_data.items():
-        if value is not None:
-            slide[key] = value
+@router.get(
+    "/{presentation_id}/slides/{slide_index}/thumbnail",
+    summary="Preview image of a single slide",
+)
+@scheduler.lane(scheduler.RENDER)
+def slide_thumbnail(
+    presentation_id: int,
+    slide_index: int,
+    request: Request,
+    width: int = _THUMBNAIL_WIDTH,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Simplified raster of one slide in the deck's theme and styling;
+    cached by slide content, so editing other slides keeps its ETag.
+    """
+    from services import thumbnails
 
-    slides[slide_index] = slide
-    presentation.content = slides
-    db.commit()
-    db.refresh(presentation)
-    return presentation
+    presentation = _get_owned_presentation(db, presentation_id, current_user.id)
+    slide = slide_store.slide_dict_at(db, presentation, slide_index)
+    if slide is None:
+        raise HTTPException(status_code=404, detail="Slide index out of range")
+    config = presentation.configuration or {}
+    return _image_response(
+        request,
+        thumbnails.thumbnail_key(slide, config, width),
+        lambda: thumbnails.render_thumbnail(slide, config, width),
+    )
 
 
 @router.get(
@@ -323,6 +547,10 @@ def update_slide(
 )
 def download_pptx(
     presentation_id: int,
+    request: Request,
+    profile: Optional[OutputProfile] = Query(
+        None, description="fast = quicker save, small = smaller file (default: server setting)"
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -331,11 +559,34 @@ def download_pptx(
     ⚠ Dev-friendly version:
        - No auth required
        - No owner check
+
+    Rendered files are published to the artifact store (services/artifacts.py)
+    under their content hash. While the deck, its render key and the output
+    profile are unchanged the published file is served again without
+    rendering (or redirected to, with ARTIFACT_DIRECT_DOWNLOADS). The ETag
+    covers that version key and the file's digest, so If-None-Match gets a
+    304 and Range + If-Range resumes only against the same bytes. Only the
+    render itself runs in the render lane.
     """
+    profile = package_writer.resolve_profile(profile)
+    version = _deck_version(db, presentation_id)
+    version_key = _pptx_version_key(version, profile)
+    filename = f"presentation_{presentation_id}.pptx"
+
+    artifact = artifacts.current(db, "pptx", presentation_id, profile, version_key)
+    if artifact is not None:
+        tag = http_cache.etag("pptx", version_key, artifact.digest)
+        if http_cache.is_fresh(request, tag):
+            return http_cache.not_modified(tag)
+        if artifacts.available(artifact):
+            return artifact_response(request, artifact, filename, tag)
+
+    from services.pptx_generator import build_pptx, output_path
 
     # Look up by ID only (no owner_id filter)
     presentation = (
         db.query(Presentation)
+        .options(selectinload(Presentation.slides))
         .filter(Presentation.presentation_id == presentation_id)
         .first()
     )
@@ -344,16 +595,26 @@ def download_pptx(
 
     # Generate PPTX with current configuration + current content
     config = presentation.configuration or {}
-    pptx_path = build_pptx(
-        presentation.presentation_id,
-        presentation.content,
-        config,
-    )
-    presentation.pptx_path = pptx_path
+    # no other render of this deck's file may land before it is published
+    with render_cache.render_lock(output_path(presentation_id)):
+        with tracing.span("render", slides=len(presentation.slides)):
+            pptx_path = scheduler.run_in_lane(
+                scheduler.RENDER,
+                build_pptx,
+                presentation.presentation_id,
+                presentation.content,
+                config,
+                profile=profile,
+            )
+        with tracing.span("publish"):
+            artifact = artifacts.publish(
+                db,
+                "pptx",
+                presentation_id,
+                profile,
+                version_key,
+                pptx_path,
+            )
     db.commit()
-
-    return FileResponse(
-        path=pptx_path,
-        filename=f"presentation_{presentation.presentation_id}.pptx",
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    )
+    tag = http_cache.etag("pptx", version_key, artifact.digest)
+    return artifact_response(request, artifact, filename, tag)
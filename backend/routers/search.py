@@ -0,0 +1,27 @@
+# backend/routers/search.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from core.dbutils import get_db
+from models import models
+from services import search_index
+from .auth_bridge import get_current_user
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("")
+def search_items(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Ranked full-text search over the current user's presentations
+    (topic + slide text) and Word projects (title, topic, sections).
+    """
+    result = search_index.search(db, current_user.id, q, limit, offset)
+    return {"query": q, "limit": limit, "offset": offset, **result}
@@ -0,0 +1,348 @@
+# backend/services/artifacts.py
+
+import hashlib
+import hmac
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import Config
+from models.models import Artifact
+from services import render_cache
+
+logger = logging.getLogger(__name__)
+
+# Rendered downloads (.pptx / .docx) are published to an artifact store
+# under the sha256 of their bytes ("ab/abcd....pptx"), so identical outputs
+# are stored once and any replica can serve them. The `artifacts` table maps
+# (kind, object, profile) to the digest plus the version key it was rendered
+# from; a download whose version key still matches is served without
+# rendering. The files under ./storage stay as each replica's incremental
+# render cache (services/render_cache.py).
+#
+#   local  files under Config.ARTIFACT_DIR (a shared volume for replicas);
+#          optional HMAC-signed URLs served by routers/artifacts.py
+#   s3     any S3-compatible bucket (AWS, MinIO, a local stand-in) through a
+#          boto3-style client; downloads can redirect to presigned URLs
+
+CHUNK_SIZE = 1 << 20
+
+MEDIA_TYPES = {
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def storage_key(digest: str, ext: str) -> str:
+    return f"{digest[:2]}/{digest}{ext}"
+
+
+def media_type(key: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(key)[1], "application/octet-stream")
+
+
+# ---------------- Stores ----------------
+
+class ArtifactStore(ABC):
+    """Content-addressed blob store; keys come from storage_key()."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> None:
+        """Upload the file at `path` (streamed, not read into memory)."""
+
+    @abstractmethod
+    def iter_bytes(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Bytes [start, end) of the blob (end None = to the end)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        """(key, size, modified timestamp) of every stored blob (storage GC)."""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path on this machine, when the store is a filesystem (lets FileResponse serve Range)."""
+        return None
+
+    def signed_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        """Time-limited URL the client can download from directly, or None if unsupported."""
+        return None
+
+
+class LocalArtifactStore(ArtifactStore):
+    def __init__(self, root: str, url_secret: str = "", url_prefix: str = "/api/v1/artifacts"):
+        self.root = os.path.abspath(root)
+        self.url_secret = url_secret
+        self.url_prefix = url_prefix
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid artifact key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, path: str) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        render_cache.atomic_write(target, lambda tmp: shutil.copyfile(path, tmp))
+
+    def iter_bytes(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), st.st_size, st.st_mtime
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+    def _signature(self, key: str, expires: int, filename: str) -> str:
+        message = f"{key}\n{expires}\n{filename}".encode("utf-8")
+        return hmac.new(self.url_secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    def signed_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        if not self.url_secret:
+            return None
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "name": filename, "sig": self._signature(key, expires, filename)})
+        return f"{self.url_prefix}/{quote(key)}?{query}"
+
+    def verify(self, key: str, expires: int, filename: str, sig: str) -> bool:
+        """True if a signed_url() signature is genuine and not expired."""
+        if not self.url_secret or expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires, filename), sig)
+
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Uses only head_object / upload_fileobj / get_object / delete_object /
+    list_objects_v2 / generate_presigned_url, so any boto3-compatible
+    client works. Without
+    an explicit client one is made with boto3 (optional dependency).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", client=None, endpoint_url: Optional[str] = None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = client
+        self._endpoint_url = endpoint_url
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3  # optional: only needed for ARTIFACT_STORE=s3
+
+            self._client = boto3.client("s3", endpoint_url=self._endpoint_url)
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            code = str(getattr(e, "response", {}).get("Error", {}).get("Code", ""))
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def put_file(self, key: str, path: str) -> None:
+        with open(path, "rb") as f:
+            self.client.upload_fileobj(
+                f, self.bucket, self._key(key), ExtraArgs={"ContentType": media_type(key)}
+            )
+
+    def iter_bytes(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        body = self.client.get_object(**params)["Body"]
+        try:
+            while chunk := body.read(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        prefix = f"{self.prefix}/" if self.prefix else ""
+        params = {"Bucket": self.bucket, "Prefix": prefix}
+        while True:
+            page = self.client.list_objects_v2(**params)
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(prefix):], obj["Size"], obj["LastModified"].timestamp()
+            if not page.get("IsTruncated"):
+                break
+            params["ContinuationToken"] = page["NextContinuationToken"]
+
+    def signed_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+                "ResponseContentType": media_type(key),
+            },
+            ExpiresIn=expires_in,
+        )
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ArtifactStore:
+    """The configured store (Config.ARTIFACT_STORE), created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if Config.ARTIFACT_STORE == "s3":
+                    _store = S3ArtifactStore(
+                        Config.ARTIFACT_S3_BUCKET,
+                        prefix=Config.ARTIFACT_S3_PREFIX,
+                        endpoint_url=Config.ARTIFACT_S3_ENDPOINT_URL,
+                    )
+                else:
+                    if Config.ARTIFACT_STORE != "local":
+                        logger.warning("Unknown ARTIFACT_STORE=%r, using local", Config.ARTIFACT_STORE)
+                    _store = LocalArtifactStore(Config.ARTIFACT_DIR, url_secret=Config.ARTIFACT_URL_SECRET)
+    return _store
+
+
+def set_store(store: Optional[ArtifactStore]) -> None:
+    """Replace the store (e.g. an S3 store with a stand-in client); None = back to config."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+# ---------------- DB pointers ----------------
+
+def current(db: Session, kind: str, object_id: int, profile: str, version_key: str) -> Optional[Artifact]:
+    """The object's published artifact for this profile, if it was rendered from `version_key`."""
+    artifact = (
+        db.query(Artifact)
+        .filter(Artifact.kind == kind, Artifact.object_id == object_id, Artifact.profile == profile)
+        .first()
+    )
+    if artifact is None or artifact.version_key != version_key:
+        return None
+    return artifact
+
+
+def available(artifact: Artifact) -> bool:
+    return get_store().exists(artifact.storage_key)
+
+
+def _snapshot(path: str) -> Tuple[str, str, int]:
+    """Copy `path` to a private temp file, hashing on the way: (temp path, sha256, size)."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                h.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return tmp, h.hexdigest(), size
+
+
+def publish(
+    db: Session,
+    kind: str,
+    object_id: int,
+    profile: str,
+    version_key: str,
+    path: str,
+) -> Artifact:
+    """
+    Store the rendered file at `path` (skipped if the same bytes are already
+    stored) and point (kind, object_id, profile) at it. The caller commits,
+    and holds render_cache.render_lock(path) from rendering until here.
+
+    The bytes are copied aside once and the blob is keyed on the hash of
+    that copy, so a key always names the bytes stored under it.
+    """
+    tmp, digest, size = _snapshot(str(path))
+    try:
+        key = storage_key(digest, os.path.splitext(str(path))[1])
+        store = get_store()
+        if not store.exists(key):
+            store.put_file(key, tmp)
+    finally:
+        os.remove(tmp)
+
+    fields = dict(version_key=version_key, digest=digest, storage_key=key, size=size)
+    query = db.query(Artifact).filter(
+        Artifact.kind == kind, Artifact.object_id == object_id, Artifact.profile == profile
+    )
+    artifact = query.first()
+    if artifact is None:
+        try:
+            with db.begin_nested():
+                artifact = Artifact(kind=kind, object_id=object_id, profile=profile, **fields)
+                db.add(artifact)
+            return artifact
+        except IntegrityError:  # a concurrent download published first
+            artifact = query.one()
+    for name, value in fields.items():
+        setattr(artifact, name, value)
+    return artifact
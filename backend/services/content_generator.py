@@ -1,21 +1,60 @@
 # backend/services/content_generator.py
 
-import google.generativeai as genai
 import json
+import logging
 import re
+import threading
+import time
 from typing import List, Dict, Any
 
+from core import metrics, tracing
 from core.config import Config
 from models import enums
+from services import quotas
+
+logger = logging.getLogger(__name__)
 
 # ---------------- Gemini Setup ----------------
 
-genai.configure(
-    api_key=Config.GEMMINI_API_KEY if hasattr(Config, "GEMMINI_API_KEY") else Config.GEMINI_API_KEY
-)
+# One shared model used by PPT + DOCX helpers. google.generativeai (and its
+# grpc/protobuf stack) takes most of the app's import time, so it is
+# imported and configured on the first generation call, not at startup.
+_model = None
+_model_lock = threading.Lock()
+
 
-# One shared model used by PPT + DOCX helpers
-model = genai.GenerativeModel("gemini-2.0-flash")
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+
+                genai.configure(
+                    api_key=Config.GEMMINI_API_KEY if hasattr(Config, "GEMMINI_API_KEY") else Config.GEMINI_API_KEY
+                )
+                _model = genai.GenerativeModel("gemini-2.0-flash")
+    return _model
+
+
+def _generate(prompt: str, operation: str):
+    """Call Gemini, recording latency, outcome and token usage (/metrics, user quota)."""
+    with tracing.span("gemini.generate_content", operation=operation, prompt_chars=len(prompt)) as sp:
+        start = time.perf_counter()
+        try:
+            resp = get_model().generate_content(prompt)
+        except Exception:
+            metrics.record_llm_call(operation, time.perf_counter() - start, ok=False)
+            raise
+        metrics.record_llm_call(operation, time.perf_counter() - start, ok=True, response=resp)
+        usage = getattr(resp, "usage_metadata", None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_token_count", None)
+            completion_tokens = getattr(usage, "candidates_token_count", None)
+            sp.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            # against the requesting user's daily budget
+            quotas.charge_current((prompt_tokens or 0) + (completion_tokens or 0))
+        return resp
 
 
 # -------------------------------------------------------
@@ -121,7 +160,7 @@ STRICT CONSTRAINTS:
 """
 
     try:
-        resp = model.generate_content(prompt)
+        resp = _generate(prompt, "ppt_content")
         raw = resp.text or ""
         json_clean = re.sub(r"```json|```", "", raw).strip()
         data = json.loads(json_clean)
@@ -129,110 +168,119 @@ STRICT CONSTRAINTS:
         if not isinstance(data, list):
             raise RuntimeError(f"Model returned {type(data)}; expected list")
 
-        normalized_slides: List[Dict[str, Any]] = []
-
-        for idx, slide in enumerate(data):
-            if not isinstance(slide, dict):
-                continue
-
-            # If already in our layout format, keep as-is (with cleanup)
-            if "layout" in slide:
-                layout = slide.get("layout")
-                if layout == enums.SlideLayout.title.value or layout == "title":
-                    normalized_slides.append(
-                        {
-                            "layout": enums.SlideLayout.title.value,
-                            "title": slide.get("title", ""),
-                        }
-                    )
-                elif layout == enums.SlideLayout.bullet.value or layout == "bullet":
-                    normalized_slides.append(
-                        {
-                            "layout": enums.SlideLayout.bullet.value,
-                            "title": slide.get("title", ""),
-                            "bullets": slide.get("bullets") or [],
-                        }
-                    )
-                elif layout == enums.SlideLayout.two_column.value or layout == "two_column":
-                    normalized_slides.append(
-                        {
-                            "layout": enums.SlideLayout.two_column.value,
-                            "title": slide.get("title", ""),
-                            "left": slide.get("left", ""),
-                            "right": slide.get("right", ""),
-                        }
-                    )
-                elif layout == enums.SlideLayout.image.value or layout == "image":
-                    normalized_slides.append(
-                        {
-                            "layout": enums.SlideLayout.image.value,
-                            "title": slide.get("title", ""),
-                            "caption": slide.get("caption", slide.get("title", "")),
-                        }
-                    )
-                continue
-
-            # Fallback: Gemini generic format -> our layouts
-            title = slide.get("title", "")
-            content = slide.get("content")
-            image = slide.get("image")
-            notes = slide.get("notes")
-
-            # List of bullet-like strings → Bullet slide
-            if isinstance(content, list):
-                bullets = [str(b).strip() for b in content if str(b).strip()]
+        with tracing.span("gemini.normalize", slides_in=len(data)):
+            return _normalize_slides(data, topic, num_slides)
+
+    except Exception as e:
+        logger.exception("Gemini PPT content generation failed: %s", e)
+        raise RuntimeError("Gemini content generation failed")
+
+
+
+def _normalize_slides(data: List[Any], topic: str, num_slides: int) -> List[Dict[str, Any]]:
+    """
+    Map raw Gemini slide objects onto our SlideContent layouts, pad/trim to
+    exactly num_slides and attach image URLs to image slides.
+    """
+    normalized_slides: List[Dict[str, Any]] = []
+
+    for idx, slide in enumerate(data):
+        if not isinstance(slide, dict):
+            continue
+
+        # If already in our layout format, keep as-is (with cleanup)
+        if "layout" in slide:
+            layout = slide.get("layout")
+            if layout == enums.SlideLayout.title.value or layout == "title":
                 normalized_slides.append(
                     {
-                        "layout": enums.SlideLayout.bullet.value,
-                        "title": title,
-                        "bullets": bullets,
+                        "layout": enums.SlideLayout.title.value,
+                        "title": slide.get("title", ""),
                     }
                 )
-            # Has image description → Image slide
-            elif image:
+            elif layout == enums.SlideLayout.bullet.value or layout == "bullet":
                 normalized_slides.append(
                     {
-                        "layout": enums.SlideLayout.image.value,
-                        "title": title,
-                        "caption": notes or str(image),
+                        "layout": enums.SlideLayout.bullet.value,
+                        "title": slide.get("title", ""),
+                        "bullets": slide.get("bullets") or [],
                     }
                 )
-            else:
-                # Default to title slide
+            elif layout == enums.SlideLayout.two_column.value or layout == "two_column":
                 normalized_slides.append(
                     {
-                        "layout": enums.SlideLayout.title.value,
-                        "title": title,
+                        "layout": enums.SlideLayout.two_column.value,
+                        "title": slide.get("title", ""),
+                        "left": slide.get("left", ""),
+                        "right": slide.get("right", ""),
                     }
                 )
-
-        # Ensure we have exactly num_slides slides
-        if len(normalized_slides) < num_slides:
-            for i in range(len(normalized_slides), num_slides):
+            elif layout == enums.SlideLayout.image.value or layout == "image":
                 normalized_slides.append(
                     {
-                        "layout": enums.SlideLayout.title.value,
-                        "title": f"Slide {i + 1}",
+                        "layout": enums.SlideLayout.image.value,
+                        "title": slide.get("title", ""),
+                        "caption": slide.get("caption", slide.get("title", "")),
                     }
                 )
-        elif len(normalized_slides) > num_slides:
-            normalized_slides = normalized_slides[:num_slides]
-
-        # Ensure image slides have caption + image_url
-        for idx, s in enumerate(normalized_slides):
-            if s.get("layout") == enums.SlideLayout.image.value or s.get("layout") == "image":
-                if not s.get("caption") or not isinstance(s.get("caption"), str):
-                    s["caption"] = (s.get("title", "") or "")[:120]
+            continue
+
+        # Fallback: Gemini generic format -> our layouts
+        title = slide.get("title", "")
+        content = slide.get("content")
+        image = slide.get("image")
+        notes = slide.get("notes")
+
+        # List of bullet-like strings → Bullet slide
+        if isinstance(content, list):
+            bullets = [str(b).strip() for b in content if str(b).strip()]
+            normalized_slides.append(
+                {
+                    "layout": enums.SlideLayout.bullet.value,
+                    "title": title,
+                    "bullets": bullets,
+                }
+            )
+        # Has image description → Image slide
+        elif image:
+            normalized_slides.append(
+                {
+                    "layout": enums.SlideLayout.image.value,
+                    "title": title,
+                    "caption": notes or str(image),
+                }
+            )
+        else:
+            # Default to title slide
+            normalized_slides.append(
+                {
+                    "layout": enums.SlideLayout.title.value,
+                    "title": title,
+                }
+            )
 
-                seed = re.sub(r"[^a-zA-Z0-9]", "", f"{topic}_{idx}") or f"slide_{idx}"
-                s["image_url"] = f"https://picsum.photos/seed/{seed}/1200/800"
+    # Ensure we have exactly num_slides slides
+    if len(normalized_slides) < num_slides:
+        for i in range(len(normalized_slides), num_slides):
+            normalized_slides.append(
+                {
+                    "layout": enums.SlideLayout.title.value,
+                    "title": f"Slide {i + 1}",
+                }
+            )
+    elif len(normalized_slides) > num_slides:
+        normalized_slides = normalized_slides[:num_slides]
 
-        return normalized_slides
+    # Ensure image slides have caption + image_url
+    for idx, s in enumerate(normalized_slides):
+        if s.get("layout") == enums.SlideLayout.image.value or s.get("layout") == "image":
+            if not s.get("caption") or not isinstance(s.get("caption"), str):
+                s["caption"] = (s.get("title", "") or "")[:120]
 
-    except Exception as e:
-        print("Gemini PPT content generation failed:", e)
-        raise RuntimeError("Gemini content generation failed")
+            seed = re.sub(r"[^a-zA-Z0-9]", "", f"{topic}_{idx}") or f"slide_{idx}"
+            s["image_url"] = f"https://picsum.photos/seed/{seed}/1200/800"
 
+    return normalized_slides
 
 
 # -------------------------------------------------------
@@ -314,7 +362,7 @@ Return ONLY a JSON array (no markdown, no commentary). Each element MUST be:
 
 
     try:
-        resp = model.generate_content(prompt)
+        resp = _generate(prompt, "word_sections")
         json_data = resp.text
         json_clean = re.sub(r"```json|```", "", json_data).strip()
         sections = json.loads(json_clean)
@@ -354,7 +402,7 @@ Return ONLY a JSON array (no markdown, no commentary). Each element MUST be:
         return cleaned_sections
 
     except Exception as e:
-        print("Gemini Word content generation failed:", e)
+        logger.exception("Gemini Word content generation failed: %s", e)
         raise RuntimeError("Gemini Word content generation failed")
 
 
@@ -395,8 +443,8 @@ Rules:
 """
 
     try:
-        resp = model.generate_content(prompt)
+        resp = _generate(prompt, "word_refine")
         return resp.text.strip()
     except Exception as e:
-        print("Gemini Word refinement failed:", e)
+        logger.exception("Gemini Word refinement failed: %s", e)
         raise RuntimeError("Gemini Word refinement failed")
\ No newline at end of file
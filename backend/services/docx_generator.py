@@ -1,16 +1,40 @@
 # backend/services/docx_generator.py
 
+import copy
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from docx import Document
 from docx.shared import Pt
 
+from core import tracing
+from core.metrics import instrument_render
+from services import package_writer, render_cache
+
 # base storage dir (like you do for pptx)
 BASE_DIR = Path(__file__).resolve().parent.parent
 DOC_STORAGE_DIR = BASE_DIR / "storage" / "docs"
 DOC_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Bump when the layout in _build_document changes so cached files and
+# section fragments are rebuilt.
+RENDERER_VERSION = 1
+
+# (paragraph size, heading size) by number of sections on the page
+_FONT_TIERS = {
+    1: (Pt(12), Pt(16)),
+    2: (Pt(11), Pt(14)),
+    3: (Pt(10), Pt(13)),
+}
+
+# Rendered body XML per section, keyed by (title, heading, content, font
+# tier). A refined section misses; every other section is copied as-is.
+_FRAGMENT_CACHE_SIZE = 2048
+_fragments: "OrderedDict[str, list]" = OrderedDict()
+_fragments_lock = threading.Lock()
+
 
 def _clean_section_content(doc_title: str, heading: str, raw: str) -> str:
     """
@@ -82,10 +106,17 @@ def _clean_section_content(doc_title: str, heading: str, raw: str) -> str:
     return "\n".join(cleaned).strip()
 
 
+def output_path(project_id: int) -> Path:
+    """Where build_docx_file writes a project (its manifest sits next to it)."""
+    return DOC_STORAGE_DIR / f"project_{project_id}.docx"
+
+
+@instrument_render("docx")
 def build_docx_file(
     project_id: int,
     title: str,
     pages: Dict[int, List[Dict[str, str]]],  # {1: [...], 2: [...], ...}
+    profile: Optional[str] = None,
 ) -> Path:
     """
     pages = {
@@ -101,14 +132,106 @@ def build_docx_file(
 
     - Each key is a page number (1-based).
     - Each value is a list of sections for that page.
+
+    profile: output profile for the saved zip (see services/package_writer.py).
+
+    If the file on disk was built from the same title and pages it is
+    returned as-is; otherwise unchanged sections reuse their cached XML.
     """
 
+    file_path = output_path(project_id)
+
+    profile = package_writer.resolve_profile(profile)
+    file_key = render_cache.content_hash(
+        {"renderer": RENDERER_VERSION, "title": title, "pages": pages, "profile": profile}
+    )
+    manifest = render_cache.read_manifest(str(file_path))
+    if manifest is not None and manifest.get("file_key") == file_key:
+        return file_path
+
+    with tracing.span("docx.build", pages=len(pages)):
+        doc = _build_document(title, pages)
+
+    with tracing.span("docx.save"):
+        render_cache.write_rendered(
+            str(file_path),
+            lambda tmp: package_writer.save_document(doc, tmp, profile),
+            {"file_key": file_key},
+        )
+
+    return file_path
+
+
+def _font_tier(num_sections: int) -> int:
+    return min(max(num_sections, 1), max(_FONT_TIERS))
+
+
+def _render_section(doc, title: str, heading: str, raw_content: str, tier: int) -> None:
+    """Append one section's heading and paragraphs to doc."""
+    para_size, heading_size = _FONT_TIERS[tier]
+
+    # Clean up Gemini text (remove doc title / Page X / Section X lines, handle \n)
+    content = _clean_section_content(title, heading, raw_content)
+
+    if heading:
+        h = doc.add_heading(heading, level=1)
+        for run in h.runs:
+            run.font.size = heading_size
+
+    if content:
+        for para_text in content.split("\n"):
+            if para_text.strip():
+                p = doc.add_paragraph(para_text.strip())
+                for run in p.runs:
+                    run.font.size = para_size
+
+
+def _add_section(doc, title: str, heading: str, raw_content: str, tier: int) -> bool:
+    """
+    Append a section, copying its XML from the fragment cache when possible.
+    Returns True on a cache hit.
+    """
+    key = render_cache.content_hash([RENDERER_VERSION, title, heading, raw_content, tier])
+    body = doc.element.body
+
+    with _fragments_lock:
+        cached = _fragments.get(key)
+        if cached is not None:
+            _fragments.move_to_end(key)
+
+    if cached is not None:
+        sect_pr = body.sectPr
+        for el in cached:
+            el = copy.deepcopy(el)
+            if sect_pr is not None:
+                sect_pr.addprevious(el)
+            else:
+                body.append(el)
+        return True
+
+    before = len(body)
+    _render_section(doc, title, heading, raw_content, tier)
+    # new paragraphs are inserted before the trailing sectPr
+    end = len(body) - (1 if body.sectPr is not None else 0)
+    start = before - (1 if body.sectPr is not None else 0)
+    fragment = [copy.deepcopy(el) for el in body[start:end]]
+
+    with _fragments_lock:
+        _fragments[key] = fragment
+        while len(_fragments) > _FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return False
+
+
+def _build_document(title: str, pages: Dict[int, List[Dict[str, str]]]):
+    """Lay out the title and all page sections into a new python-docx Document."""
     doc = Document()
 
     # Title page (Word will handle its own pagination)
     doc.add_heading(title, level=0)
 
     first_page = True
+    reused = rendered = 0
 
     for page_num in sorted(pages.keys()):
         # For the first *content* page after the title we don't add a break.
@@ -118,41 +241,20 @@ def build_docx_file(
         first_page = False
 
         page_sections = pages[page_num]
-        num_sections = len(page_sections)
 
         # Simple font size logic based on how many sections in the page
-        if num_sections <= 1:
-            para_size = Pt(12)
-            heading_size = Pt(16)
-        elif num_sections == 2:
-            para_size = Pt(11)
-            heading_size = Pt(14)
-        else:
-            # 3 sections -> slightly smaller text
-            para_size = Pt(10)
-            heading_size = Pt(13)
+        tier = _font_tier(len(page_sections))
 
         for section in page_sections:
             heading = section.get("heading", "") or ""
             raw_content = section.get("content", "") or ""
+            if _add_section(doc, title, heading, raw_content, tier):
+                reused += 1
+            else:
+                rendered += 1
 
-            # Clean up Gemini text (remove doc title / Page X / Section X lines, handle \n)
-            content = _clean_section_content(title, heading, raw_content)
-
-            if heading:
-                h = doc.add_heading(heading, level=1)
-                for run in h.runs:
-                    run.font.size = heading_size
+    current = tracing.current_span()
+    if current is not None:
+        current.set(reused_sections=reused, rendered_sections=rendered)
 
-            if content:
-                for para_text in content.split("\n"):
-                    if para_text.strip():
-                        p = doc.add_paragraph(para_text.strip())
-                        for run in p.runs:
-                            run.font.size = para_size
-
-    file_name = f"project_{project_id}.docx"
-    file_path = DOC_STORAGE_DIR / file_name
-    doc.save(file_path)
-
-    return file_path
+    return doc
@@ -0,0 +1,246 @@
+# backend/services/idempotency.py
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+import anyio.to_thread
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Idempotency-Key support for the POSTs that generate or create something
+# (each one a Gemini call and a new row), so a client retrying after a
+# timeout gets the first attempt's response instead of a second run:
+#
+#   new key          claim it (row "pending"), run the request; a 2xx
+#                    response is stored ("done"), anything else drops the
+#                    claim so a retry runs again
+#   key "done"       replay the stored status + body (Idempotent-Replayed: true)
+#   key "pending"    a duplicate in flight: wait for it (polling the row, so
+#                    it works across workers), up to IDEMPOTENCY_WAIT_TIMEOUT,
+#                    then 409 + Retry-After
+#   other request    same key with another method/path/body: 422
+#
+# Keys are per user and kept IDEMPOTENCY_TTL seconds. A claim not finished
+# within IDEMPOTENCY_PENDING_TIMEOUT (the worker died) may be taken over.
+# routers/auth_bridge.check_idempotency_key claims the key before the quota
+# check and the scheduler lane, so a replay costs neither; the middleware
+# below stores the response once it has been sent.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+STATE_KEY = "idempotency_claim"
+
+_POLL_START = 0.05  # seconds; doubles up to _POLL_MAX while waiting
+_POLL_MAX = 0.5
+
+
+@dataclass(frozen=True)
+class Claim:
+    """This request owns the key: its response is stored under `row_id`."""
+
+    row_id: int
+
+
+@dataclass(frozen=True)
+class Stored:
+    status_code: int
+    media_type: Optional[str]
+    body: bytes
+
+
+class Replay(Exception):
+    """Raised by the dependency to answer with a stored response (see replay_response)."""
+
+    def __init__(self, stored: Stored):
+        super().__init__("idempotent replay")
+        self.stored = stored
+
+
+class KeyMismatch(Exception):
+    pass
+
+
+class StillPending(Exception):
+    pass
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    h = hashlib.sha256(f"{method} {path}\n".encode("utf-8"))
+    h.update(body)
+    return h.hexdigest()
+
+
+def _try_claim(user_id: int, key: str, digest: str) -> Union[Claim, Stored, None]:
+    """Claim the key, or return its stored response, or None while another request holds it."""
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        try:
+            with db.begin_nested():
+                row = IdempotencyKey(user_id=user_id, key=key, fingerprint=digest, status="pending")
+                db.add(row)
+            db.commit()
+            return Claim(row.id)
+        except IntegrityError:
+            pass
+
+        row = db.query(IdempotencyKey).filter_by(user_id=user_id, key=key).one()
+        expired = (
+            row.status == "done" and row.updated_at < now - timedelta(seconds=Config.IDEMPOTENCY_TTL)
+        ) or (
+            row.status == "pending"
+            and row.updated_at < now - timedelta(seconds=Config.IDEMPOTENCY_PENDING_TIMEOUT)
+        )
+        if expired:
+            # reuse the row; the updated_at check lets only one taker win
+            taken = db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == row.id, IdempotencyKey.updated_at == row.updated_at)
+                .values(
+                    fingerprint=digest,
+                    status="pending",
+                    response_status=None,
+                    response_type=None,
+                    response_body=None,
+                    updated_at=now,
+                )
+            ).rowcount
+            db.commit()
+            return Claim(row.id) if taken else None
+
+        if row.fingerprint != digest:
+            raise KeyMismatch()
+        if row.status == "done":
+            return Stored(row.response_status, row.response_type, row.response_body or b"")
+        return None
+    finally:
+        db.close()
+
+
+async def claim(user_id: int, key: str, digest: str) -> Claim:
+    """
+    Own `key` for this request (returns the Claim), or raise Replay with the
+    first request's response, KeyMismatch, or StillPending after waiting
+    IDEMPOTENCY_WAIT_TIMEOUT for a duplicate in flight.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.IDEMPOTENCY_WAIT_TIMEOUT
+    delay = _POLL_START
+    while True:
+        result = await anyio.to_thread.run_sync(_try_claim, user_id, key, digest)
+        if isinstance(result, Claim):
+            return result
+        if isinstance(result, Stored):
+            raise Replay(result)
+        if loop.time() + delay > deadline:
+            raise StillPending()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _POLL_MAX)
+
+
+def complete(claim: Claim, status_code: int, media_type: Optional[str], body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim.row_id)
+            .values(status="done", response_status=status_code, response_type=media_type, response_body=body)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(claim: Claim) -> None:
+    """Forget a claim whose request failed, so a retry runs again."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id == claim.row_id, IdempotencyKey.status == "pending")
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge_expired(db: Session) -> int:
+    """Delete keys past IDEMPOTENCY_TTL (and long-abandoned claims); the caller commits."""
+    now = datetime.now()
+    return db.execute(
+        delete(IdempotencyKey).where(
+            or_(
+                IdempotencyKey.updated_at < now - timedelta(seconds=Config.IDEMPOTENCY_TTL),
+                (IdempotencyKey.status == "pending")
+                & (IdempotencyKey.updated_at < now - timedelta(seconds=Config.IDEMPOTENCY_PENDING_TIMEOUT)),
+            )
+        )
+    ).rowcount
+
+
+def replay_response(request: Request, exc: Replay) -> Response:
+    """Exception handler for Replay: the stored response, marked as a replay."""
+    stored = exc.stored
+    return Response(
+        stored.body,
+        status_code=stored.status_code,
+        media_type=stored.media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware storing the response of a request that claimed an
+    Idempotency-Key (request.state.idempotency_claim), or dropping the claim
+    when the request did not succeed. Sits inside the compression
+    middleware, so the identity body is stored.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        response = {"status": None, "type": None, "complete": False}
+        chunks = []
+
+        async def send_wrapper(message):
+            claimed = STATE_KEY in scope.get("state", {})
+            if claimed and message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["type"] = Headers(raw=message["headers"]).get("content-type")
+            elif claimed and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            claim = scope.get("state", {}).get(STATE_KEY)
+            if claim is not None:
+                status = response["status"]
+                try:
+                    if status is not None and 200 <= status < 300 and response["complete"]:
+                        await anyio.to_thread.run_sync(complete, claim, status, response["type"], b"".join(chunks))
+                    else:
+                        await anyio.to_thread.run_sync(release, claim)
+                except Exception:
+                    logger.exception("Could not record the response for an Idempotency-Key")
@@ -0,0 +1,196 @@
+# backend/services/package_writer.py
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import IO, Optional, Union
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Output profiles for saved .pptx / .docx packages:
+#
+#   default  every member deflated at zlib's default level (as the libraries do)
+#   fast     XML deflated at level 1, already-compressed media stored as-is
+#   small    everything deflated at level 9, JPEG/PNG media re-encoded
+#            (and downscaled past SMALL_MAX_IMAGE_SIDE) when that is smaller
+#
+# Both python-pptx and python-docx hard-code ZIP_DEFLATED in their zip
+# writers and stamp members with the current time, so every profile reuses
+# the libraries' PackageWriter helpers (content types, rels, parts) with our
+# own zip writer. Members get a fixed timestamp (as Office itself writes),
+# which makes a package byte-identical whenever its parts are: downloads can
+# then be resumed with Range + If-Range across rebuilds of the same render.
+
+PROFILES = ("default", "fast", "small")
+
+SMALL_MAX_IMAGE_SIDE = 2560  # px; a 13.3in wide slide at ~190 dpi
+SMALL_JPEG_QUALITY = 82
+
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+# members that are already compressed; deflating them again buys ~nothing
+_COMPRESSED_EXTS = frozenset(
+    (".jpeg", ".jpg", ".jfif", ".png", ".gif", ".webp", ".wdp", ".mp4", ".m4v", ".mov", ".mp3", ".m4a", ".wmv")
+)
+
+# re-encoded images by sha1 of the original; template media repeats on every save
+_RECOMPRESS_CACHE_SIZE = 128
+_recompressed: "OrderedDict[str, bytes]" = OrderedDict()
+_recompressed_lock = threading.Lock()
+
+
+class _Profile:
+    def __init__(self, xml_level: Optional[int], store_media: bool, recompress_images: bool):
+        self.xml_level = xml_level
+        self.store_media = store_media
+        self.recompress_images = recompress_images
+
+
+_SETTINGS = {
+    "default": _Profile(xml_level=None, store_media=False, recompress_images=False),
+    "fast": _Profile(xml_level=1, store_media=True, recompress_images=False),
+    "small": _Profile(xml_level=9, store_media=False, recompress_images=True),
+}
+
+
+def resolve_profile(profile: Optional[str]) -> str:
+    """Requested profile, else Config.OUTPUT_PROFILE, else 'default'."""
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown output profile: {profile}")
+        return profile
+    configured = Config.OUTPUT_PROFILE
+    if configured not in PROFILES:
+        logger.warning("Ignoring unknown OUTPUT_PROFILE=%r", configured)
+        return "default"
+    return configured
+
+
+# ---------------- Image re-encoding ----------------
+
+def _reencode(blob: bytes, ext: str) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:  # Pillow is optional for rendering
+        return blob
+
+    try:
+        img = Image.open(io.BytesIO(blob))
+        img.load()
+        if max(img.size) > SMALL_MAX_IMAGE_SIDE:
+            img.thumbnail((SMALL_MAX_IMAGE_SIDE, SMALL_MAX_IMAGE_SIDE), Image.LANCZOS)
+
+        out = io.BytesIO()
+        if ext in (".jpeg", ".jpg", ".jfif"):
+            if img.mode not in ("RGB", "L", "CMYK"):
+                img = img.convert("RGB")
+            img.save(
+                out,
+                "JPEG",
+                quality=SMALL_JPEG_QUALITY,
+                optimize=True,
+                progressive=True,
+                icc_profile=img.info.get("icc_profile"),
+                exif=img.info.get("exif", b""),
+            )
+        else:
+            img.save(out, "PNG", optimize=True)
+    except Exception as e:  # damaged / exotic image: keep the original
+        logger.debug("Image re-encode skipped: %s", e)
+        return blob
+
+    data = out.getvalue()
+    return data if len(data) < len(blob) else blob
+
+
+def _small_image(blob: bytes, ext: str) -> bytes:
+    if ext not in (".jpeg", ".jpg", ".jfif", ".png"):
+        return blob
+    key = hashlib.sha1(blob).hexdigest()
+    with _recompressed_lock:
+        cached = _recompressed.get(key)
+        if cached is not None:
+            _recompressed.move_to_end(key)
+            return cached
+    data = _reencode(blob, ext)
+    with _recompressed_lock:
+        _recompressed[key] = data
+        while len(_recompressed) > _RECOMPRESS_CACHE_SIZE:
+            _recompressed.popitem(last=False)
+    return data
+
+
+# ---------------- Zip writer ----------------
+
+class _ProfileZipWriter:
+    """Stands in for the libraries' _ZipPkgWriter: write(pack_uri, blob) + close."""
+
+    def __init__(self, pkg_file: Union[str, IO[bytes]], profile: _Profile):
+        self._profile = profile
+        self._zipf = zipfile.ZipFile(
+            pkg_file,
+            "w",
+            compression=zipfile.ZIP_DEFLATED,
+            compresslevel=profile.xml_level,
+            strict_timestamps=False,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._zipf.close()
+
+    def write(self, pack_uri, blob: bytes) -> None:
+        name = pack_uri.membername
+        ext = os.path.splitext(name)[1].lower()
+        compress_type = zipfile.ZIP_DEFLATED
+        if ext in _COMPRESSED_EXTS:
+            if self._profile.recompress_images:
+                blob = _small_image(blob, ext)
+            if self._profile.store_media:
+                compress_type = zipfile.ZIP_STORED
+        info = zipfile.ZipInfo(name, date_time=ZIP_TIMESTAMP)
+        info.external_attr = 0o600 << 16  # what writestr(name, ...) sets
+        self._zipf.writestr(info, blob, compress_type=compress_type, compresslevel=self._profile.xml_level)
+
+
+# ---------------- Public API ----------------
+
+def save_presentation(prs, pkg_file: Union[str, IO[bytes]], profile: Optional[str] = None) -> None:
+    """prs.save() with an output profile."""
+    profile = resolve_profile(profile)
+
+    from pptx.opc.serialized import PackageWriter
+
+    package = prs.part.package
+    writer = PackageWriter(pkg_file, package._rels, tuple(package.iter_parts()))
+    with _ProfileZipWriter(pkg_file, _SETTINGS[profile]) as phys_writer:
+        writer._write_content_types_stream(phys_writer)
+        writer._write_pkg_rels(phys_writer)
+        writer._write_parts(phys_writer)
+
+
+def save_document(doc, pkg_file: Union[str, IO[bytes]], profile: Optional[str] = None) -> None:
+    """doc.save() with an output profile."""
+    profile = resolve_profile(profile)
+
+    from docx.opc.pkgwriter import PackageWriter
+
+    package = doc.part.package
+    parts = list(package.parts)
+    for part in parts:
+        part.before_marshal()
+    with _ProfileZipWriter(pkg_file, _SETTINGS[profile]) as phys_writer:
+        PackageWriter._write_content_types_stream(phys_writer, parts)
+        PackageWriter._write_pkg_rels(phys_writer, package.rels)
+        PackageWriter._write_parts(phys_writer, parts)
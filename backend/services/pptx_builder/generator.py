@@ -3,6 +3,29 @@ from services.pptx_builder.slides.title import TitleSlideStrategy
 from services.pptx_builder.slides.bullet import BulletSlideStrategy
 from services.pptx_builder.slides.two_column import TwoColumnSlideStrategy
 from services.pptx_builder.slides.image import ImageSlideStrategy
+from services.pptx_builder.utils import placeholders_by_idx
+from services.template_index import TemplateIndex
+
+
+class RenderContext:
+    """
+    Per-deck state shared by every slide strategy. Styling is not part of
+    it: DeckStyle is applied to the masters/layouts before slides are added.
+    """
+
+    def __init__(self, prs, layouts: TemplateIndex, presentation_id: int):
+        self.prs = prs
+        self.layouts = layouts
+        self.presentation_id = presentation_id
+
+    def new_slide(self, slide_type: str):
+        """
+        Add a slide on the theme's best layout for `slide_type`.
+        Returns (slide, layout info, {placeholder idx: placeholder shape}).
+        """
+        info = self.layouts.for_slide(slide_type)
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[info.index])
+        return slide, info, placeholders_by_idx(slide)
 
 
 class SlideGenerator:
@@ -13,10 +36,13 @@ class SlideGenerator:
             enums.SlideLayout.two_column.value: TwoColumnSlideStrategy(),
             enums.SlideLayout.image.value: ImageSlideStrategy(),
         }
+        # unknown layouts still get a slide with their title
+        self.fallback = TitleSlideStrategy(default_title="Slide")
+
+    def register(self, layout: str, strategy) -> None:
+        self.strategies[layout] = strategy
 
-    def add_slide(self, prs, slide_data, config, **kwargs):
+    def add_slide(self, ctx: RenderContext, slide_data: dict):
         layout = slide_data.get("layout", enums.SlideLayout.title.value)
-        strategy = self.strategies.get(layout)
-        if not strategy:
-            raise ValueError(f"No strategy for layout: {layout}")
-        return strategy.add_slide(prs, slide_data, config, **kwargs)
\ No newline at end of file
+        strategy = self.strategies.get(layout, self.fallback)
+        return strategy.add_slide(ctx, slide_data)
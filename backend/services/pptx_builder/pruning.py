@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import re
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+
+logger = logging.getLogger(__name__)
+
+# Bump when prune_template changes so cached base templates are rebuilt.
+PRUNE_VERSION = 1
+
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_BG_REF = re.compile(rb'bgRef\s+idx="(\d+)"')
+# r:id, r:embed, r:link, ... anywhere in a part
+_R_ATTRS = etree.XPath("//@*[namespace-uri()=$ns]")
+
+
+def prune_template(prs) -> dict:
+    """
+    Drop what a template carries but generated decks never show, once its
+    sample slides are gone (python-pptx already leaves unreachable slide
+    parts out of the saved package):
+
+    - the template's docProps thumbnail (a picture of its sample slide)
+    - theme background images no master or layout refers to (e.g. the
+      picture background of a theme whose slides use a plain fill, or
+      every theme picture once `background_color` overrides the masters)
+    - image relationships that nothing in the part's XML points to
+    - duplicate media blobs stored under several part names
+
+    Returns counts per step, for logging.
+    """
+    stats = {
+        "thumbnail": _drop_thumbnail(prs),
+        "theme_backgrounds": 0,
+        "dangling_rels": 0,
+        "duplicate_media": dedupe_media(prs),
+    }
+    for master in prs.slide_masters:
+        stats["theme_backgrounds"] += _drop_unused_theme_backgrounds(master)
+        for part in [master.part] + [layout.part for layout in master.slide_layouts]:
+            stats["dangling_rels"] += _drop_dangling_image_rels(part)
+    return stats
+
+
+def dedupe_media(prs) -> int:
+    """
+    Point every relationship to an image at one part per distinct blob.
+
+    python-pptx already reuses image parts by SHA1 when pictures are added,
+    so this only matters for packages that arrive with copies (templates
+    saved by other tools). Returns the number of parts made unreachable.
+    """
+    package = prs.part.package
+    canonical = {}
+    duplicates = 0
+    for part in list(package.iter_parts()):
+        for rel in part.rels.values():
+            if rel.is_external or rel.reltype != RT.IMAGE:
+                continue
+            target = rel.target_part
+            key = hashlib.sha1(target.blob).hexdigest()
+            first = canonical.setdefault(key, target)
+            if first is not target:
+                rel._target = first
+                duplicates += 1
+    return duplicates
+
+
+def _drop_thumbnail(prs) -> int:
+    rels = prs.part.package._rels
+    dropped = 0
+    for rId, rel in list(rels.items()):
+        if rel.reltype == RT.THUMBNAIL:
+            rels.pop(rId)
+            dropped += 1
+    return dropped
+
+
+def _used_rids(element) -> set:
+    return {str(value) for value in _R_ATTRS(element, ns=_R_NS)}
+
+
+def _drop_dangling_image_rels(part) -> int:
+    # XmlPart.drop_rel only counts r:id attributes, not r:embed; check all
+    used = _used_rids(part._element)
+    dropped = 0
+    for rId, rel in list(part.rels.items()):
+        if not rel.is_external and rel.reltype == RT.IMAGE and rId not in used:
+            part.rels.pop(rId)
+            dropped += 1
+    return dropped
+
+
+def _drop_unused_theme_backgrounds(master) -> int:
+    """
+    Replace picture entries of the theme's bgFillStyleLst that no p:bgRef
+    on the master or its layouts selects (bgRef idx 1001 = first entry) by
+    a plain fill, and drop the image relationships that frees.
+    """
+    theme_part = master.part.part_related_by(RT.THEME)
+    used_idx = set()
+    for part in [master.part] + [layout.part for layout in master.slide_layouts]:
+        used_idx.update(int(i) for i in _BG_REF.findall(etree.tostring(part._element)))
+
+    # the theme is an opaque blob part in python-pptx; edit its XML directly
+    theme = etree.fromstring(theme_part.blob)
+    bg_styles = theme.find(f".//{qn('a:fmtScheme')}/{qn('a:bgFillStyleLst')}")
+    if bg_styles is None:
+        return 0
+
+    replaced = 0
+    for position, fill in enumerate(list(bg_styles), start=1001):
+        if fill.tag != qn("a:blipFill") or position in used_idx:
+            continue
+        plain = etree.Element(qn("a:solidFill"))
+        etree.SubElement(plain, qn("a:schemeClr"), val="phClr")
+        bg_styles.replace(fill, plain)
+        replaced += 1
+    if not replaced:
+        return 0
+
+    used = _used_rids(theme)
+    for rId, rel in list(theme_part.rels.items()):
+        if not rel.is_external and rel.reltype == RT.IMAGE and rId not in used:
+            theme_part.rels.pop(rId)
+    theme_part._blob = etree.tostring(theme, xml_declaration=True, encoding="UTF-8", standalone=True)
+    return replaced
@@ -1,12 +1,10 @@
-from services.pptx_builder.utils import set_slide_title_and_style
+from services.pptx_builder.utils import fill_text_frame, placeholder, set_title
 
 class BulletSlideStrategy:
-    def add_slide(self, prs, slide_data, config, **kwargs):
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        set_slide_title_and_style(slide, slide_data, config.get("background_color", "#FFFFFF"), config.get("font_name", "Arial"), config.get("font_color", "#000000"))
-        body = slide.placeholders[1].text_frame
-        for bullet in slide_data.get("bullets", []):
-            p = body.add_paragraph()
-            p.text = bullet
-            p.level = 0
-        return slide 
\ No newline at end of file
+    def add_slide(self, ctx, slide_data):
+        slide, info, phs = ctx.new_slide("bullet")
+        set_title(placeholder(phs, info.title), slide_data.get("title", "") or "")
+        body = placeholder(phs, info.bodies[0] if info.bodies else None)
+        if body is not None:
+            fill_text_frame(body.text_frame, slide_data.get("bullets", []) or [])
+        return slide
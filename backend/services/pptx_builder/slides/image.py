@@ -1,42 +1,71 @@
-from pptx.util import Inches
-from pptx.enum.shapes import MSO_SHAPE
-import requests
-from io import BytesIO
-from services.pptx_builder.utils import set_slide_title_and_style
+import logging
+
+from services.pptx_builder.utils import (
+    clean_image_url,
+    fetch_image,
+    fill_text_frame,
+    placeholder,
+    set_title,
+    split_into_paragraphs,
+)
+
+logger = logging.getLogger(__name__)
 
 class ImageSlideStrategy:
-    def add_slide(self, prs, slide_data, config, **kwargs):
-        slide = prs.slides.add_slide(prs.slide_layouts[5])
-        set_slide_title_and_style(slide, slide_data, config.get("background_color", "#FFFFFF"), config.get("font_name", "Arial"), config.get("font_color", "#000000"))
-        image_url = slide_data.get("image_url")
-        logger = kwargs.get("logger")
-        if image_url:
+    """Picture in the first content placeholder, caption in the second (two-content layout)."""
+
+    def add_slide(self, ctx, slide_data):
+        prs = ctx.prs
+        slide, info, phs = ctx.new_slide("image")
+        title_text = slide_data.get("title", "")
+        set_title(placeholder(phs, info.title), title_text or "")
+
+        content = [ph for ph in (placeholder(phs, b) for b in info.bodies[:2]) if ph is not None]
+        img_placeholder = content[0] if len(content) >= 1 else None
+        text_placeholder = content[1] if len(content) >= 2 else None
+
+        img_url = slide_data.get("image_url")
+        caption = slide_data.get("caption") or slide_data.get("description") or ""
+        if img_url:
+            img_url = clean_image_url(img_url)
+
+        text_to_use = caption or title_text or ""
+
+        # IMAGE
+        if img_url:
             try:
-                response = requests.get(image_url)
-                image_stream = BytesIO(response.content)
-                slide.shapes.add_picture(
-                    image_stream,
-                    Inches(2), Inches(2),
-                    width=Inches(6)
-                )
-            except Exception as e:
-                if logger:
-                    logger.error(f"Failed to add image: {str(e)}")
+                image = fetch_image(img_url)
+                if img_placeholder is not None:
+                    slide.shapes.add_picture(
+                        image,
+                        img_placeholder.left,
+                        img_placeholder.top,
+                        width=img_placeholder.width,
+                        height=img_placeholder.height,
+                    )
+                    try:
+                        img_placeholder.text = ""
+                    except Exception:
+                        pass
                 else:
-                    print(f"Failed to add image: {str(e)}")
-                slide.shapes.add_shape(
-                    MSO_SHAPE.RECTANGLE,
-                    Inches(2), Inches(2),
-                    Inches(6), Inches(4)
-                )
+                    left = int(prs.slide_width * 0.08)
+                    top = int(prs.slide_height * 0.25)
+                    width = int(prs.slide_width * 0.4)
+                    slide.shapes.add_picture(image, left, top, width=width)
+            except Exception as e:
+                text_to_use = f"{caption or title_text or ''}\n\n(Image failed to load: {img_url})"
+                logger.warning("Image download/insert failed: %s", e)
+
+        # TEXT
+        paragraphs = split_into_paragraphs(text_to_use, max_sentences_per_para=2) or [text_to_use]
+
+        if text_placeholder is not None:
+            tf = text_placeholder.text_frame
         else:
-            if logger:
-                logger.warning(f"No image URL provided for slide: {slide_data.get('title')}")
-            else:
-                print(f"No image URL provided for slide: {slide_data.get('title')}")
-            slide.shapes.add_shape(
-                MSO_SHAPE.RECTANGLE,
-                Inches(2), Inches(2),
-                Inches(6), Inches(4)
-            )
-        return slide 
\ No newline at end of file
+            left = int(prs.slide_width * 0.55)
+            top = int(prs.slide_height * 0.25)
+            width = int(prs.slide_width * 0.35)
+            height = int(prs.slide_height * 0.5)
+            tf = slide.shapes.add_textbox(left, top, width, height).text_frame
+        fill_text_frame(tf, paragraphs)
+        return slide
@@ -1,14 +1,16 @@
 from pptx.util import Inches
-from services.pptx_builder.utils import set_slide_title_and_style
+from services.pptx_builder.utils import placeholder, set_title
 
 class TitleSlideStrategy:
-    def add_slide(self, prs, slide_data, config, **kwargs):
-        slide = prs.slides.add_slide(prs.slide_layouts[0])
-        set_slide_title_and_style(slide, slide_data, config.get("background_color", "#FFFFFF"), config.get("font_name", "Arial"), config.get("font_color", "#000000"))
-        footer = slide_data.get("footer_text") or kwargs.get("footer_text")
+    def __init__(self, default_title: str = "Title"):
+        self.default_title = default_title
+
+    def add_slide(self, ctx, slide_data):
+        slide, info, phs = ctx.new_slide("title")
+        set_title(placeholder(phs, info.title), slide_data.get("title", "") or self.default_title)
+        footer = slide_data.get("footer_text")
         if footer:
-            left = top = width = height = Inches(0.5)
-            txBox = slide.shapes.add_textbox(left, prs.slide_height - Inches(0.7), prs.slide_width - Inches(1), height)
-            tf = txBox.text_frame
-            tf.text = footer
-        return slide 
\ No newline at end of file
+            prs = ctx.prs
+            txBox = slide.shapes.add_textbox(Inches(0.5), prs.slide_height - Inches(0.7), prs.slide_width - Inches(1), Inches(0.5))
+            txBox.text_frame.text = footer
+        return slide
@@ -1,19 +1,10 @@
-from services.pptx_builder.utils import set_slide_title_and_style
+from services.pptx_builder.utils import fill_text_frame, placeholder, set_title
 
 class TwoColumnSlideStrategy:
-    def add_slide(self, prs, slide_data, config, **kwargs):
-        slide = prs.slides.add_slide(prs.slide_layouts[3])
-        set_slide_title_and_style(slide, slide_data, config.get("background_color", "#FFFFFF"), config.get("font_name", "Arial"), config.get("font_color", "#000000"))
-        left_placeholder = slide.placeholders[1]
-        right_placeholder = slide.placeholders[2]
-        left_placeholder.text = ""
-        right_placeholder.text = ""
-        for para in slide_data.get("left", "").split("\n"):
-            p = left_placeholder.text_frame.add_paragraph()
-            p.text = para.strip()
-            p.level = 0
-        for para in slide_data.get("right", "").split("\n"):
-            p = right_placeholder.text_frame.add_paragraph()
-            p.text = para.strip()
-            p.level = 0
-        return slide 
\ No newline at end of file
+    def add_slide(self, ctx, slide_data):
+        slide, info, phs = ctx.new_slide("two_column")
+        set_title(placeholder(phs, info.title), slide_data.get("title", "") or "")
+        columns = [ph for ph in (placeholder(phs, b) for b in info.bodies[:2]) if ph is not None]
+        for ph, key in zip(columns, ("left", "right")):
+            fill_text_frame(ph.text_frame, [slide_data.get(key, "")])
+        return slide
@@ -0,0 +1,183 @@
+import copy
+import logging
+from typing import Iterable, Optional
+
+from lxml import etree
+from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+
+logger = logging.getLogger(__name__)
+
+# Bump when apply_to_deck changes so cached derived templates are rebuilt.
+STYLE_VERSION = 1
+
+_LEVELS = tuple(qn(f"a:lvl{i}pPr") for i in range(1, 10))
+
+# a:defRPr children, in schema order around the ones we set
+_FILLS = frozenset(
+    qn(f"a:{tag}") for tag in ("noFill", "solidFill", "gradFill", "blipFill", "pattFill", "grpFill")
+)
+_LN = qn("a:ln")
+_LATIN = qn("a:latin")
+_AFTER_LATIN = frozenset(
+    qn(f"a:{tag}") for tag in ("ea", "cs", "sym", "hlinkClick", "hlinkMouseOver", "rtl", "extLst")
+)
+
+
+def _parse_color(value: Optional[str]) -> Optional[RGBColor]:
+    """'#RRGGBB' / '#RGB' -> RGBColor; None for empty or invalid values."""
+    if not value:
+        return None
+    hex_value = value.strip().lstrip("#")
+    if len(hex_value) == 3:
+        hex_value = "".join(c * 2 for c in hex_value)
+    try:
+        return RGBColor.from_string(hex_value)
+    except ValueError:
+        logger.warning("Ignoring invalid color %r", value)
+        return None
+
+
+class DeckStyle:
+    """
+    Font / color overrides from ConfigurationUpdate, compiled once per deck
+    and written into the slide master, layouts and presentation defaults.
+
+    Slides inherit text and background from there, so styling costs the
+    same for a 3-slide and a 300-slide deck: no run or slide is touched.
+    Fields left unset keep whatever the theme template defines.
+    """
+
+    def __init__(self, font_name=None, font_color=None, background_color=None, accent_color=None):
+        self.font_name = font_name or None
+        self.font_color = _parse_color(font_color)
+        self.background_color = _parse_color(background_color)
+        self.accent_color = _parse_color(accent_color)
+
+        # compiled once, deep-copied into every defRPr
+        self._fill = None
+        if self.font_color is not None:
+            self._fill = etree.Element(qn("a:solidFill"))
+            etree.SubElement(self._fill, qn("a:srgbClr"), val=str(self.font_color))
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "DeckStyle":
+        config = config or {}
+        return cls(
+            config.get("font_name"),
+            config.get("font_color"),
+            config.get("background_color"),
+            config.get("accent_color"),
+        )
+
+    def cache_key(self) -> dict:
+        """Normalized fields (so '#fff' and '#FFFFFF' share a derived template)."""
+        return {
+            "style_version": STYLE_VERSION,
+            "font_name": self.font_name,
+            "font_color": str(self.font_color) if self.font_color is not None else None,
+            "background_color": str(self.background_color) if self.background_color is not None else None,
+            "accent_color": str(self.accent_color) if self.accent_color is not None else None,
+        }
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.font_name is None
+            and self.font_color is None
+            and self.background_color is None
+            and self.accent_color is None
+        )
+
+    # ---------------- Applying ----------------
+
+    def apply_to_deck(self, prs) -> None:
+        """Write the overrides into every master / layout of `prs` (in memory)."""
+        if self.is_empty:
+            return
+
+        masters = list(prs.slide_masters)
+        layouts = [layout for master in masters for layout in master.slide_layouts]
+
+        if self.font_name is not None or self.font_color is not None:
+            default_style = prs.part._element.find(qn("p:defaultTextStyle"))
+            if default_style is not None:
+                self._style_levels(default_style)
+            for master in masters:
+                tx_styles = master._element.find(qn("p:txStyles"))
+                if tx_styles is not None:
+                    for style in tx_styles:  # titleStyle, bodyStyle, otherStyle
+                        self._style_levels(style)
+            # placeholder list styles on masters/layouts can override txStyles
+            for master in masters:
+                self._style_char_props(master._element.find(qn("p:cSld")).iter(qn("a:defRPr")))
+            for layout in layouts:
+                self._style_char_props(layout._element.iter(qn("a:defRPr")))
+
+        if self.background_color is not None:
+            for part in masters + layouts:
+                fill = part.background.fill
+                fill.solid()
+                fill.fore_color.rgb = self.background_color
+
+        if self.accent_color is not None:
+            for master in masters:
+                self._set_accent(master)
+
+    def _style_levels(self, list_style) -> None:
+        """Make sure every lvlNpPr has a defRPr, then style them all."""
+        for lvl in list_style:
+            if lvl.tag not in _LEVELS:
+                continue
+            def_rpr = lvl.find(qn("a:defRPr"))
+            if def_rpr is None:
+                def_rpr = etree.Element(qn("a:defRPr"))
+                ext_lst = lvl.find(qn("a:extLst"))
+                if ext_lst is not None:
+                    ext_lst.addprevious(def_rpr)
+                else:
+                    lvl.append(def_rpr)
+        self._style_char_props(list_style.iter(qn("a:defRPr")))
+
+    def _style_char_props(self, elements: Iterable) -> None:
+        # plain lxml edits: python-pptx's get_or_change_to_* helpers cost
+        # ~100us each and templates carry hundreds of defRPr elements
+        for def_rpr in list(elements):
+            if self._fill is not None:
+                self._set_fill(def_rpr)
+            if self.font_name is not None:
+                self._set_latin(def_rpr)
+
+    def _set_fill(self, def_rpr) -> None:
+        position = 0
+        for child in list(def_rpr):
+            if child.tag in _FILLS:
+                def_rpr.remove(child)
+            elif child.tag == _LN:
+                position = def_rpr.index(child) + 1
+        def_rpr.insert(position, copy.deepcopy(self._fill))
+
+    def _set_latin(self, def_rpr) -> None:
+        latin = def_rpr.find(_LATIN)
+        if latin is None:
+            latin = etree.Element(_LATIN)
+            for child in def_rpr:
+                if child.tag in _AFTER_LATIN:
+                    child.addprevious(latin)
+                    break
+            else:
+                def_rpr.append(latin)
+        latin.set("typeface", self.font_name)
+
+    def _set_accent(self, master) -> None:
+        # the theme is an opaque blob part in python-pptx; edit its XML directly
+        theme_part = master.part.part_related_by(RT.THEME)
+        theme = etree.fromstring(theme_part.blob)
+        accent = theme.find(f".//{qn('a:clrScheme')}/{qn('a:accent1')}")
+        if accent is None:
+            return
+        for child in list(accent):
+            accent.remove(child)
+        etree.SubElement(accent, qn("a:srgbClr"), val=str(self.accent_color))
+        theme_part._blob = etree.tostring(theme, xml_declaration=True, encoding="UTF-8", standalone=True)
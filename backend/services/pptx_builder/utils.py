@@ -1,20 +1,79 @@
-from pptx.dml.color import RGBColor
-
-def set_background(slide, color_hex):
-    if color_hex:
-        fill = slide.background.fill
-        fill.solid()
-        fill.fore_color.rgb = RGBColor.from_string(color_hex.lstrip("#"))
-
-def set_text_style(text_frame, font_name, font_color):
-    for paragraph in text_frame.paragraphs:
-        for run in paragraph.runs:
-            if font_name:
-                run.font.name = font_name
-            if font_color:
-                run.font.color.rgb = RGBColor.from_string(font_color.lstrip("#"))
-
-def set_slide_title_and_style(slide, slide_data, background_color, font_name, font_color):
-    slide.shapes.title.text = slide_data.get("title", "")
-    set_background(slide, background_color)
-    set_text_style(slide.shapes.title.text_frame, font_name, font_color)
\ No newline at end of file
+import logging
+import os
+import re
+from io import BytesIO
+from typing import List, Union
+
+import requests
+
+from core import tracing
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TIMEOUT = 15  # seconds, connect + read
+_IMAGE_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; PPTGenerator/1.0)"}
+
+
+def placeholders_by_idx(slide) -> dict:
+    # one pass over the shape tree; slide.placeholders[idx] and
+    # slide.shapes.title each rescan it (an xpath per shape)
+    return {ph.placeholder_format.idx: ph for ph in slide.placeholders}
+
+
+def placeholder(by_idx: dict, info):
+    """The slide placeholder cloned from layout placeholder `info`, if any."""
+    if info is None:
+        return None
+    return by_idx.get(info.idx)
+
+
+def fill_text_frame(text_frame, paragraphs: List[str]) -> None:
+    """Replace a text frame's content with one paragraph per item."""
+    text_frame.clear()
+    if paragraphs:
+        text_frame.paragraphs[0].text = paragraphs[0]
+        for para in paragraphs[1:]:
+            text_frame.add_paragraph().text = para
+
+
+def set_title(title_shape, text: str) -> None:
+    if title_shape is not None:
+        title_shape.text = text
+
+
+def split_into_paragraphs(text: str, max_sentences_per_para: int = 3) -> List[str]:
+    """Split a long caption into smaller paragraphs (by sentence) for better layout."""
+    if not text:
+        return []
+    parts = [p.strip() for p in text.replace("\n", " ").split(".") if p.strip()]
+    paragraphs = []
+    buf = []
+    for i, p in enumerate(parts):
+        buf.append(p + ".")
+        if (i + 1) % max_sentences_per_para == 0:
+            paragraphs.append(" ".join(buf).strip())
+            buf = []
+    if buf:
+        paragraphs.append(" ".join(buf).strip())
+    return paragraphs
+
+
+def clean_image_url(img_url) -> str:
+    img_url = re.sub(r"\s+", "", str(img_url))
+    return img_url.strip("()[]{}.,;")
+
+
+@tracing.traced("pptx.image_fetch")
+def fetch_image(img_url: str) -> Union[str, BytesIO]:
+    """
+    Local path or an in-memory stream of a downloaded image, ready for
+    shapes.add_picture. Raises if the file is missing or the download fails.
+    """
+    if not img_url.startswith("http"):
+        if not os.path.isfile(img_url):
+            raise RuntimeError(f"Local image not found: {img_url}")
+        return os.path.abspath(img_url)
+
+    resp = requests.get(img_url, headers=_IMAGE_HEADERS, timeout=IMAGE_TIMEOUT)
+    resp.raise_for_status()
+    return BytesIO(resp.content)
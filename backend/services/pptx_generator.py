@@ -1,37 +1,29 @@
 from pptx import Presentation
-from pptx.util import Inches, Pt
+from pptx.exc import PackageNotFoundError
 import os
-import requests
-from io import BytesIO
-from urllib.parse import urlparse
-import re  # for cleaning URLs
+import logging
+import zipfile
+
+from core import tracing
+from core.metrics import instrument_render
+from models.schemas import THEME_IDS
+from services import package_writer, render_cache, template_cache, template_index
+from services.pptx_builder import pruning
+from services.pptx_builder.generator import RenderContext, SlideGenerator
+from services.pptx_builder.styles import DeckStyle
+
+logger = logging.getLogger(__name__)
 
 # Folder where ppt1.pptx ... ppt5.pptx live
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "ppt_templates")
 
-# Map theme IDs to actual template files
+# Map theme IDs to actual template files (the IDs ConfigurationUpdate accepts)
 TEMPLATE_MAP = {
-  "ppt1": os.path.join(TEMPLATE_DIR, "ppt1.pptx"),
-  "ppt2": os.path.join(TEMPLATE_DIR, "ppt2.pptx"),
-  "ppt3": os.path.join(TEMPLATE_DIR, "ppt3.pptx"),
-  "ppt4": os.path.join(TEMPLATE_DIR, "ppt4.pptx"),
-  "ppt5": os.path.join(TEMPLATE_DIR, "ppt5.pptx"),
-  "ppt6": os.path.join(TEMPLATE_DIR, "ppt6.pptx"),
-  "ppt7": os.path.join(TEMPLATE_DIR, "ppt7.pptx"),
-  "ppt8": os.path.join(TEMPLATE_DIR, "ppt8.pptx"),
-  "ppt9": os.path.join(TEMPLATE_DIR, "ppt9.pptx"),
+  theme_id: os.path.join(TEMPLATE_DIR, f"{theme_id}.pptx") for theme_id in THEME_IDS
 }
 
 
 
-def _get_layout(prs: Presentation, index: int, fallback: int = 0):
-    """Safely get a slide layout by index with fallback."""
-    try:
-        return prs.slide_layouts[index]
-    except IndexError:
-        return prs.slide_layouts[fallback]
-
-
 def _remove_all_slides(prs: Presentation):
     """Remove all existing slides from a Presentation (keep theme)."""
     slide_ids = list(prs.slides._sldIdLst)  # internal list of slide IDs
@@ -41,232 +33,189 @@ def _remove_all_slides(prs: Presentation):
         prs.slides._sldIdLst.remove(slide_id)
 
 
-def _split_into_paragraphs(text: str, max_sentences_per_para: int = 3):
-    """Split a long caption into smaller paragraphs (by sentence) for better layout."""
-    if not text:
-        return []
-    parts = [p.strip() for p in text.replace("\n", " ").split(".") if p.strip()]
-    paragraphs = []
-    buf = []
-    for i, p in enumerate(parts):
-        buf.append(p + ".")
-        if (i + 1) % max_sentences_per_para == 0:
-            paragraphs.append(" ".join(buf).strip())
-            buf = []
-    if buf:
-        paragraphs.append(" ".join(buf).strip())
-    return paragraphs
-
-
-def _get_tmp_image_path(img_url: str, presentation_id: int, slide_index: int) -> str:
-    """
-    Download image from a URL (or use local path) and return a temp file path.
-    Raises if download fails.
-    """
-    os.makedirs("storage", exist_ok=True)
+# Bump when slide rendering changes so cached slide parts are rebuilt.
+RENDERER_VERSION = 5
 
-    # Local path
-    if not img_url.startswith("http"):
-        if not os.path.isfile(img_url):
-            raise RuntimeError(f"Local image not found: {img_url}")
-        return os.path.abspath(img_url)
+# strategy registry shared by every render (strategies are stateless)
+_generator = SlideGenerator()
 
-    # Remote URL
-    headers = {"User-Agent": "Mozilla/5.0 (compatible; PPTGenerator/1.0)"}
-    resp = requests.get(img_url, headers=headers, timeout=15)
-    resp.raise_for_status()
 
-    parsed = urlparse(img_url)
-    path = parsed.path or ""
-    ext = os.path.splitext(path)[1] or ".jpg"
+def _deck_key(theme_id: str, template_path: str | None, config: dict) -> str:
+    """Everything besides slide content that affects how every slide renders."""
+    template_mtime = (
+        os.path.getmtime(template_path)
+        if template_path and os.path.exists(template_path)
+        else None
+    )
+    return render_cache.content_hash(
+        {
+            "renderer": RENDERER_VERSION,
+            "theme_id": theme_id,
+            "template_mtime": template_mtime,
+            "config": config or {},
+        }
+    )
 
-    tmp_path = os.path.abspath(f"./storage/tmp_img_{presentation_id}_{slide_index}{ext}")
-    with open(tmp_path, "wb") as f:
-        f.write(resp.content)
 
-    return tmp_path
+def output_path(presentation_id: int) -> str:
+    """Where build_pptx writes a deck (its manifest sits next to it)."""
+    return os.path.abspath(f"./storage/presentation_{presentation_id}.pptx")
 
 
-def build_pptx(presentation_id: int, slides: list, config: dict, **kwargs) -> str:
+def render_key(config: dict) -> str:
+    """Deck key for a presentation's config: changes whenever the same slides would render differently."""
+    theme_id = (config or {}).get("theme_id") or "ppt1"
+    return _deck_key(theme_id, TEMPLATE_MAP.get(theme_id), config)
+
+
+def _load_template(theme_id: str, template_path: str | None, config: dict) -> Presentation:
+    """
+    Fresh deck from the theme template, with config styling applied to its
+    masters and unused template parts pruned. Decks on a known theme open a
+    cached prepared template (see services/template_cache.py), so restyling
+    and pruning happen once per style; any other theme id (only in configs
+    stored before ids were validated) gets the default template, prepared
+    in memory.
+    """
+    with tracing.span("pptx.load_template", theme_id=theme_id) as current:
+        style = DeckStyle.from_config(config)
+        derived = None
+        if template_path is not None:
+            derived = template_cache.derived_template(theme_id, template_path, style, _remove_all_slides)
+        if derived is not None:
+            try:
+                prs = Presentation(derived)
+                current.set(derived=True)
+                return prs
+            except (OSError, zipfile.BadZipFile, PackageNotFoundError) as e:
+                # evicted or damaged between lookup and open; prepare in memory
+                logger.warning("Derived template %s unusable: %s", derived, e)
+
+        if template_path and os.path.exists(template_path):
+            prs = Presentation(template_path)
+            _remove_all_slides(prs)
+        else:
+            prs = Presentation()
+        style.apply_to_deck(prs)
+        pruning.prune_template(prs)
+    return prs
+
+
+def _context(prs: Presentation, template_path: str | None, presentation_id: int) -> RenderContext:
+    return RenderContext(prs, template_index.get_index(prs, template_path), presentation_id)
+
+
+def _reuse_previous_render(
+    ctx: RenderContext,
+    old_hashes: list,
+    slides: list,
+    new_hashes: list,
+) -> Presentation:
+    """
+    In the previously rendered deck (ctx.prs), keep every slide part whose
+    content hash is unchanged and only render the slides that are new or
+    edited. Unused old slides are dropped; the slide list is then put in
+    the new order.
+    """
+    prs = ctx.prs
+    sld_id_lst = prs.slides._sldIdLst
+
+    # hash -> old slide id elements with that content (FIFO for duplicates)
+    pool: dict = {}
+    for sld_id, h in zip(list(sld_id_lst), old_hashes):
+        pool.setdefault(h, []).append(sld_id)
+
+    ordered = []
+    rendered = 0
+    for slide_data, h in zip(slides, new_hashes):
+        reusable = pool.get(h)
+        if reusable:
+            ordered.append(reusable.pop(0))
+            continue
+        _generator.add_slide(ctx, slide_data)
+        ordered.append(sld_id_lst[-1])
+        rendered += 1
+
+    keep = {id(el) for el in ordered}
+    for sld_id in list(sld_id_lst):
+        sld_id_lst.remove(sld_id)
+        if id(sld_id) not in keep:
+            prs.part.drop_rel(sld_id.rId)
+    for sld_id in ordered:
+        sld_id_lst.append(sld_id)
+
+    # new slides were named after the old slide count; renumber all parts
+    # (slide1.xml, slide2.xml, ...) so no two parts share a name
+    prs.part.rename_slide_parts([sld_id.rId for sld_id in ordered])
+
+    tracing_span = tracing.current_span()
+    if tracing_span is not None:
+        tracing_span.set(reused=len(ordered) - rendered, rendered=rendered)
+    return prs
+
+
+@instrument_render("pptx")
+def build_pptx(presentation_id: int, slides: list, config: dict, profile: str | None = None) -> str:
     """
     Build a PPTX using one of the PowerPoint templates in services/ppt_templates.
 
     slides: list of dicts like:
       { "layout": "title"|"bullet"|"two_column"|"image", ... }
 
-    config: dict containing styling:
-      { "theme_id": "ppt1" | ... "ppt5" | None, ... }
+    config: dict containing styling (see ConfigurationUpdate):
+      { "theme_id": "ppt1" | ... "ppt9" | None,
+        "font_name", "font_color", "background_color": optional overrides }
+
+    Each slide is rendered by the strategy registered for its layout in
+    services/pptx_builder.
+
+    profile: output profile for the saved zip ("default" | "fast" | "small",
+      None = Config.OUTPUT_PROFILE; see services/package_writer.py).
+
+    Renders are incremental: the file's manifest records a hash per slide,
+    so after editing one slide only that slide is rebuilt (and an unchanged
+    deck is not rebuilt at all). Switching the output profile rebuilds in full.
     """
 
     # 1) Choose template
     theme_id = (config or {}).get("theme_id") or "ppt1"
     template_path = TEMPLATE_MAP.get(theme_id)
 
-    if template_path and os.path.exists(template_path):
-        prs = Presentation(template_path)
-        _remove_all_slides(prs)
-    else:
-        prs = Presentation()
+    os.makedirs("storage", exist_ok=True)
+    path = output_path(presentation_id)
+
+    profile = package_writer.resolve_profile(profile)
+    deck_key = _deck_key(theme_id, template_path, config)
+    slide_hashes = [render_cache.content_hash(s) for s in slides]
+    manifest = render_cache.read_manifest(path)
+    # the saved parts are only a valid base for the same profile: "small"
+    # re-encodes and downscales media, which a later default build must not keep
+    reusable = (
+        manifest is not None
+        and manifest.get("deck_key") == deck_key
+        and manifest.get("profile") == profile
+    )
+
+    if reusable and manifest.get("slides") == slide_hashes:
+        return path
 
     # 2) Build slides
-    for slide_data in slides:
-        layout_type = slide_data.get("layout", "title")
-        title_text = slide_data.get("title", "")
-
-        if layout_type == "title":
-            layout = _get_layout(prs, 0)
-            slide = prs.slides.add_slide(layout)
-            if slide.shapes.title:
-                slide.shapes.title.text = title_text or "Title"
-
-        elif layout_type == "bullet":
-            layout = _get_layout(prs, 1, fallback=0)
-            slide = prs.slides.add_slide(layout)
-
-            if slide.shapes.title:
-                slide.shapes.title.text = title_text or ""
-
-            body_placeholder = None
-            for shp in slide.placeholders:
-                if (
-                    getattr(shp, "is_placeholder", False)
-                    and getattr(shp, "placeholder_format", None)
-                    and shp.placeholder_format.type not in (1,)
-                ):
-                    body_placeholder = shp
-                    break
-
-            bullets = slide_data.get("bullets", []) or []
-
-            if body_placeholder is not None:
-                tf = body_placeholder.text_frame
-                tf.clear()
-                for i, bullet in enumerate(bullets):
-                    if i == 0:
-                        p = tf.paragraphs[0]
-                        p.text = bullet
-                    else:
-                        p = tf.add_paragraph()
-                        p.text = bullet
-
-        elif layout_type == "two_column":
-            layout = _get_layout(prs, 3, fallback=1)
-            slide = prs.slides.add_slide(layout)
-
-            if slide.shapes.title:
-                slide.shapes.title.text = title_text or ""
-
-            left_text = slide_data.get("left", "")
-            right_text = slide_data.get("right", "")
-
-            content_placeholders = [
-                shp
-                for shp in slide.placeholders
-                if getattr(shp, "is_placeholder", False)
-                and getattr(shp, "placeholder_format", None)
-                and shp.placeholder_format.type not in (1,)
-            ]
-
-            if len(content_placeholders) >= 1:
-                left_tf = content_placeholders[0].text_frame
-                left_tf.clear()
-                left_tf.paragraphs[0].text = left_text
-
-            if len(content_placeholders) >= 2:
-                right_tf = content_placeholders[1].text_frame
-                right_tf.clear()
-                right_tf.paragraphs[0].text = right_text
-
-        elif layout_type == "image":
-            layout = _get_layout(prs, 3, fallback=1)  # two-content
-            slide_index = len(prs.slides)
-            slide = prs.slides.add_slide(layout)
-
-            if slide.shapes.title:
-                slide.shapes.title.text = title_text or ""
-
-            content_placeholders = [
-                shp
-                for shp in slide.placeholders
-                if getattr(shp, "is_placeholder", False)
-                and getattr(shp, "placeholder_format", None)
-                and shp.placeholder_format.type not in (1,)
-            ]
-            img_placeholder = content_placeholders[0] if len(content_placeholders) >= 1 else None
-            text_placeholder = content_placeholders[1] if len(content_placeholders) >= 2 else None
-
-            img_url = slide_data.get("image_url")
-            caption = slide_data.get("caption") or slide_data.get("description") or ""
-
-            if img_url:
-                img_url = re.sub(r"\s+", "", str(img_url))
-                img_url = img_url.strip("()[]{}.,;")
-
-            text_to_use = caption or title_text or ""
-
-            # IMAGE
-            if img_url:
-                try:
-                    tmp_path = _get_tmp_image_path(img_url, presentation_id, slide_index)
-
-                    if img_placeholder is not None:
-                        left = img_placeholder.left
-                        top = img_placeholder.top
-                        width = img_placeholder.width
-                        height = img_placeholder.height
-
-                        slide.shapes.add_picture(tmp_path, left, top, width=width, height=height)
-                        try:
-                            img_placeholder.text = ""
-                        except Exception:
-                            pass
-                    else:
-                        left = int(prs.slide_width * 0.08)
-                        top = int(prs.slide_height * 0.25)
-                        width = int(prs.slide_width * 0.4)
-                        slide.shapes.add_picture(tmp_path, left, top, width=width)
-
-                except Exception as e:
-                    text_to_use = f"{caption or title_text or ''}\n\n(Image failed to load: {img_url})"
-                    print("Image download/insert failed:", e)
-
-            # TEXT
-            paragraphs = _split_into_paragraphs(text_to_use, max_sentences_per_para=2)
-
-            if text_placeholder is not None:
-                tf = text_placeholder.text_frame
-                tf.clear()
-                if paragraphs:
-                    tf.paragraphs[0].text = paragraphs[0]
-                    for para in paragraphs[1:]:
-                        p = tf.add_paragraph()
-                        p.text = para
-                else:
-                    tf.paragraphs[0].text = text_to_use
-            else:
-                left = int(prs.slide_width * 0.55)
-                top = int(prs.slide_height * 0.25)
-                width = int(prs.slide_width * 0.35)
-                height = int(prs.slide_height * 0.5)
-                caption_box = slide.shapes.add_textbox(left, top, width, height)
-                tf = caption_box.text_frame
-                tf.clear()
-                if paragraphs:
-                    tf.paragraphs[0].text = paragraphs[0]
-                    for para in paragraphs[1:]:
-                        p = tf.add_paragraph()
-                        p.text = para
-                else:
-                    tf.paragraphs[0].text = text_to_use
-
+    with tracing.span("pptx.build_slides", slides=len(slides), incremental=reusable):
+        if reusable:
+            # same deck key: the saved masters already carry the config styling
+            ctx = _context(Presentation(path), template_path, presentation_id)
+            prs = _reuse_previous_render(ctx, manifest.get("slides") or [], slides, slide_hashes)
         else:
-            layout = _get_layout(prs, 0)
-            slide = prs.slides.add_slide(layout)
-            if slide.shapes.title:
-                slide.shapes.title.text = title_text or "Slide"
+            prs = _load_template(theme_id, template_path, config)
+            ctx = _context(prs, template_path, presentation_id)
+            for slide_data in slides:
+                _generator.add_slide(ctx, slide_data)
 
     # 3) Save
-    os.makedirs("storage", exist_ok=True)
-    path = os.path.abspath(f"./storage/presentation_{presentation_id}.pptx")
-    prs.save(path)
+    with tracing.span("pptx.save"):
+        render_cache.write_rendered(
+            path,
+            lambda tmp: package_writer.save_presentation(prs, tmp, profile),
+            {"deck_key": deck_key, "slides": slide_hashes, "profile": profile},
+        )
     return path
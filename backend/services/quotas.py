@@ -0,0 +1,272 @@
+# backend/services/quotas.py
+
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import UserUsage
+
+# Per-user limits on the paid generation routes (each one a Gemini call):
+#
+#   concurrent   generations in flight at once  (QUOTA_MAX_CONCURRENT)
+#   per minute   generation requests in the last 60 s  (QUOTA_REQUESTS_PER_MINUTE)
+#   daily tokens Gemini prompt + completion tokens per UTC day  (QUOTA_DAILY_TOKENS)
+#
+# 0 disables a limit. Checks are in memory. With a daily budget set, a
+# user's totals are read from `user_usage` once per day per worker, and each
+# finished request adds its request + tokens there in one statement and
+# reads back the totals, so the budget is shared by every worker on the
+# database. The concurrency and per-minute windows are per worker.
+#
+# routers/auth_bridge.get_generation_user admits the request, makes the
+# ticket current (content_generator charges Gemini usage to it) and sends
+# the remaining quota as X-RateLimit-* / X-Quota-* headers.
+
+WINDOW_SECONDS = 60
+# idle accounts beyond this many are dropped (reloaded from the DB on next use)
+_MAX_ACCOUNTS = 10_000
+
+_current: ContextVar[Optional["Ticket"]] = ContextVar("quota_ticket", default=None)
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, limit: str, retry_after: int, headers: Dict[str, str]):
+        super().__init__(limit)
+        self.limit = limit
+        self.retry_after = retry_after
+        self.headers = headers
+
+
+class _Account:
+    __slots__ = ("day", "requests", "tokens", "pending_tokens", "in_flight", "recent")
+
+    def __init__(self, day: str, requests: int, tokens: int):
+        self.day = day
+        self.requests = requests
+        self.tokens = tokens
+        self.pending_tokens = 0  # charged in memory, not yet written
+        self.in_flight = 0
+        self.recent: Deque[float] = deque()  # request times in the last window
+
+
+class Ticket:
+    """One admitted request: charge() Gemini tokens to it, release() when done."""
+
+    def __init__(self, manager: "QuotaManager", user_id: int, day: str, headers: Dict[str, str]):
+        self.manager = manager
+        self.user_id = user_id
+        self.day = day
+        self.headers = headers
+        self.tokens = 0
+        self._released = False
+
+    def charge(self, tokens: int) -> None:
+        if tokens > 0:
+            self.manager._charge(self, tokens)
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.manager._release(self)
+
+
+class QuotaManager:
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        daily_tokens: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+        session_factory=SessionLocal,
+    ):
+        self.max_concurrent = Config.QUOTA_MAX_CONCURRENT if max_concurrent is None else max_concurrent
+        self.requests_per_minute = (
+            Config.QUOTA_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        )
+        self.daily_tokens = Config.QUOTA_DAILY_TOKENS if daily_tokens is None else daily_tokens
+        self.clock = clock
+        self.session_factory = session_factory
+        self._accounts: Dict[int, _Account] = {}
+        self._lock = threading.Lock()
+
+    # ---------------- admission ----------------
+
+    def acquire(self, user_id: int) -> Ticket:
+        """Admit one generation for `user_id` or raise QuotaExceeded (never waits)."""
+        now = self.clock()
+        day, day_ends_in = _utc_day(now)
+        account = self._account(user_id, day)
+
+        with self._lock:
+            recent = account.recent
+            while recent and recent[0] <= now - WINDOW_SECONDS:
+                recent.popleft()
+
+            exceeded = None
+            if self.max_concurrent and account.in_flight >= self.max_concurrent:
+                exceeded = ("concurrent generations", 1)
+            elif self.requests_per_minute and len(recent) >= self.requests_per_minute:
+                exceeded = ("requests per minute", math.ceil(recent[0] + WINDOW_SECONDS - now))
+            elif self.daily_tokens and account.tokens >= self.daily_tokens:
+                exceeded = ("daily token budget", day_ends_in)
+            if exceeded:
+                limit, retry_after = exceeded
+                raise QuotaExceeded(limit, max(retry_after, 1), self._headers(account, now, day_ends_in))
+
+            account.in_flight += 1
+            recent.append(now)
+            account.requests += 1
+            headers = self._headers(account, now, day_ends_in)
+        return Ticket(self, user_id, day, headers)
+
+    def _headers(self, account: _Account, now: float, day_ends_in: int) -> Dict[str, str]:
+        """Remaining quota once the current request (if admitted) is counted."""
+        headers = {}
+        if self.requests_per_minute:
+            reset = math.ceil(account.recent[0] + WINDOW_SECONDS - now) if account.recent else 0
+            headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+            headers["X-RateLimit-Remaining"] = str(max(self.requests_per_minute - len(account.recent), 0))
+            headers["X-RateLimit-Reset"] = str(max(reset, 0))
+        if self.max_concurrent:
+            headers["X-Quota-Concurrent-Limit"] = str(self.max_concurrent)
+            headers["X-Quota-Concurrent-Remaining"] = str(max(self.max_concurrent - account.in_flight, 0))
+        if self.daily_tokens:
+            headers["X-Quota-Tokens-Limit"] = str(self.daily_tokens)
+            headers["X-Quota-Tokens-Remaining"] = str(max(self.daily_tokens - account.tokens, 0))
+            headers["X-Quota-Tokens-Reset"] = str(day_ends_in)
+        return headers
+
+    def _account(self, user_id: int, day: str) -> _Account:
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is not None and account.day == day:
+                return account
+        # first request of the day on this worker: totals from the DB
+        requests, tokens = self._load(user_id, day) if self.daily_tokens else (0, 0)
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None or account.day != day:
+                fresh = _Account(day, requests, tokens)
+                if account is not None:  # day rolled over mid-flight
+                    fresh.in_flight = account.in_flight
+                    fresh.recent = account.recent
+                self._accounts[user_id] = account = fresh
+                self._prune(keep=user_id)
+            return account
+
+    def _prune(self, keep: int) -> None:
+        if len(self._accounts) <= _MAX_ACCOUNTS:
+            return
+        for user_id, account in list(self._accounts.items()):
+            if user_id != keep and account.in_flight == 0 and account.pending_tokens == 0:
+                del self._accounts[user_id]
+                if len(self._accounts) <= _MAX_ACCOUNTS // 2:
+                    break
+
+    # ---------------- usage ----------------
+
+    def _charge(self, ticket: Ticket, tokens: int) -> None:
+        with self._lock:
+            ticket.tokens += tokens
+            account = self._accounts.get(ticket.user_id)
+            if account is not None and account.day == ticket.day:
+                account.tokens += tokens
+                account.pending_tokens += tokens
+
+    def _release(self, ticket: Ticket) -> None:
+        # usage is only kept for the daily budget; no budget, no DB work
+        totals = self._add_usage(ticket.user_id, ticket.day, 1, ticket.tokens) if self.daily_tokens else None
+        with self._lock:
+            account = self._accounts.get(ticket.user_id)
+            if account is None:
+                return
+            account.in_flight = max(account.in_flight - 1, 0)
+            if account.day != ticket.day:
+                return
+            account.pending_tokens -= ticket.tokens
+            if totals is not None:
+                # other workers' usage too, plus what this one hasn't written yet
+                account.requests, db_tokens = totals
+                account.tokens = db_tokens + account.pending_tokens
+
+    def _load(self, user_id: int, day: str) -> Tuple[int, int]:
+        db = self.session_factory()
+        try:
+            row = db.execute(
+                select(UserUsage.requests, UserUsage.tokens).where(
+                    UserUsage.user_id == user_id, UserUsage.day == day
+                )
+            ).first()
+        finally:
+            db.close()
+        return (row.requests, row.tokens) if row else (0, 0)
+
+    def _add_usage(self, user_id: int, day: str, requests: int, tokens: int) -> Optional[Tuple[int, int]]:
+        """Add to the user's row for `day` and return its (requests, tokens)."""
+        db = self.session_factory()
+        try:
+            where = (UserUsage.user_id == user_id, UserUsage.day == day)
+            bump = (
+                update(UserUsage)
+                .where(*where)
+                .values(requests=UserUsage.requests + requests, tokens=UserUsage.tokens + tokens)
+            )
+            if db.execute(bump).rowcount == 0:
+                try:
+                    with db.begin_nested():
+                        db.add(UserUsage(user_id=user_id, day=day, requests=requests, tokens=tokens))
+                except IntegrityError:  # another worker inserted it first
+                    db.execute(bump)
+            db.commit()
+            row = db.execute(select(UserUsage.requests, UserUsage.tokens).where(*where)).first()
+        finally:
+            db.close()
+        return (row.requests, row.tokens) if row else None
+
+
+def _utc_day(now: float) -> Tuple[str, int]:
+    """("YYYY-MM-DD", seconds until that UTC day ends)."""
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    midnight = datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return moment.date().isoformat(), math.ceil((midnight - moment).total_seconds())
+
+
+_manager: Optional[QuotaManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> QuotaManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = QuotaManager()
+    return _manager
+
+
+def set_manager(manager: Optional[QuotaManager]) -> None:
+    """Replace the manager (e.g. one with a fake clock); None = back to config."""
+    global _manager
+    with _manager_lock:
+        _manager = manager
+
+
+def activate(ticket: Ticket) -> None:
+    """Make `ticket` the one Gemini usage in this request is charged to."""
+    _current.set(ticket)
+
+
+def charge_current(tokens: int) -> None:
+    """Charge Gemini tokens to the current request's ticket, if any."""
+    ticket = _current.get()
+    if ticket is not None:
+        ticket.charge(tokens)
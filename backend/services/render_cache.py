@@ -0,0 +1,155 @@
+# backend/services/render_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: renders are only serialized within a process
+    fcntl = None
+
+# Rendered files get a sidecar "<file>.manifest.json" describing what they
+# were built from (content hashes per slide/section + a deck-level key),
+# so the next render can tell which parts are still valid. Downloads don't
+# trust it for their ETag: services/artifacts.publish hashes the file it
+# publishes, so Range/If-Range never splices two builds together.
+#
+# File and manifest are two separate replaces, so a crash or a concurrent
+# build of the same file can leave a manifest next to bytes it doesn't
+# describe. The manifest therefore also records the file's stat stamp
+# (inode, size, mtime; a rename keeps all three) taken before the file was
+# moved into place, and read_manifest ignores a manifest whose stamp doesn't
+# match the file: that render is then simply rebuilt in full.
+#
+# A download renders into the shared file and then publishes it; render_lock
+# keeps another render of the same file (another profile, a newer version)
+# from landing in between. Threads take turns on a lock, worker processes on
+# this host on a byte-range lock in the directory's .render.lock. Paths hash
+# to one of _LOCK_SLOTS slots; a collision only makes two renders take turns.
+
+_LOCK_SLOTS = 256
+_slot_locks = [threading.Lock() for _ in range(_LOCK_SLOTS)]
+_lock_fds: Dict[str, int] = {}
+_lock_fds_lock = threading.Lock()
+
+
+def content_hash(obj: Any) -> str:
+    """Stable hash of any JSON-able value (dict key order doesn't matter)."""
+    raw = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def manifest_path(path: str) -> str:
+    return f"{path}.manifest.json"
+
+
+def _stamp(st: os.stat_result) -> list:
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def read_manifest(path: str) -> Optional[dict]:
+    """
+    Manifest of a rendered file, or None if either is missing/unreadable or
+    the manifest was written for other bytes than the ones now at `path`.
+    """
+    try:
+        st = os.stat(path)
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("stamp") != _stamp(st):
+        return None
+    return data
+
+
+def write_rendered(path: str, write: Callable[[str], None], data: dict) -> None:
+    """
+    atomic_write the rendered file via write(tmp_path), then its manifest
+    (`data` plus the stat stamp of the written file, taken before it
+    replaces `path`).
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        data = {**data, "stamp": _stamp(os.stat(tmp))}
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    atomic_write(manifest_path(path), lambda manifest_tmp: _dump_json(manifest_tmp, data))
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dump_json(tmp: str, data: dict) -> None:
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def atomic_write(path: str, write: Callable[[str], None]) -> None:
+    """
+    Call write(tmp_path) then move the result over `path`, so concurrent
+    readers never see a half-written file.
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _lock_fd(directory: str) -> int:
+    with _lock_fds_lock:
+        fd = _lock_fds.get(directory)
+        if fd is None:
+            os.makedirs(directory, exist_ok=True)
+            # kept open: closing any fd of the file would drop this process's locks
+            fd = os.open(os.path.join(directory, ".render.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            _lock_fds[directory] = fd
+        return fd
+
+
+@contextmanager
+def render_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold while rendering `path` and reading the result back (see the top of
+    this module). With blocking=False it yields False at once, without the
+    lock, when a render of `path` holds it (storage GC skips that file).
+    """
+    path = os.path.abspath(path)
+    slot = int(hashlib.sha1(path.encode("utf-8")).hexdigest()[:8], 16) % _LOCK_SLOTS
+    if not _slot_locks[slot].acquire(blocking):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        fd = _lock_fd(os.path.dirname(path))
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, 1, slot)
+        except (BlockingIOError, PermissionError):  # non-blocking and held by another process
+            locked = False
+        else:
+            locked = True
+        try:
+            yield locked
+        finally:
+            if locked:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, slot)
+    finally:
+        _slot_locks[slot].release()
@@ -0,0 +1,224 @@
+# backend/services/search_index.py
+
+import re
+from typing import Any, Dict, List
+
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.orm import Session
+
+from models import models
+
+# One FTS5 row per presentation / Word project. The rowid encodes
+# (kind, id) so re-indexing an item is a point delete + insert, and
+# `owner_tag` ("u<id>") lets every MATCH be scoped to one user's rows.
+KIND_PRESENTATION = 0
+KIND_PROJECT = 1
+
+_CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    title,
+    body,
+    owner_tag,
+    kind UNINDEXED,
+    item_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# bm25 weights per column (title, body, owner_tag) stored as the table's
+# default rank, so `ORDER BY rank LIMIT n` is sorted inside FTS5 and
+# snippets are only built for the rows actually returned. Only written when
+# it changed: a config write makes the next ranked query on every other
+# open connection fail once ("SQL logic error"), i.e. on other workers.
+_RANK = "bm25(4.0, 1.0, 0.0)"
+_RANK_SQL = "INSERT INTO search_index(search_index, rank) VALUES('rank', :rank)"
+_RANK_CONFIG_SQL = "SELECT v FROM search_index_config WHERE k = 'rank'"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _rowid(kind: int, item_id: int) -> int:
+    return item_id * 2 + kind
+
+
+def is_supported(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine) -> None:
+    """Create the FTS table if needed; fill it from existing rows the first time."""
+    if not is_supported(engine):
+        return
+    created = not inspect(engine).has_table("search_index")
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE_SQL))
+        if conn.execute(text(_RANK_CONFIG_SQL)).scalar() != _RANK:
+            conn.execute(text(_RANK_SQL), {"rank": _RANK})
+    if created:
+        with Session(engine) as db:
+            rebuild(db)
+            db.commit()
+
+
+# ---------------- Text extraction ----------------
+
+def _slide_text(slide: Any) -> List[str]:
+    if isinstance(slide, str):
+        return [slide]
+    if not isinstance(slide, dict):
+        return []
+    parts: List[str] = []
+    for key in ("title", "left", "right", "caption", "description", "content", "text"):
+        val = slide.get(key)
+        if isinstance(val, str):
+            parts.append(val)
+    bullets = slide.get("bullets")
+    if isinstance(bullets, list):
+        parts.extend(str(b) for b in bullets)
+    return parts
+
+
+def _write_row(db: Session, kind: int, item_id: int, owner_id: int, title: str, body: str) -> None:
+    rowid = _rowid(kind, item_id)
+    db.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": rowid})
+    db.execute(
+        text(
+            "INSERT INTO search_index (rowid, title, body, owner_tag, kind, item_id) "
+            "VALUES (:rowid, :title, :body, :owner_tag, :kind, :item_id)"
+        ),
+        {
+            "rowid": rowid,
+            "title": title or "",
+            "body": body or "",
+            "owner_tag": f"u{owner_id}",
+            "kind": kind,
+            "item_id": item_id,
+        },
+    )
+
+
+# ---------------- Write paths ----------------
+
+def index_presentation(db: Session, presentation: models.Presentation) -> None:
+    """(Re)index a presentation's topic and all slide text."""
+    if not is_supported(db.get_bind()):
+        return
+    db.flush()
+    db.expire(presentation, ["slides"])
+    body: List[str] = []
+    for slide in presentation.content or []:
+        body.extend(_slide_text(slide))
+    _write_row(
+        db,
+        KIND_PRESENTATION,
+        presentation.presentation_id,
+        presentation.owner_id,
+        presentation.topic or "",
+        "\n".join(body),
+    )
+
+
+def index_project(db: Session, project_id: int) -> None:
+    """(Re)index a Word project's title/topic and all section titles and content."""
+    if not is_supported(db.get_bind()):
+        return
+    db.flush()
+    project = db.get(models.Project, project_id)
+    if project is None:
+        return
+    rows = (
+        db.query(models.Section.title, models.Section.content)
+        .filter(models.Section.project_id == project_id)
+        .order_by(models.Section.order_index)
+        .all()
+    )
+    body = [project.topic or ""]
+    for title, content in rows:
+        body.append(title or "")
+        body.append(content or "")
+    _write_row(db, KIND_PROJECT, project.id, project.owner_id, project.title or "", "\n".join(body))
+
+
+def rebuild(db: Session) -> None:
+    """Re-index every presentation and project (first start / repair)."""
+    db.execute(text("DELETE FROM search_index"))
+    for presentation in db.query(models.Presentation).all():
+        index_presentation(db, presentation)
+    for (project_id,) in db.query(models.Project.id).all():
+        index_project(db, project_id)
+
+
+# ---------------- Query ----------------
+
+def _match_expression(query: str, owner_id: int) -> str:
+    # quote every token so user input can never be parsed as FTS syntax;
+    # the trailing * makes the last word a prefix match while typing
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return ""
+    terms = " ".join(f'"{t}"' for t in tokens[:-1])
+    terms = f'{terms} "{tokens[-1]}"*'.strip()
+    return f'owner_tag : "u{owner_id}" AND {{title body}} : ({terms})'
+
+
+def search(db: Session, owner_id: int, query: str, limit: int, offset: int) -> Dict[str, Any]:
+    """
+    Ranked full-text search over one user's presentations and Word projects.
+
+    Fetches one extra row to report `has_more` without a COUNT query.
+    """
+    if not is_supported(db.get_bind()):
+        return _search_fallback(db, owner_id, query, limit, offset)
+
+    match = _match_expression(query, owner_id)
+    if not match:
+        return {"items": [], "has_more": False}
+
+    rows = db.execute(
+        text(
+            "SELECT kind, item_id, title, "
+            "snippet(search_index, 1, '[', ']', '…', 12) AS snippet, rank "
+            "FROM search_index WHERE search_index MATCH :match "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit + 1, "offset": offset},
+    ).all()
+
+    items = [
+        {
+            "type": "pptx" if row.kind == KIND_PRESENTATION else "docx",
+            "id": row.item_id,
+            "title": row.title,
+            "snippet": row.snippet,
+            "score": -row.rank,
+        }
+        for row in rows[:limit]
+    ]
+    return {"items": items, "has_more": len(rows) > limit}
+
+
+def _search_fallback(db: Session, owner_id: int, query: str, limit: int, offset: int) -> Dict[str, Any]:
+    """Title-only LIKE search for databases without FTS5."""
+    pattern = f"%{(query or '').strip()}%"
+    presentations = (
+        db.query(models.Presentation.presentation_id, models.Presentation.topic)
+        .filter(models.Presentation.owner_id == owner_id, models.Presentation.topic.ilike(pattern))
+        .all()
+    )
+    projects = (
+        db.query(models.Project.id, models.Project.title)
+        .filter(
+            models.Project.owner_id == owner_id,
+            or_(models.Project.title.ilike(pattern), models.Project.topic.ilike(pattern)),
+        )
+        .all()
+    )
+    items = [
+        {"type": "pptx", "id": pid, "title": topic, "snippet": topic, "score": 0.0}
+        for pid, topic in presentations
+    ] + [
+        {"type": "docx", "id": pid, "title": title, "snippet": title, "score": 0.0}
+        for pid, title in projects
+    ]
+    return {"items": items[offset:offset + limit], "has_more": len(items) > offset + limit}
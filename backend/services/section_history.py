@@ -0,0 +1,250 @@
+# backend/services/section_history.py
+
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, List, Optional
+
+from sqlalchemy import exists, func, insert, literal, select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import Section, SectionRevision
+
+# Store a full copy every N versions so rebuilding any version never has
+# to replay more than N - 1 deltas.
+SNAPSHOT_EVERY = 10
+
+INITIAL_PROMPT = "initial generation"
+
+# Tries at taking the next version number when concurrent refines of the
+# same section race for it.
+VERSION_ATTEMPTS = 3
+
+
+# ---------------- Line deltas ----------------
+#
+# A delta is a compact JSON list applied to the previous version's lines:
+#   positive int  -> copy that many lines from the previous version
+#   negative int  -> skip that many lines of the previous version
+#   list[str]     -> insert these lines
+
+
+def _lines(text: str) -> List[str]:
+    return (text or "").split("\n")
+
+
+def make_delta(old: str, new: str) -> List[Any]:
+    old_lines, new_lines = _lines(old), _lines(new)
+    ops: List[Any] = []
+    matcher = SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(-(i2 - i1))
+        if j2 > j1:
+            ops.append(new_lines[j1:j2])
+    return ops
+
+
+def apply_delta(old: str, delta: List[Any]) -> str:
+    old_lines = _lines(old)
+    out: List[str] = []
+    pos = 0
+    for op in delta:
+        if isinstance(op, list):
+            out.extend(op)
+        elif op >= 0:
+            out.extend(old_lines[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return "\n".join(out)
+
+
+# ---------------- Writing ----------------
+
+def _latest_version(db: Session, section_id: int) -> int:
+    return db.scalar(
+        select(func.max(SectionRevision.version)).where(
+            SectionRevision.section_id == section_id
+        )
+    ) or 0
+
+
+def add_initial_revisions(db: Session, project_id: int) -> None:
+    """
+    Record version 1 (a snapshot of the current content) for every section
+    of a freshly created project, in a single INSERT ... SELECT.
+    """
+    now = datetime.now()
+    db.execute(
+        insert(SectionRevision).from_select(
+            ["section_id", "version", "prompt", "is_snapshot", "content", "created_at", "updated_at"],
+            select(
+                Section.id,
+                literal(1),
+                literal(INITIAL_PROMPT),
+                true(),
+                Section.content,
+                literal(now),
+                literal(now),
+            ).where(Section.project_id == project_id),
+        )
+    )
+
+
+def migrate_legacy_history(db: Session, section: Section) -> int:
+    """
+    Move a section's old full-copy JSON history into revision rows (once)
+    and return the latest version number.
+
+    The deferred `history` column is only read for sections that have no
+    revision rows yet. Runs on a section's first write (record_revision)
+    and for all sections in migrate_all_legacy_history; reads never write.
+    """
+    latest = _latest_version(db, section.id)
+    if latest:
+        return latest
+
+    legacy = section.history
+    if not legacy:
+        return 0
+
+    previous: Optional[str] = None
+    for i, entry in enumerate(legacy, start=1):
+        content = (entry or {}).get("content") or ""
+        _add_revision(db, section.id, i, (entry or {}).get("prompt"), previous, content)
+        previous = content
+
+    section.history = None
+    db.flush()
+    return len(legacy)
+
+
+def migrate_all_legacy_history(db: Session) -> int:
+    """
+    Schema step (main.init_db): migrate every section that still has legacy
+    history and no revision rows, committing one section at a time. A
+    section another worker migrated first is skipped.
+    """
+    sections = (
+        db.query(Section)
+        .filter(
+            Section.history.isnot(None),
+            ~exists().where(SectionRevision.section_id == Section.id),
+        )
+        .all()
+    )
+    migrated = 0
+    for section in sections:
+        try:
+            if migrate_legacy_history(db, section):
+                db.commit()
+                migrated += 1
+        except IntegrityError:
+            db.rollback()
+    return migrated
+
+
+def _add_revision(
+    db: Session,
+    section_id: int,
+    version: int,
+    prompt: Optional[str],
+    previous: Optional[str],
+    content: str,
+) -> SectionRevision:
+    snapshot = previous is None or (version - 1) % SNAPSHOT_EVERY == 0
+    revision = SectionRevision(
+        section_id=section_id,
+        version=version,
+        prompt=prompt,
+        is_snapshot=snapshot,
+        content=content if snapshot else None,
+        delta=None if snapshot else make_delta(previous, content),
+    )
+    db.add(revision)
+    return revision
+
+
+def record_revision(db: Session, section: Section, new_content: str, prompt: str) -> SectionRevision:
+    """
+    Append the next version of `section`. Must be called before
+    section.content is overwritten: the delta is taken against it.
+
+    When a concurrent write took the version number first (unique
+    constraint), the section is reloaded and the revision is taken again on
+    top of that write.
+    """
+    for attempt in range(VERSION_ATTEMPTS):
+        try:
+            with db.begin_nested():
+                latest = migrate_legacy_history(db, section)
+                previous = (section.content or "") if latest else None
+                revision = _add_revision(db, section.id, latest + 1, prompt, previous, new_content)
+            return revision
+        except IntegrityError:
+            if attempt == VERSION_ATTEMPTS - 1:
+                raise
+            db.refresh(section, ["content", "history"])
+
+
+# ---------------- Reading ----------------
+
+def list_revisions(db: Session, section: Section) -> List[SectionRevision]:
+    """Version metadata only; content/deltas are not loaded."""
+    return (
+        db.query(SectionRevision)
+        .with_entities(
+            SectionRevision.version,
+            SectionRevision.prompt,
+            SectionRevision.is_snapshot,
+            SectionRevision.created_at,
+        )
+        .filter(SectionRevision.section_id == section.id)
+        .order_by(SectionRevision.version)
+        .all()
+    )
+
+
+def get_version(db: Session, section: Section, version: int) -> Optional[SectionRevision]:
+    """
+    Rebuild one version: load the nearest snapshot at or before it plus the
+    deltas in between (at most SNAPSHOT_EVERY rows).
+
+    Returns the target revision row with `content` filled in, or None.
+    """
+    snapshot_version = db.scalar(
+        select(func.max(SectionRevision.version)).where(
+            SectionRevision.section_id == section.id,
+            SectionRevision.is_snapshot.is_(True),
+            SectionRevision.version <= version,
+        )
+    )
+    if snapshot_version is None:
+        return None
+
+    rows = (
+        db.query(SectionRevision)
+        .filter(
+            SectionRevision.section_id == section.id,
+            SectionRevision.version >= snapshot_version,
+            SectionRevision.version <= version,
+        )
+        .order_by(SectionRevision.version)
+        .all()
+    )
+    if not rows or rows[-1].version != version:
+        return None
+
+    text = ""
+    for row in rows:
+        text = (row.content or "") if row.is_snapshot else apply_delta(text, row.delta or [])
+
+    target = rows[-1]
+    # detach before filling in content so the rebuilt text is never flushed
+    db.expunge(target)
+    target.content = text
+    return target
@@ -0,0 +1,194 @@
+# backend/services/slide_store.py
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from models import enums
+from models.models import Presentation, Slide
+
+# Slides sort by a float `position`, POSITION_STEP apart when (re)written
+# in bulk; appends go POSITION_STEP past the last slide. Inserting or moving
+# a slide between two neighbours takes the midpoint, halving that gap, so
+# about 30 of them can land in the same gap (1024 / 2**30 is just under
+# MIN_POSITION_GAP). The next one finds the gap too small and renumbers the
+# whole deck (_renumber) before placing the slide. Deleting a slide only
+# widens a gap and never renumbers.
+POSITION_STEP = 1024.0
+MIN_POSITION_GAP = 1e-6
+
+
+def _split_slide(slide: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
+    """Split a slide dict into (layout, payload)."""
+    payload = dict(slide)
+    layout = payload.pop("layout", None) or enums.SlideLayout.title.value
+    if isinstance(layout, enums.SlideLayout):
+        layout = layout.value
+    return str(layout), payload
+
+
+def touch(presentation: Presentation) -> None:
+    """Bump updated_at when only slide rows changed (the deck row itself didn't)."""
+    presentation.updated_at = datetime.now()
+
+
+def replace_slides(db: Session, presentation: Presentation, content: List[Any]) -> None:
+    """
+    Overwrite all slides of a presentation (create / full-deck PUT).
+
+    Rows are written with a single executemany; `presentation` must already
+    have its primary key (flush first for new rows).
+    """
+    pid = presentation.presentation_id
+    db.execute(delete(Slide).where(Slide.presentation_id == pid))
+
+    rows = []
+    for i, slide in enumerate(content or []):
+        if not isinstance(slide, dict):
+            continue
+        layout, payload = _split_slide(slide)
+        rows.append(
+            dict(
+                presentation_id=pid,
+                position=(i + 1) * POSITION_STEP,
+                layout=layout,
+                payload=payload,
+            )
+        )
+    if rows:
+        db.execute(insert(Slide), rows)
+
+    presentation.legacy_content = None
+    db.expire(presentation, ["slides"])
+    touch(presentation)
+
+
+def ensure_slide_rows(db: Session, presentation: Presentation) -> None:
+    """Move a deck still stored in the legacy `content` JSON into slide rows (once)."""
+    if presentation.legacy_content is None:
+        return
+    replace_slides(db, presentation, presentation.legacy_content)
+    db.flush()
+
+
+def _slides_query(db: Session, presentation_id: int):
+    return (
+        db.query(Slide)
+        .filter(Slide.presentation_id == presentation_id)
+        .order_by(Slide.position)
+    )
+
+
+def get_slide_at(db: Session, presentation: Presentation, index: int) -> Optional[Slide]:
+    """Fetch the slide at a 0-based deck index (one row, via the position index)."""
+    if index < 0:
+        return None
+    return _slides_query(db, presentation.presentation_id).offset(index).limit(1).first()
+
+
+def slide_dict_at(db: Session, presentation: Presentation, index: int) -> Optional[Dict[str, Any]]:
+    """
+    The slide at a 0-based deck index as a dict, for read-only routes: a
+    legacy deck is read from its JSON, not migrated (that happens on the
+    next write).
+    """
+    if presentation.legacy_content is None:
+        slide = get_slide_at(db, presentation, index)
+        return slide.as_dict() if slide is not None else None
+    slides = [s for s in presentation.legacy_content if isinstance(s, dict)]
+    if not 0 <= index < len(slides):
+        return None
+    layout, payload = _split_slide(slides[index])
+    return {"layout": layout, **payload}
+
+
+def _renumber(db: Session, presentation_id: int) -> None:
+    """Spread positions out evenly again once a gap has been split too often."""
+    for i, slide in enumerate(_slides_query(db, presentation_id).all()):
+        slide.position = (i + 1) * POSITION_STEP
+    db.flush()
+
+
+def _position_for_index(
+    db: Session,
+    presentation_id: int,
+    index: int,
+    exclude_id: Optional[int] = None,
+) -> float:
+    """
+    Sort key that places a slide at `index` (clamped to the deck length),
+    looking at no more than the two neighbouring rows.
+    """
+    q = _slides_query(db, presentation_id)
+    if exclude_id is not None:
+        q = q.filter(Slide.id != exclude_id)
+
+    index = max(index, 0)
+    if index == 0:
+        neighbours = [None] + q.limit(1).all()
+    else:
+        neighbours = q.offset(index - 1).limit(2).all()
+
+    before = neighbours[0] if neighbours else None
+    after = neighbours[1] if len(neighbours) > 1 else None
+
+    if before is None and after is None:
+        # empty deck, or index is past the end of a deck whose last row we skipped
+        last = q.order_by(None).order_by(Slide.position.desc()).first()
+        return (last.position if last else 0.0) + POSITION_STEP
+
+    low = before.position if before is not None else 0.0
+    if after is None:
+        return low + POSITION_STEP
+    if after.position - low < MIN_POSITION_GAP:
+        _renumber(db, presentation_id)
+        return _position_for_index(db, presentation_id, index, exclude_id)
+    return (low + after.position) / 2.0
+
+
+def insert_slide(
+    db: Session,
+    presentation: Presentation,
+    slide: Dict[str, Any],
+    index: Optional[int] = None,
+) -> Slide:
+    """Insert one slide at `index` (append when None)."""
+    ensure_slide_rows(db, presentation)
+    pid = presentation.presentation_id
+
+    if index is None:
+        last = _slides_query(db, pid).order_by(None).order_by(Slide.position.desc()).first()
+        position = (last.position if last else 0.0) + POSITION_STEP
+    else:
+        position = _position_for_index(db, pid, index)
+
+    layout, payload = _split_slide(slide)
+    row = Slide(presentation_id=pid, position=position, layout=layout, payload=payload)
+    db.add(row)
+    touch(presentation)
+    return row
+
+
+def patch_slide(presentation: Presentation, slide: Slide, changes: Dict[str, Any]) -> None:
+    """Merge non-None fields into one slide's payload."""
+    changes = {k: v for k, v in changes.items() if v is not None}
+    if "layout" in changes:
+        slide.layout, _ = _split_slide({"layout": changes.pop("layout")})
+    # assign a new dict so the JSON column is flagged dirty
+    slide.payload = {**(slide.payload or {}), **changes}
+    touch(presentation)
+
+
+def delete_slide(db: Session, presentation: Presentation, slide: Slide) -> None:
+    db.delete(slide)
+    touch(presentation)
+
+
+def move_slide(db: Session, presentation: Presentation, slide: Slide, to_index: int) -> None:
+    """Move one slide to `to_index`; only the moved row is rewritten."""
+    slide.position = _position_for_index(
+        db, presentation.presentation_id, to_index, exclude_id=slide.id
+    )
+    touch(presentation)
@@ -0,0 +1,350 @@
+# backend/services/storage_gc.py
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from core import metrics
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import Artifact, Presentation, Project
+from services import artifacts, idempotency, render_cache
+
+logger = logging.getLogger(__name__)
+
+# Deletes what nothing will read again:
+#
+#   render caches  ./storage/presentation_<id>.pptx and storage/docs/
+#                  project_<id>.docx (+ their .manifest.json) whose deck or
+#                  project is gone ("orphan"), that were not rebuilt for
+#                  STORAGE_GC_RENDER_MAX_AGE ("expired"), or the oldest ones
+#                  while the rest is over STORAGE_GC_MAX_BYTES ("budget").
+#                  Losing one only costs a full (non-incremental) render.
+#                  A render is only deleted under its render_cache.render_lock,
+#                  and skipped ("busy") while a download is rendering it or
+#                  if it was rewritten since the scan.
+#   temp files     tmp_img_* downloads and *.tmp left by an interrupted
+#                  atomic_write, older than STORAGE_GC_TMP_MAX_AGE ("temp")
+#   artifacts      rows of deleted decks/projects, then store blobs no row
+#                  points at ("unreferenced"); blobs younger than
+#                  STORAGE_GC_TMP_MAX_AGE are left alone, a publish may not
+#                  have committed its row yet
+#   idempotency    stored responses past IDEMPOTENCY_TTL (services/idempotency.py)
+#
+# File operations go in batches of STORAGE_GC_BATCH_SIZE with a pause
+# between them, so a run over a large directory doesn't starve requests of
+# disk I/O. A download whose blob vanished anyway re-renders it (see
+# artifacts.available()). Runs are idempotent; several workers may run one.
+
+_RENDER_NAMES = {
+    "pptx": re.compile(r"^presentation_(\d+)\.pptx$"),
+    "docx": re.compile(r"^project_(\d+)\.docx$"),
+}
+_MANIFEST_SUFFIX = ".manifest.json"
+
+
+@dataclass
+class GCReport:
+    dry_run: bool = False
+    scanned: int = 0
+    deleted_files: int = 0
+    reclaimed_bytes: int = 0
+    deleted_rows: int = 0  # artifact rows of deleted decks/projects
+    expired_idempotency_keys: int = 0
+    kept_render_bytes: int = 0
+    busy: int = 0  # renders skipped: being rendered, or rewritten since the scan
+    by_reason: Dict[str, int] = field(default_factory=dict)  # reason -> bytes
+    seconds: float = 0.0
+
+
+@dataclass
+class _Render:
+    object_id: int
+    file: str  # the rendered file (render_lock key; may be missing)
+    paths: List[str]  # files to delete: the rendered file and/or its manifest
+    size: int
+    mtime: float
+
+
+class _Sweeper:
+    def __init__(self, report: GCReport, batch_size: int, pause: float):
+        self.report = report
+        self.batch_size = max(batch_size, 1)
+        self.pause = pause
+        self._ops = 0
+
+    def tick(self) -> None:
+        """Count one file operation; pause after every batch."""
+        self._ops += 1
+        if self.pause > 0 and self._ops % self.batch_size == 0:
+            time.sleep(self.pause)
+
+    def remove(self, path: str, size: int, reason: str) -> None:
+        if not self.report.dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                logger.warning("Storage GC could not delete %s: %s", path, e)
+                return
+        self.record(size, reason)
+        self.tick()
+
+    def record(self, size: int, reason: str) -> None:
+        self.report.deleted_files += 1
+        self.report.reclaimed_bytes += size
+        self.report.by_reason[reason] = self.report.by_reason.get(reason, 0) + size
+        if not self.report.dry_run:
+            metrics.STORAGE_GC_FILES.inc(reason=reason)
+            metrics.STORAGE_GC_BYTES.inc(size, reason=reason)
+
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _render_dirs() -> Dict[str, str]:
+    # imported here: python-pptx / python-docx stay off the app's import path
+    from services import docx_generator, pptx_generator
+
+    return {
+        "pptx": os.path.dirname(pptx_generator.output_path(0)),
+        "docx": str(docx_generator.DOC_STORAGE_DIR),
+    }
+
+
+def _existing_ids(db: Session, kind: str, ids: List[int]) -> Set[int]:
+    column = Presentation.presentation_id if kind == "pptx" else Project.id
+    return {row[0] for row in db.query(column).filter(column.in_(ids))}
+
+
+def _sweep_render_dir(
+    db: Session, kind: str, directory: str, now: float, sweeper: _Sweeper
+) -> List[_Render]:
+    """Delete orphaned / expired renders and old temp files; return the renders kept."""
+    pattern = _RENDER_NAMES[kind]
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.is_file(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+    renders: Dict[int, _Render] = {}
+    manifests: Dict[str, os.DirEntry] = {}
+    for entry in entries:
+        sweeper.report.scanned += 1
+        sweeper.tick()
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            continue
+        name = entry.name
+        if name.endswith(".tmp") or name.startswith("tmp_img_"):
+            if now - st.st_mtime > Config.STORAGE_GC_TMP_MAX_AGE:
+                sweeper.remove(entry.path, st.st_size, "temp")
+        elif name.endswith(_MANIFEST_SUFFIX):
+            manifests[name[: -len(_MANIFEST_SUFFIX)]] = entry
+        else:
+            match = pattern.match(name)
+            if match:
+                object_id = int(match.group(1))
+                renders[object_id] = _Render(object_id, entry.path, [entry.path], st.st_size, st.st_mtime)
+
+    # attach manifests to their file; a manifest without one is useless
+    for name, entry in manifests.items():
+        match = pattern.match(name)
+        render = renders.get(int(match.group(1))) if match else None
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            continue
+        if render is None:
+            if match:
+                orphan = _Render(int(match.group(1)), os.path.join(directory, name), [entry.path], st.st_size, st.st_mtime)
+                _remove_render(orphan, "orphan", sweeper)
+            continue
+        render.paths.append(entry.path)
+        render.size += st.st_size
+
+    kept: List[_Render] = []
+    max_age = Config.STORAGE_GC_RENDER_MAX_AGE
+    for batch in _batches(sorted(renders), sweeper.batch_size):
+        existing = _existing_ids(db, kind, batch)
+        for object_id in batch:
+            render = renders[object_id]
+            if object_id not in existing:
+                reason = "orphan"
+            elif max_age > 0 and now - render.mtime > max_age:
+                reason = "expired"
+            else:
+                kept.append(render)
+                continue
+            _remove_render(render, reason, sweeper)
+    return kept
+
+
+def _remove_render(render: _Render, reason: str, sweeper: _Sweeper) -> bool:
+    """
+    Delete a render's files, unless a download is rendering it right now or
+    has rewritten it since the scan (build_pptx may be reusing its parts).
+    """
+    # the file as scanned; a manifest-only orphan had none
+    expected = render.mtime if render.file in render.paths else None
+    with render_cache.render_lock(render.file, blocking=False) as locked:
+        if not locked or _mtime(render.file) != expected:
+            sweeper.report.busy += 1
+            return False
+        for path in render.paths:
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                continue
+            sweeper.remove(path, size, reason)
+    return True
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _enforce_budget(kept: List[_Render], max_bytes: int, sweeper: _Sweeper) -> None:
+    """Drop the least recently rendered files until the rest fits in max_bytes."""
+    total = sum(render.size for render in kept)
+    if max_bytes > 0 and total > max_bytes:
+        for render in sorted(kept, key=lambda r: r.mtime):
+            if total <= max_bytes:
+                break
+            if _remove_render(render, "budget", sweeper):
+                total -= render.size
+    sweeper.report.kept_render_bytes = total
+
+
+def _sweep_artifacts(db: Session, now: float, sweeper: _Sweeper) -> None:
+    """Drop artifact rows of deleted objects, then blobs no row points at."""
+    orphan_rows = []
+    for kind, column in (("pptx", Presentation.presentation_id), ("docx", Project.id)):
+        orphan_rows += (
+            db.query(Artifact.id)
+            .filter(Artifact.kind == kind, ~Artifact.object_id.in_(db.query(column)))
+            .all()
+        )
+    orphan_ids = [row[0] for row in orphan_rows]
+    if orphan_ids and not sweeper.report.dry_run:
+        for batch in _batches(orphan_ids, sweeper.batch_size):
+            db.query(Artifact).filter(Artifact.id.in_(batch)).delete(synchronize_session=False)
+        db.commit()
+    sweeper.report.deleted_rows = len(orphan_ids)
+
+    query = db.query(Artifact.storage_key)
+    if orphan_ids and sweeper.report.dry_run:
+        query = query.filter(Artifact.id.notin_(orphan_ids))
+    referenced = {row[0] for row in query}
+
+    store = artifacts.get_store()
+    candidates = []
+    for key, size, mtime in store.iter_keys():
+        sweeper.report.scanned += 1
+        if key not in referenced and now - mtime > Config.STORAGE_GC_TMP_MAX_AGE:
+            candidates.append((key, size))
+
+    for batch in _batches(candidates, sweeper.batch_size):
+        # re-check: a download may have pointed a row at one of these meanwhile
+        keys = [key for key, _ in batch]
+        published = {row[0] for row in db.query(Artifact.storage_key).filter(Artifact.storage_key.in_(keys))}
+        for key, size in batch:
+            if key in published:
+                continue
+            if not sweeper.report.dry_run:
+                store.delete(key)
+            sweeper.record(size, "unreferenced")
+            sweeper.tick()
+
+
+def run(
+    dry_run: bool = False,
+    max_bytes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> GCReport:
+    """One GC pass over the render caches and the artifact store (see the top of this module)."""
+    start = time.perf_counter()
+    report = GCReport(dry_run=dry_run)
+    sweeper = _Sweeper(
+        report,
+        Config.STORAGE_GC_BATCH_SIZE if batch_size is None else batch_size,
+        Config.STORAGE_GC_BATCH_PAUSE if pause is None else pause,
+    )
+    now = time.time()
+    db = SessionLocal()
+    try:
+        kept: List[_Render] = []
+        for kind, directory in _render_dirs().items():
+            kept += _sweep_render_dir(db, kind, directory, now, sweeper)
+        _enforce_budget(kept, Config.STORAGE_GC_MAX_BYTES if max_bytes is None else max_bytes, sweeper)
+        _sweep_artifacts(db, now, sweeper)
+        if not dry_run:
+            report.expired_idempotency_keys = idempotency.purge_expired(db)
+            db.commit()
+    finally:
+        db.close()
+
+    report.seconds = round(time.perf_counter() - start, 3)
+    if not dry_run:
+        metrics.STORAGE_GC_LATENCY.observe(report.seconds)
+    logger.info(
+        "Storage GC%s: %d files, %d bytes reclaimed %s, %d artifact rows, %d render bytes kept, %d busy (%.1fs)",
+        " (dry run)" if dry_run else "",
+        report.deleted_files,
+        report.reclaimed_bytes,
+        report.by_reason,
+        report.deleted_rows,
+        report.kept_render_bytes,
+        report.busy,
+        report.seconds,
+    )
+    return report
+
+
+async def run_periodically(interval: float) -> None:
+    """Background task: a GC pass every `interval` seconds, off the event loop."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(run)
+        except Exception:
+            logger.exception("Storage GC failed")
+
+
+def main(argv=None) -> None:
+    """
+    Run one pass from the backend directory (same working directory as the app):
+
+        python -m services.storage_gc --dry-run
+        python -m services.storage_gc --max-bytes 2000000000
+    """
+    parser = argparse.ArgumentParser(description="Delete orphaned, expired and temporary files from storage.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    parser.add_argument("--max-bytes", type=int, help="render cache budget (default: STORAGE_GC_MAX_BYTES)")
+    parser.add_argument("--batch-size", type=int, help="file operations per batch")
+    parser.add_argument("--pause", type=float, help="seconds between batches")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    report = run(dry_run=args.dry_run, max_bytes=args.max_bytes, batch_size=args.batch_size, pause=args.pause)
+    print(json.dumps(asdict(report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
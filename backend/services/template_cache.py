@@ -0,0 +1,104 @@
+# backend/services/template_cache.py
+
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from pptx import Presentation
+
+from core.config import Config
+from services import render_cache
+from services.pptx_builder import pruning
+from services.pptx_builder.styles import DeckStyle
+
+logger = logging.getLogger(__name__)
+
+# Prepared base packages of the theme templates, one file per (theme,
+# template mtime, normalized style). Building one loads the template, drops
+# its sample slides, rewrites master/layout/theme XML for the style and
+# prunes parts no generated deck uses (see pptx_builder/pruning.py);
+# afterwards every deck with that styling just opens the prepared file.
+# File mtimes double as LRU timestamps: hits touch the file, the oldest
+# files beyond Config.TEMPLATE_CACHE_MAX are removed.
+
+_build_lock = threading.Lock()
+
+
+def _cache_path(key: str) -> str:
+    # named after the hash only: nothing from the request reaches the path
+    return os.path.abspath(os.path.join(Config.TEMPLATE_CACHE_DIR, f"{key[:32]}.pptx"))
+
+
+def _evict(keep: str) -> None:
+    try:
+        entries = [
+            os.path.join(Config.TEMPLATE_CACHE_DIR, name)
+            for name in os.listdir(Config.TEMPLATE_CACHE_DIR)
+            if name.endswith(".pptx")
+        ]
+    except OSError:
+        return
+    excess = len(entries) - Config.TEMPLATE_CACHE_MAX
+    if excess <= 0:
+        return
+    entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+    for path in entries:
+        if excess <= 0:
+            break
+        if os.path.abspath(path) == keep:
+            continue
+        try:
+            os.remove(path)
+            excess -= 1
+        except OSError:
+            pass
+
+
+def derived_template(
+    theme_id: str,
+    template_path: Optional[str],
+    style: DeckStyle,
+    strip_slides: Callable[[Presentation], None],
+) -> Optional[str]:
+    """
+    Path of the prepared template for `style` (which may be empty),
+    building it on first use. Returns None when the cache directory is not
+    writable; callers then prepare the template in memory.
+    """
+    template_mtime = (
+        os.path.getmtime(template_path) if template_path and os.path.exists(template_path) else None
+    )
+    key = render_cache.content_hash(
+        {
+            "theme_id": theme_id,
+            "template_mtime": template_mtime,
+            "prune_version": pruning.PRUNE_VERSION,
+            **style.cache_key(),
+        }
+    )
+    path = _cache_path(key)
+
+    if os.path.exists(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    with _build_lock:
+        if os.path.exists(path):
+            return path
+        try:
+            os.makedirs(Config.TEMPLATE_CACHE_DIR, exist_ok=True)
+            prs = Presentation(template_path) if template_mtime is not None else Presentation()
+            strip_slides(prs)
+            style.apply_to_deck(prs)
+            stats = pruning.prune_template(prs)
+            logger.info("Prepared template for %s: pruned %s", theme_id, stats)
+            render_cache.atomic_write(path, prs.save)
+        except OSError as e:
+            logger.warning("Could not cache derived template for %s: %s", theme_id, e)
+            return None
+        _evict(keep=path)
+    return path
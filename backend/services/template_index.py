@@ -0,0 +1,215 @@
+# backend/services/template_index.py
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
+from pptx.util import Emu
+
+# Introspection of a template's slide layouts, built once per theme file:
+# which placeholder idx holds the title / subtitle / body content / picture
+# on every layout, with geometry and a rough text capacity, plus the
+# best-fitting layout for each slide type the generator renders.
+
+_TITLE_TYPES = (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE, PP_PLACEHOLDER.VERTICAL_TITLE)
+_BODY_TYPES = (PP_PLACEHOLDER.OBJECT, PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.VERTICAL_BODY)
+# date / footer / slide number are never copied onto slides by add_slide
+_IGNORED_TYPES = (PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.FOOTER, PP_PLACEHOLDER.SLIDE_NUMBER)
+
+# Conventional Office layout positions; used whenever they fit, so stock
+# templates render exactly as before.
+PREFERRED_LAYOUT = {"title": 0, "bullet": 1, "two_column": 3, "image": 3}
+
+# nominal body text size used for capacity estimates
+_CAPACITY_FONT_PT = 18
+
+
+@dataclass(frozen=True)
+class PlaceholderInfo:
+    idx: int
+    type: int
+    left: int
+    top: int
+    width: int
+    height: int
+
+    @property
+    def area(self) -> int:
+        return self.width * self.height
+
+    @property
+    def capacity(self) -> Tuple[int, int]:
+        """Approximate (lines, characters per line) at the nominal font size."""
+        width_pt = Emu(self.width).pt
+        height_pt = Emu(self.height).pt
+        chars = int(width_pt / (_CAPACITY_FONT_PT * 0.5))
+        lines = int(height_pt / (_CAPACITY_FONT_PT * 1.2))
+        return max(lines, 0), max(chars, 0)
+
+
+@dataclass(frozen=True)
+class LayoutInfo:
+    index: int
+    name: str
+    title: Optional[PlaceholderInfo]
+    subtitle: Optional[PlaceholderInfo]
+    # content-capable placeholders (object/body), left to right, top to bottom
+    bodies: Tuple[PlaceholderInfo, ...]
+    pictures: Tuple[PlaceholderInfo, ...]
+
+
+@dataclass(frozen=True)
+class TemplateIndex:
+    layouts: Tuple[LayoutInfo, ...]
+    # slide type ("title", "bullet", ...) -> index into layouts
+    best: Dict[str, int]
+
+    def for_slide(self, slide_type: str) -> LayoutInfo:
+        index = self.best.get(slide_type, self.best["title"])
+        return self.layouts[index]
+
+
+# ---------------- Building ----------------
+
+def _geometry(element) -> Optional[Tuple[int, int, int, int]]:
+    if element.xfrm is None:
+        return None
+    return (element.x or 0, element.y or 0, element.cx or 0, element.cy or 0)
+
+
+def _master_geometry(master) -> Dict[int, Tuple[int, int, int, int]]:
+    """Placeholder geometry on the slide master by type, for inheritance."""
+    geometry: Dict[int, Tuple[int, int, int, int]] = {}
+    for ph in master.placeholders:
+        ph_type = ph.placeholder_format.type
+        own = _geometry(ph._element)
+        if ph_type is not None and own is not None:
+            geometry.setdefault(int(ph_type), own)
+    return geometry
+
+
+def _inherited_type(ph_type: int) -> int:
+    # layout placeholders inherit from the master's title/body placeholder
+    if ph_type in _TITLE_TYPES:
+        return int(PP_PLACEHOLDER.TITLE)
+    if ph_type in _BODY_TYPES or ph_type in (PP_PLACEHOLDER.SUBTITLE, PP_PLACEHOLDER.PICTURE):
+        return int(PP_PLACEHOLDER.BODY)
+    return ph_type
+
+
+def _layout_info(index: int, layout, master_geometry) -> LayoutInfo:
+    title = subtitle = None
+    bodies: List[PlaceholderInfo] = []
+    pictures: List[PlaceholderInfo] = []
+
+    for ph in layout.placeholders:
+        fmt = ph.placeholder_format
+        ph_type = int(fmt.type) if fmt.type is not None else -1
+        if ph_type in _IGNORED_TYPES:
+            continue
+        # reading ph.left etc. walks the master with xpath per attribute;
+        # resolve inheritance once against the master's geometry instead
+        geometry = _geometry(ph._element) or master_geometry.get(_inherited_type(ph_type), (0, 0, 0, 0))
+        info = PlaceholderInfo(fmt.idx, ph_type, *geometry)
+
+        if ph_type in _TITLE_TYPES:
+            title = title or info
+        elif ph_type == PP_PLACEHOLDER.SUBTITLE:
+            subtitle = subtitle or info
+        elif ph_type in _BODY_TYPES:
+            bodies.append(info)
+        elif ph_type == PP_PLACEHOLDER.PICTURE:
+            pictures.append(info)
+
+    bodies.sort(key=lambda p: (p.top // 457200, p.left))  # rows of ~0.5in, then x
+    return LayoutInfo(index, layout.name, title, subtitle, tuple(bodies), tuple(pictures))
+
+
+def _score(slide_type: str, layout: LayoutInfo) -> Optional[float]:
+    """How well a layout fits a slide type; None if it can't hold the content."""
+    if layout.title is None:
+        return None
+    n_bodies = len(layout.bodies)
+
+    if slide_type == "title":
+        return 2.0 if layout.subtitle is not None and n_bodies == 0 else (1.0 if n_bodies == 0 else None)
+
+    if slide_type == "bullet":
+        if n_bodies < 1:
+            return None
+        # one large content area beats several small ones
+        return layout.bodies[0].area / n_bodies
+
+    if slide_type in ("two_column", "image"):
+        if n_bodies < 2:
+            return None
+        left, right = layout.bodies[0], layout.bodies[1]
+        side_by_side = abs(left.top - right.top) < left.height / 2
+        if not side_by_side:
+            return None
+        return float(min(left.area, right.area)) - abs(left.area - right.area)
+
+    return None
+
+
+def _pick_best(layouts: Tuple[LayoutInfo, ...]) -> Dict[str, int]:
+    best: Dict[str, int] = {}
+    for slide_type, preferred in PREFERRED_LAYOUT.items():
+        if preferred < len(layouts) and _score(slide_type, layouts[preferred]) is not None:
+            best[slide_type] = preferred
+            continue
+        scored = [
+            (score, layout.index)
+            for layout in layouts
+            for score in [_score(slide_type, layout)]
+            if score is not None
+        ]
+        if scored:
+            best[slide_type] = max(scored, key=lambda s: (s[0], -s[1]))[1]
+
+    # whatever happens, there is always a layout to fall back to
+    best.setdefault("title", 0)
+    best.setdefault("bullet", best["title"])
+    best.setdefault("two_column", best["bullet"])
+    best.setdefault("image", best["two_column"])
+    return best
+
+
+def build_index(prs: Presentation) -> TemplateIndex:
+    masters = {}
+    layouts = []
+    for i, layout in enumerate(prs.slide_layouts):
+        master = layout.slide_master
+        if master.part not in masters:
+            masters[master.part] = _master_geometry(master)
+        layouts.append(_layout_info(i, layout, masters[master.part]))
+    layouts = tuple(layouts)
+    return TemplateIndex(layouts=layouts, best=_pick_best(layouts))
+
+
+# ---------------- Cache ----------------
+
+_cache: Dict[Tuple[str, float], TemplateIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def get_index(prs: Presentation, template_path: Optional[str] = None) -> TemplateIndex:
+    """
+    Index for a template file, built on first use and reused until the file
+    changes. `prs` must have that template's layouts (the template itself or
+    a deck rendered from it); without a path the index is built from `prs`.
+    """
+    if not template_path or not os.path.exists(template_path):
+        return build_index(prs)
+
+    key = (os.path.abspath(template_path), os.path.getmtime(template_path))
+    with _cache_lock:
+        index = _cache.get(key)
+    if index is None:
+        index = build_index(prs)
+        with _cache_lock:
+            _cache[key] = index
+    return index
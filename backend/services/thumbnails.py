@@ -0,0 +1,694 @@
+# backend/services/thumbnails.py
+
+import colorsys
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+
+from core import tracing
+from services import render_cache, template_index
+from services.pptx_builder.styles import DeckStyle
+from services.pptx_builder.utils import split_into_paragraphs
+from services.pptx_generator import TEMPLATE_MAP
+
+logger = logging.getLogger(__name__)
+
+# Lightweight slide previews: a simplified raster of what the PPTX renderer
+# produces (layout background, title, bullets / columns / caption, an
+# outlined box where a picture goes), drawn with Pillow straight from the
+# slide JSON. The theme look (colors, backgrounds, placeholder boxes) is
+# read once per template file; thumbnails are cached by slide hash, theme,
+# style and width, and that cache key doubles as the HTTP ETag.
+
+# Bump when drawing changes so cached thumbnails (and ETags) change.
+THUMBNAIL_VERSION = 1
+
+DEFAULT_WIDTH = 320
+MIN_WIDTH = 64
+MAX_WIDTH = 1280
+STRIP_GAP = 8  # px between thumbnails in a deck strip
+JPEG_QUALITY = 85
+MEDIA_TYPE = "image/jpeg"
+
+# what the theme preview endpoint draws: one slide of every layout
+SAMPLE_SLIDES = [
+    {"layout": "title", "title": "Presentation title"},
+    {"layout": "bullet", "title": "Key points", "bullets": ["First point", "Second point", "Third point"]},
+    {"layout": "two_column", "title": "Compare", "left": "Before: the old way.", "right": "After: the new way."},
+    {"layout": "image", "title": "Figure", "image_url": "preview", "caption": "A short caption. It explains the picture."},
+]
+
+_CACHE_SIZE = 1024
+_STRIP_BACKGROUND = (228, 228, 231)
+
+Color = Tuple[int, int, int]
+
+_WHITE: Color = (255, 255, 255)
+_BLACK: Color = (0, 0, 0)
+
+# EMU offsets of the fallback boxes the slide strategies use when a layout
+# lacks a placeholder (see services/pptx_builder/slides)
+_INCH = 914400
+
+
+@dataclass(frozen=True)
+class Background:
+    color: Color
+    image: Optional[bytes] = None  # picture fill, drawn over `color`
+
+
+@dataclass(frozen=True)
+class Decoration:
+    """A picture or filled rectangle on a master / layout (slide EMU)."""
+
+    left: int
+    top: int
+    width: int
+    height: int
+    image: Optional[bytes] = None
+    color: Optional[Color] = None  # solid fill when there is no image
+    alpha: float = 1.0
+    duotone: Optional[Tuple[Color, Color]] = None
+
+
+@dataclass(frozen=True)
+class ThemeLook:
+    key: str  # template path + mtime; keys the composed layout backgrounds
+    slide_width: int  # EMU
+    slide_height: int
+    layouts: template_index.TemplateIndex
+    # layout index -> background (layout's own, else the master's)
+    backgrounds: Dict[int, Background]
+    # layout index -> pictures / filled rectangles drawn over the background
+    # (the master's, unless the layout hides them, then the layout's own)
+    decorations: Dict[int, Tuple[Decoration, ...]]
+    title_color: Color
+    text_color: Color
+    accent_color: Color
+
+
+# ---------------- Theme look ----------------
+
+def _hex(value: Optional[str]) -> Optional[Color]:
+    if not value or len(value) != 6:
+        return None
+    try:
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+def _adjust(color: Color, element) -> Color:
+    """Apply the DrawingML transforms that matter for a preview."""
+    r, g, b = (c / 255 for c in color)
+    for mod in element:
+        name = etree.QName(mod).localname
+        try:
+            val = int(mod.get("val", "100000")) / 100000
+        except ValueError:
+            continue
+        if name in ("lumMod", "lumOff"):
+            h, l, s = colorsys.rgb_to_hls(r, g, b)
+            l = l * val if name == "lumMod" else l + val
+            r, g, b = colorsys.hls_to_rgb(h, min(max(l, 0.0), 1.0), s)
+        elif name == "shade":
+            r, g, b = r * val, g * val, b * val
+        elif name == "tint":
+            r, g, b = (c + (1 - c) * (1 - val) for c in (r, g, b))
+    return tuple(int(round(min(max(c, 0.0), 1.0) * 255)) for c in (r, g, b))
+
+
+class _Colors:
+    """Resolves color elements against a master's scheme and color map."""
+
+    def __init__(self, scheme: Dict[str, Color], clr_map: Dict[str, str]):
+        self.scheme = scheme
+        self.clr_map = clr_map
+
+    def scheme_color(self, name: str, ph_color: Optional[Color] = None) -> Color:
+        if name == "phClr":
+            return ph_color or _BLACK
+        name = self.clr_map.get(name, name)
+        return self.scheme.get(name, _BLACK)
+
+    def resolve(self, parent, ph_color: Optional[Color] = None) -> Optional[Color]:
+        """Color of the first color child of `parent` (a:solidFill, p:bgRef, a:gs, ...)."""
+        if parent is None:
+            return None
+        for child in parent:
+            name = etree.QName(child).localname
+            if name == "srgbClr":
+                color = _hex(child.get("val"))
+            elif name == "schemeClr":
+                color = self.scheme_color(child.get("val", ""), ph_color)
+            elif name == "sysClr":
+                color = _hex(child.get("lastClr"))
+            else:
+                continue
+            return _adjust(color or _BLACK, child)
+        return None
+
+
+def _scheme(theme) -> Dict[str, Color]:
+    scheme: Dict[str, Color] = {}
+    clr_scheme = theme.find(f".//{qn('a:clrScheme')}")
+    if clr_scheme is None:
+        return scheme
+    for slot in clr_scheme:
+        for color in slot:
+            value = color.get("val") if color.tag == qn("a:srgbClr") else color.get("lastClr")
+            if _hex(value):
+                scheme[etree.QName(slot).localname] = _hex(value)
+            break
+    return scheme
+
+
+def _fill_background(fill, part, colors: _Colors, ph_color: Optional[Color]) -> Optional[Background]:
+    """Background for a fill element; picture fills read their blob through `part`'s rels."""
+    name = etree.QName(fill).localname
+    if name == "solidFill":
+        return Background(colors.resolve(fill, ph_color) or _WHITE)
+    if name == "gradFill":
+        stops = [colors.resolve(gs, ph_color) for gs in fill.iter(qn("a:gs"))]
+        stops = [s for s in stops if s is not None]
+        if not stops:
+            return None
+        return Background(tuple(sum(c[i] for c in stops) // len(stops) for i in range(3)))
+    if name == "blipFill":
+        blip = fill.find(qn("a:blip"))
+        rId = blip.get(qn("r:embed")) if blip is not None else None
+        try:
+            blob = part.related_part(rId).blob if rId else None
+        except KeyError:
+            blob = None
+        return Background(ph_color or _WHITE, blob)
+    if name == "pattFill":
+        return Background(colors.resolve(fill.find(qn("a:fgClr")), ph_color) or _WHITE)
+    return None
+
+
+def _background(c_sld, part, theme, theme_part, colors: _Colors) -> Optional[Background]:
+    bg = c_sld.find(qn("p:bg")) if c_sld is not None else None
+    if bg is None:
+        return None
+    bg_pr = bg.find(qn("p:bgPr"))
+    if bg_pr is not None and len(bg_pr):
+        return _fill_background(bg_pr[0], part, colors, None)
+    bg_ref = bg.find(qn("p:bgRef"))
+    if bg_ref is None:
+        return None
+    ph_color = colors.resolve(bg_ref)
+    idx = int(bg_ref.get("idx", "0"))
+    # bgRef idx 1001+ selects the theme's bgFillStyleLst, 1..999 its fillStyleLst
+    style_list = theme.find(f".//{qn('a:bgFillStyleLst' if idx > 1000 else 'a:fillStyleLst')}")
+    position = idx - 1001 if idx > 1000 else idx - 1
+    if style_list is None or not 0 <= position < len(style_list):
+        return Background(ph_color or _WHITE)
+    return _fill_background(style_list[position], theme_part, colors, ph_color)
+
+
+def _text_color(master, style_tag: str, ph_types, colors: _Colors, default: Color) -> Color:
+    # a color on the master placeholder's list style wins over txStyles
+    for ph in master.placeholders:
+        if ph.placeholder_format.type in ph_types:
+            def_rpr = ph._element.find(f".//{qn('a:lstStyle')}/{qn('a:lvl1pPr')}/{qn('a:defRPr')}")
+            color = colors.resolve(def_rpr.find(qn("a:solidFill"))) if def_rpr is not None else None
+            if color is not None:
+                return color
+            break
+    def_rpr = master._element.find(f"{qn('p:txStyles')}/{style_tag}/{qn('a:lvl1pPr')}/{qn('a:defRPr')}")
+    if def_rpr is not None:
+        color = colors.resolve(def_rpr.find(qn("a:solidFill")))
+        if color is not None:
+            return color
+    return default
+
+
+def _alpha(color_parent) -> float:
+    alpha = color_parent.find(f"*/{qn('a:alpha')}") if color_parent is not None else None
+    return int(alpha.get("val", "100000")) / 100000 if alpha is not None else 1.0
+
+
+def _decorations(tree, part, colors: _Colors, transform=None) -> List[Decoration]:
+    """
+    Non-placeholder pictures and rectangle fills in a shape tree, in z-order.
+    Groups are flattened through their child coordinate space; other
+    geometry (ovals, freeforms, gradients) is too faint to matter here.
+    """
+    transform = transform or (lambda x, y, cx, cy: (x, y, cx, cy))
+    out: List[Decoration] = []
+    for el in tree:
+        tag = etree.QName(el).localname
+        if tag == "grpSp":
+            xfrm = el.find(f"{qn('p:grpSpPr')}/{qn('a:xfrm')}")
+            if xfrm is None or xfrm.find(qn("a:chExt")) is None:
+                out.extend(_decorations(el, part, colors, transform))
+                continue
+            off, ext = xfrm.find(qn("a:off")), xfrm.find(qn("a:ext"))
+            ch_off, ch_ext = xfrm.find(qn("a:chOff")), xfrm.find(qn("a:chExt"))
+            ox, oy, ecx, ecy = (int(v) for v in (off.get("x"), off.get("y"), ext.get("cx"), ext.get("cy")))
+            cx0, cy0 = int(ch_off.get("x")), int(ch_off.get("y"))
+            sx = ecx / int(ch_ext.get("cx")) if int(ch_ext.get("cx")) else 1.0
+            sy = ecy / int(ch_ext.get("cy")) if int(ch_ext.get("cy")) else 1.0
+
+            def child(x, y, cx, cy, parent=transform, ox=ox, oy=oy, cx0=cx0, cy0=cy0, sx=sx, sy=sy):
+                return parent(int(ox + (x - cx0) * sx), int(oy + (y - cy0) * sy), int(cx * sx), int(cy * sy))
+
+            out.extend(_decorations(el, part, colors, child))
+            continue
+        if tag not in ("sp", "pic") or el.find(f".//{qn('p:nvPr')}/{qn('p:ph')}") is not None:
+            continue
+        sp_pr = el.find(qn("p:spPr"))
+        xfrm = sp_pr.find(qn("a:xfrm")) if sp_pr is not None else None
+        if xfrm is None or xfrm.find(qn("a:off")) is None or xfrm.find(qn("a:ext")) is None:
+            continue
+        off, ext = xfrm.find(qn("a:off")), xfrm.find(qn("a:ext"))
+        box = transform(int(off.get("x")), int(off.get("y")), int(ext.get("cx")), int(ext.get("cy")))
+
+        blip = el.find(f".//{qn('a:blip')}")
+        if blip is not None and blip.get(qn("r:embed")):
+            try:
+                blob = part.related_part(blip.get(qn("r:embed"))).blob
+            except KeyError:
+                continue
+            duotone = blip.find(qn("a:duotone"))
+            tones = None
+            if duotone is not None and len(duotone) >= 2:
+                dark, light = colors.resolve([duotone[0]]), colors.resolve([duotone[1]])
+                tones = (dark, light) if dark and light else None
+            out.append(Decoration(*box, image=blob, duotone=tones))
+            continue
+
+        geometry = sp_pr.find(qn("a:prstGeom"))
+        fill = sp_pr.find(qn("a:solidFill"))
+        # custGeom frames etc. would cover the slide as a plain box
+        if fill is not None and geometry is not None and geometry.get("prst") == "rect":
+            color = colors.resolve(fill)
+            if color is not None:
+                out.append(Decoration(*box, color=color, alpha=_alpha(fill)))
+    return out
+
+
+def _build_look(prs, template_path: Optional[str], key: str) -> ThemeLook:
+    layouts = template_index.get_index(prs, template_path)
+    master = prs.slide_masters[0]
+    theme_part = master.part.part_related_by(RT.THEME)
+    theme = etree.fromstring(theme_part.blob)
+
+    clr_map_el = master._element.find(qn("p:clrMap"))
+    clr_map = dict(clr_map_el.attrib) if clr_map_el is not None else {}
+    colors = _Colors(_scheme(theme), clr_map)
+
+    master_bg = _background(master._element.find(qn("p:cSld")), master.part, theme, theme_part, colors)
+    master_bg = master_bg or Background(colors.scheme_color("bg1"))
+    master_decorations = _decorations(master.shapes._spTree, master.part, colors)
+    backgrounds = {}
+    decorations = {}
+    for info in layouts.layouts:
+        layout = prs.slide_layouts[info.index]
+        own = _background(layout._element.find(qn("p:cSld")), layout.part, theme, theme_part, colors)
+        backgrounds[info.index] = own or master_bg
+        shown = master_decorations if layout._element.get("showMasterSp") != "0" else []
+        decorations[info.index] = tuple(shown + _decorations(layout.shapes._spTree, layout.part, colors))
+
+    text = colors.scheme_color("tx1")
+    return ThemeLook(
+        key=key,
+        slide_width=prs.slide_width,
+        slide_height=prs.slide_height,
+        layouts=layouts,
+        backgrounds=backgrounds,
+        decorations=decorations,
+        title_color=_text_color(
+            master,
+            qn("p:titleStyle"),
+            (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE),
+            colors,
+            text,
+        ),
+        text_color=_text_color(master, qn("p:bodyStyle"), (PP_PLACEHOLDER.BODY,), colors, text),
+        accent_color=colors.scheme_color("accent1"),
+    )
+
+
+_looks: Dict[Tuple[str, Optional[float]], ThemeLook] = {}
+_looks_lock = threading.Lock()
+
+
+def _template(theme_id: str) -> Tuple[Optional[str], Optional[float]]:
+    path = TEMPLATE_MAP.get(theme_id)
+    if path and os.path.exists(path):
+        return path, os.path.getmtime(path)
+    return None, None
+
+
+def theme_look(theme_id: str) -> ThemeLook:
+    """Look of a theme template, read on first use and kept until the file changes."""
+    path, mtime = _template(theme_id)
+    key = (os.path.abspath(path) if path else "", mtime)
+    with _looks_lock:
+        look = _looks.get(key)
+    if look is None:
+        with tracing.span("thumbnail.theme_look", theme_id=theme_id):
+            prs = Presentation(path) if path else Presentation()
+            look = _build_look(prs, path, f"{key[0]}@{key[1]}")
+        with _looks_lock:
+            _looks[key] = look
+    return look
+
+
+# ---------------- Drawing ----------------
+
+class _Glyphs:
+    """
+    A font at one pixel size with every character rasterized once.
+
+    FreeType layout + rendering costs ~2 ms per draw.text call here, which
+    alone would blow the per-slide budget; pasting cached glyph masks is
+    ~20x faster (kerning is dropped, which a preview does not miss).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        try:
+            self.font = ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1: fixed-size bitmap font only
+            self.font = ImageFont.load_default()
+        self._glyphs: Dict[str, tuple] = {}
+
+    def _glyph(self, ch: str) -> tuple:
+        glyph = self._glyphs.get(ch)
+        if glyph is None:
+            left, top, right, bottom = self.font.getbbox(ch)
+            mask = None
+            if right > left and bottom > top:
+                mask = Image.new("L", (right - left, bottom - top))
+                ImageDraw.Draw(mask).text((-left, -top), ch, font=self.font, fill=255)
+            glyph = (self.font.getlength(ch), mask, left, top)
+            self._glyphs[ch] = glyph  # races only recompute the same glyph
+        return glyph
+
+    def length(self, text: str) -> float:
+        return sum(self._glyph(ch)[0] for ch in text)
+
+    def draw(self, img: Image.Image, xy: Tuple[int, int], text: str, color: Color) -> None:
+        x, y = xy
+        for ch in text:
+            advance, mask, left, top = self._glyph(ch)
+            if mask is not None:
+                img.paste(color, (int(x) + left, y + top), mask)
+            x += advance
+
+
+@lru_cache(maxsize=64)
+def _font(size: int) -> _Glyphs:
+    return _Glyphs(size)
+
+
+_background_images: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_background_lock = threading.Lock()
+
+
+def _paste_picture(base: Image.Image, blob: bytes, box, duotone=None) -> None:
+    x0, y0, x1, y1 = box
+    size = (max(x1 - x0, 1), max(y1 - y0, 1))
+    try:
+        with Image.open(io.BytesIO(blob)) as picture:
+            picture.draft("RGB", size)  # JPEG: decode at reduced scale
+            picture = picture.convert("RGBA").resize(size, Image.BILINEAR)
+    except Exception as e:  # unreadable / unsupported (EMF, WDP, ...) picture
+        logger.debug("Thumbnail picture skipped: %s", e)
+        return
+    if duotone is not None:
+        mask = picture.getchannel("A")
+        picture = ImageOps.colorize(picture.convert("L"), *duotone).convert("RGBA")
+        picture.putalpha(mask)
+    base.paste(picture, (x0, y0), picture)
+
+
+def _background_image(look: ThemeLook, layout_index: int, background: Background, width: int, height: int) -> Image.Image:
+    """Background fill plus master/layout decorations, composed once per layout and size."""
+    decorations = look.decorations.get(layout_index, ())
+    if background.image is None and not decorations:
+        return Image.new("RGB", (width, height), background.color)
+
+    key = (look.key, layout_index, background.color, background.image is not None, width, height)
+    with _background_lock:
+        cached = _background_images.get(key)
+        if cached is not None:
+            _background_images.move_to_end(key)
+            return cached.copy()
+
+    base = Image.new("RGB", (width, height), background.color)
+    if background.image is not None:
+        _paste_picture(base, background.image, (0, 0, width, height))
+    scale = width / look.slide_width
+    for d in decorations:
+        box = (int(d.left * scale), int(d.top * scale), int((d.left + d.width) * scale), int((d.top + d.height) * scale))
+        if d.image is not None:
+            _paste_picture(base, d.image, box, d.duotone)
+        elif d.alpha >= 1.0:
+            base.paste(d.color, box)
+        else:
+            overlay = Image.new("RGB", base.size, d.color)
+            mask = Image.new("L", base.size, 0)
+            mask.paste(int(d.alpha * 255), box)
+            base.paste(overlay, (0, 0), mask)
+
+    with _background_lock:
+        _background_images[key] = base
+        while len(_background_images) > 64:
+            _background_images.popitem(last=False)
+    return base.copy()
+
+
+def _wrap(text: str, font, width: int) -> List[str]:
+    lines: List[str] = []
+    for raw in text.split("\n"):
+        line = ""
+        for word in raw.split():
+            candidate = f"{line} {word}" if line else word
+            if font.length(candidate) <= width or not line:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+
+def _draw_text(img, box, paragraphs, font, size, color, bullet=False, center=False, middle=False):
+    x0, y0, x1, y1 = box
+    pad = max(size // 4, 1)
+    x0, x1 = x0 + pad, x1 - pad
+    indent = int(size * 0.9) if bullet else 0
+    line_height = int(size * 1.2)
+
+    lines = []  # (x offset, text, bullet dot before it)
+    for para in paragraphs:
+        for i, line in enumerate(_wrap(para, font, max(x1 - x0 - indent, 1))):
+            lines.append((indent, line, bullet and i == 0))
+
+    max_lines = max((y1 - y0) // line_height, 1)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        offset, last, dot = lines[-1]
+        lines[-1] = (offset, last.rstrip(" .") + "...", dot)
+
+    y = y0 + ((y1 - y0) - len(lines) * line_height) // 2 if middle else y0 + pad
+    radius = max(size // 6, 1)
+    draw = ImageDraw.Draw(img)
+    for offset, line, dot in lines:
+        x = x0 + offset
+        if dot:  # the default font has no bullet glyph
+            cx, cy = x0 + indent // 3, y + size // 2
+            draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius), fill=color)
+        if center:
+            x = x0 + max((x1 - x0 - int(font.length(line))) // 2, 0)
+        font.draw(img, (x, y), line, color)
+        y += line_height
+
+
+def _draw_picture_box(draw, box, accent: Color, background: Color) -> None:
+    x0, y0, x1, y1 = box
+    tint = tuple((a + b * 3) // 4 for a, b in zip(accent, background))
+    draw.rectangle(box, fill=tint, outline=accent, width=max((x1 - x0) // 80, 1))
+    draw.line((x0, y0, x1, y1), fill=accent)
+    draw.line((x0, y1, x1, y0), fill=accent)
+
+
+def _render(slide: dict, look: ThemeLook, style: DeckStyle, width: int) -> Image.Image:
+    height = max(round(width * look.slide_height / look.slide_width), 1)
+    scale = width / look.slide_width
+
+    def box(ph, fallback):
+        """Pixel box of a layout placeholder, else of the strategy's fallback (EMU)."""
+        left, top, w, h = (ph.left, ph.top, ph.width, ph.height) if ph is not None else fallback
+        return (int(left * scale), int(top * scale), int((left + w) * scale), int((top + h) * scale))
+
+    sw, sh = look.slide_width, look.slide_height
+    layout = slide.get("layout") or "title"
+    known = layout in ("title", "bullet", "two_column", "image")
+    info = look.layouts.for_slide(layout if known else "title")
+
+    background = look.backgrounds.get(info.index) or Background(_WHITE)
+    if style.background_color is not None:
+        background = Background(tuple(style.background_color))
+    img = _background_image(look, info.index, background, width, height)
+    draw = ImageDraw.Draw(img)
+
+    title_color = tuple(style.font_color) if style.font_color is not None else look.title_color
+    text_color = tuple(style.font_color) if style.font_color is not None else look.text_color
+    accent = tuple(style.accent_color) if style.accent_color is not None else look.accent_color
+
+    title_size = max(int(height * (0.1 if layout == "title" else 0.07)), 6)
+    body_size = max(int(height * 0.045), 5)
+    title_box = box(info.title, (int(sw * 0.05), int(sh * 0.04), int(sw * 0.9), int(sh * 0.16)))
+
+    if layout == "title" or not known:
+        title = slide.get("title", "") or ("Title" if known else "Slide")
+        center = info.title is not None and info.title.type == PP_PLACEHOLDER.CENTER_TITLE
+        _draw_text(img, title_box, [title], _font(title_size), title_size, title_color, center=center, middle=True)
+        footer = slide.get("footer_text")
+        if footer:
+            footer_box = box(None, (_INCH // 2, sh - int(_INCH * 0.7), sw - _INCH, _INCH // 2))
+            _draw_text(img, footer_box, [footer], _font(body_size), body_size, text_color)
+        return img
+
+    _draw_text(img, title_box, [slide.get("title", "") or ""], _font(title_size), title_size, title_color, middle=True)
+    body_font = _font(body_size)
+    bodies = info.bodies
+
+    if layout == "bullet":
+        if bodies:
+            _draw_text(img, box(bodies[0], None), slide.get("bullets", []) or [], body_font, body_size, text_color, bullet=True)
+    elif layout == "two_column":
+        for ph, key in zip(bodies[:2], ("left", "right")):
+            _draw_text(img, box(ph, None), [slide.get(key, "") or ""], body_font, body_size, text_color)
+    else:  # image
+        caption = slide.get("caption") or slide.get("description") or slide.get("title", "") or ""
+        if slide.get("image_url"):
+            picture_box = box(
+                bodies[0] if bodies else None,
+                (int(sw * 0.08), int(sh * 0.25), int(sw * 0.4), int(sw * 0.3)),
+            )
+            _draw_picture_box(draw, picture_box, accent, background.color)
+        caption_box = box(
+            bodies[1] if len(bodies) > 1 else None,
+            (int(sw * 0.55), int(sh * 0.25), int(sw * 0.35), int(sh * 0.5)),
+        )
+        paragraphs = split_into_paragraphs(caption, max_sentences_per_para=2) or [caption]
+        _draw_text(img, caption_box, paragraphs, body_font, body_size, text_color)
+    return img
+
+
+def _encode(img: Image.Image) -> bytes:
+    # JPEG: ~0.3 ms per thumbnail vs 2-8 ms for PNG on picture backgrounds,
+    # at a tenth of the size; no chroma subsampling keeps colored text crisp
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=JPEG_QUALITY, subsampling=0)
+    return buf.getvalue()
+
+
+# ---------------- Cache / public API ----------------
+
+_thumbs: "OrderedDict[str, bytes]" = OrderedDict()
+_thumbs_lock = threading.Lock()
+
+
+def _cached(key: str) -> Optional[bytes]:
+    with _thumbs_lock:
+        data = _thumbs.get(key)
+        if data is not None:
+            _thumbs.move_to_end(key)
+        return data
+
+
+def _store(key: str, data: bytes) -> None:
+    with _thumbs_lock:
+        _thumbs[key] = data
+        while len(_thumbs) > _CACHE_SIZE:
+            _thumbs.popitem(last=False)
+
+
+def clamp_width(width: Optional[int]) -> int:
+    return min(max(int(width or DEFAULT_WIDTH), MIN_WIDTH), MAX_WIDTH)
+
+
+def _deck_key(config: Optional[dict], width: int) -> dict:
+    config = config or {}
+    theme_id = config.get("theme_id") or "ppt1"
+    return {
+        "version": THUMBNAIL_VERSION,
+        "theme_id": theme_id,
+        "template_mtime": _template(theme_id)[1],
+        "style": DeckStyle.from_config(config).cache_key(),
+        "width": width,
+    }
+
+
+def thumbnail_key(slide: dict, config: Optional[dict], width: int = DEFAULT_WIDTH) -> str:
+    """Cache key / ETag of a slide thumbnail (cheap; nothing is drawn)."""
+    return render_cache.content_hash(
+        {**_deck_key(config, clamp_width(width)), "slide": render_cache.content_hash(slide)}
+    )
+
+
+def strip_key(slides: List[dict], config: Optional[dict], width: int = DEFAULT_WIDTH) -> str:
+    return render_cache.content_hash(
+        {
+            **_deck_key(config, clamp_width(width)),
+            "strip": [render_cache.content_hash(s) for s in slides],
+        }
+    )
+
+
+def render_thumbnail(slide: dict, config: Optional[dict], width: int = DEFAULT_WIDTH) -> bytes:
+    """JPEG preview of one slide as the theme/config would render it."""
+    width = clamp_width(width)
+    key = thumbnail_key(slide, config, width)
+    data = _cached(key)
+    if data is None:
+        config = config or {}
+        with tracing.span("thumbnail.render", width=width):
+            look = theme_look(config.get("theme_id") or "ppt1")
+            data = _encode(_render(slide, look, DeckStyle.from_config(config), width))
+        _store(key, data)
+    return data
+
+
+def render_strip(slides: List[dict], config: Optional[dict], width: int = DEFAULT_WIDTH) -> bytes:
+    """Every slide's thumbnail stacked top to bottom in one JPEG."""
+    width = clamp_width(width)
+    key = strip_key(slides, config, width)
+    data = _cached(key)
+    if data is not None:
+        return data
+
+    with tracing.span("thumbnail.strip", slides=len(slides), width=width):
+        tiles = [Image.open(io.BytesIO(render_thumbnail(s, config, width))) for s in slides]
+        if not tiles:
+            look = theme_look((config or {}).get("theme_id") or "ppt1")
+            height = max(round(width * look.slide_height / look.slide_width), 1)
+            tiles = [Image.new("RGB", (width, height), _STRIP_BACKGROUND)]
+        total = sum(t.height for t in tiles) + STRIP_GAP * (len(tiles) - 1)
+        strip = Image.new("RGB", (width, total), _STRIP_BACKGROUND)
+        y = 0
+        for tile in tiles:
+            strip.paste(tile, (0, y))
+            y += tile.height + STRIP_GAP
+        data = _encode(strip)
+    _store(key, data)
+    return data
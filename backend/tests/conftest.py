@@ -0,0 +1,61 @@
+# backend/tests/conftest.py
+
+import os
+import pathlib
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its config (database URL, quotas) at import time, so point it
+# at a scratch database and working directory before anything from the
+# backend is imported. Run from the backend directory:  python -m pytest tests
+_WORKDIR = tempfile.mkdtemp(prefix="ppt-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'app.db')}"
+os.environ.setdefault("GEMINI_API_KEY", "test")
+for _name in ("QUOTA_MAX_CONCURRENT", "QUOTA_REQUESTS_PER_MINUTE", "QUOTA_DAILY_TOKENS"):
+    os.environ[_name] = "0"
+os.chdir(_WORKDIR)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    from core.dbutils import SessionLocal
+    from models import models
+    from routers.auth_bridge import get_current_user
+    from services import docx_generator
+
+    # exports go to the scratch directory, not the tracked backend/storage/docs
+    docx_generator.DOC_STORAGE_DIR = pathlib.Path(_WORKDIR, "storage", "docs")
+    docx_generator.DOC_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+
+    main.init_db()
+    db = SessionLocal()
+    user = models.User(email="tests@example.com", hashed_password="not_used")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    main.app.dependency_overrides[get_current_user] = lambda: user
+    yield main.app
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user(app):
+    """The user every request in the tests is authenticated as."""
+    from routers.auth_bridge import get_current_user
+
+    return app.dependency_overrides[get_current_user]()
@@ -0,0 +1,182 @@
+# backend/tests/test_artifacts.py
+
+import hashlib
+import io
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import Artifact
+from services import artifacts
+
+
+class _NotFound(Exception):
+    def __init__(self):
+        super().__init__("Not Found")
+        self.response = {"Error": {"Code": "404"}}
+
+
+class FakeS3:
+    """In-memory stand-in for the boto3 S3 client calls S3ArtifactStore makes."""
+
+    def __init__(self, page_size: int = 1000):
+        self.objects = {}
+        self.uploads = 0
+        self.ranges = []
+        self.page_size = page_size
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise _NotFound()
+        return {"ContentLength": len(self.objects[Key])}
+
+    def upload_fileobj(self, fileobj, Bucket, Key, ExtraArgs=None):
+        self.objects[Key] = fileobj.read()
+        self.uploads += 1
+
+    def get_object(self, Bucket, Key, Range=None):
+        if Key not in self.objects:
+            raise _NotFound()
+        data = self.objects[Key]
+        self.ranges.append(Range)
+        if Range is not None:
+            first, last = re.match(r"^bytes=(\d+)-(\d*)$", Range).groups()
+            data = data[int(first): int(last) + 1 if last else None]
+        return {"Body": io.BytesIO(data)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None):
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start: start + self.page_size]
+        modified = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        result = {
+            "Contents": [{"Key": k, "Size": len(self.objects[k]), "LastModified": modified} for k in page],
+            "IsTruncated": start + self.page_size < len(keys),
+        }
+        if result["IsTruncated"]:
+            result["NextContinuationToken"] = str(start + self.page_size)
+        return result
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.example/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+@pytest.fixture
+def s3():
+    client = FakeS3(page_size=2)
+    artifacts.set_store(artifacts.S3ArtifactStore("bucket", prefix="artifacts", client=client))
+    yield client
+    artifacts.set_store(None)
+
+
+def _rendered(tmp_path, name: str, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+# ---------------- publish ----------------
+
+def test_publish_stores_identical_bytes_once(app, s3, tmp_path):
+    data = b"rendered deck bytes"
+    digest = hashlib.sha256(data).hexdigest()
+    db = SessionLocal()
+    try:
+        first = artifacts.publish(db, "pptx", 9001, "default", "v1", _rendered(tmp_path, "a.pptx", data))
+        second = artifacts.publish(db, "pptx", 9002, "default", "v1", _rendered(tmp_path, "b.pptx", data))
+        db.commit()
+        assert first.storage_key == second.storage_key == f"{digest[:2]}/{digest}.pptx"
+        assert s3.uploads == 1
+        assert s3.objects[f"artifacts/{first.storage_key}"] == data
+
+        # re-publishing the same object moves its row to the new version
+        changed = b"edited deck bytes"
+        again = artifacts.publish(db, "pptx", 9001, "default", "v2", _rendered(tmp_path, "a.pptx", changed))
+        db.commit()
+        assert again.id == first.id
+        assert (again.version_key, again.size) == ("v2", len(changed))
+        assert s3.uploads == 2
+        assert db.query(Artifact).filter(Artifact.object_id.in_([9001, 9002])).count() == 2
+
+        assert artifacts.current(db, "pptx", 9001, "default", "v1") is None
+        assert artifacts.current(db, "pptx", 9001, "default", "v2").digest == hashlib.sha256(changed).hexdigest()
+    finally:
+        db.close()
+    # publishing works on a private copy, which it removes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pptx", "b.pptx"]
+
+
+def test_s3_store_lists_every_page(s3):
+    store = artifacts.get_store()
+    for name in ("aa/one.pptx", "bb/two.pptx", "cc/three.docx"):
+        s3.objects[f"artifacts/{name}"] = b"x" * len(name)
+    s3.objects["elsewhere/four.pptx"] = b"not ours"
+
+    assert sorted(key for key, _, _ in store.iter_keys()) == ["aa/one.pptx", "bb/two.pptx", "cc/three.docx"]
+    assert store.exists("aa/one.pptx") and not store.exists("aa/missing.pptx")
+    store.delete("aa/one.pptx")
+    assert not store.exists("aa/one.pptx")
+
+
+# ---------------- downloads ----------------
+
+def _download_url(client) -> str:
+    slides = [
+        {"layout": "title", "title": "Remote"},
+        {"layout": "bullet", "title": "Points", "bullets": ["one", "two", "three"]},
+    ]
+    created = client.post("/api/v1/presentations/", json={"topic": "Remote", "custom_content": slides})
+    assert created.status_code == 200, created.text
+    return f"/api/v1/presentations/{created.json()['presentation_id']}/download"
+
+
+def test_s3_download_streams_and_resumes(client, s3):
+    url = _download_url(client)
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert int(full.headers["content-length"]) == len(full.content)
+    tag, size = full.headers["etag"], len(full.content)
+    assert s3.uploads == 1
+
+    # served from the store, not rendered or uploaded again
+    assert client.get(url).content == full.content
+    assert s3.uploads == 1
+
+    resumed = client.get(url, headers={"Range": "bytes=100-", "If-Range": tag})
+    assert resumed.status_code == 206
+    assert resumed.content == full.content[100:]
+    assert resumed.headers["content-range"] == f"bytes 100-{size - 1}/{size}"
+    assert s3.ranges[-1] == f"bytes=100-{size - 1}"  # only the range left the store
+
+    suffix = client.get(url, headers={"Range": "bytes=-64"})
+    assert suffix.status_code == 206
+    assert suffix.content == full.content[-64:]
+
+    stale = client.get(url, headers={"Range": "bytes=100-", "If-Range": '"an-older-build"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
+
+    past_end = client.get(url, headers={"Range": f"bytes={size}-"})
+    assert past_end.status_code == 416
+    assert past_end.headers["content-range"] == f"bytes */{size}"
+
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+
+
+def test_s3_direct_download_redirects_to_a_presigned_url(client, s3, monkeypatch):
+    url = _download_url(client)
+    client.get(url)
+
+    monkeypatch.setattr(Config, "ARTIFACT_DIRECT_DOWNLOADS", True)
+    redirect = client.get(url, follow_redirects=False)
+    assert redirect.status_code == 307
+    assert redirect.headers["location"].startswith("https://s3.example/bucket/artifacts/")
+    assert redirect.headers["cache-control"] == "private, no-store"
@@ -0,0 +1,137 @@
+# backend/tests/test_compression.py
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from core import compression
+
+BIG = {"items": ["slide text"] * 200}
+TAG = '"deck-1"'
+
+
+def _app() -> compression.CompressionMiddleware:
+    def json_body(request):
+        return JSONResponse(BIG, headers={"ETag": TAG})
+
+    def small(request):
+        return JSONResponse({"ok": True})
+
+    def download(request):
+        return Response(b"PK" * 2000, media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation")
+
+    def partial(request):
+        return Response(b"x" * 2000, status_code=206, media_type="text/plain", headers={"Content-Range": "bytes 0-1999/4000"})
+
+    def streamed(request):
+        return StreamingResponse((b"line of text\n" * 100 for _ in range(3)), media_type="text/plain")
+
+    routes = [
+        Route("/json", json_body),
+        Route("/small", small),
+        Route("/download", download),
+        Route("/partial", partial),
+        Route("/stream", streamed),
+    ]
+    return compression.CompressionMiddleware(Starlette(routes=routes), minimum_size=1024, cache_size=8)
+
+
+def _get(app, path: str, encoding: str = "gzip", **headers):
+    # iter_raw: the bytes as the middleware sent them, not decoded by the client
+    with TestClient(app) as client:
+        with client.stream("GET", path, headers={"Accept-Encoding": encoding, **headers}) as response:
+            raw = b"".join(response.iter_raw())
+    return response, raw
+
+
+# ---------------- negotiate ----------------
+
+@pytest.mark.parametrize(
+    "header, with_brotli, expected",
+    [
+        ("gzip", False, "gzip"),
+        ("gzip, deflate, br", False, "gzip"),
+        ("gzip, deflate, br", True, "br"),
+        ("br;q=0.5, gzip", True, "gzip"),
+        ("gzip;q=0", False, None),
+        ("*", False, "gzip"),
+        ("*, gzip;q=0", False, None),
+        ("identity", True, None),
+        ("gzip;q=nonsense", False, None),
+        ("", False, None),
+    ],
+)
+def test_negotiate(header, with_brotli, expected, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object() if with_brotli else None)
+    assert compression.negotiate(header) == expected
+
+
+# ---------------- middleware ----------------
+
+def test_json_is_gzipped_with_a_weak_etag():
+    response, raw = _get(_app(), "/json")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f"W/{TAG}"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) == len(raw)
+    assert gzip.decompress(raw) == JSONResponse(BIG).body
+
+
+def test_no_accept_encoding_gets_the_identity_body():
+    response, raw = _get(_app(), "/json", encoding="identity")
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == TAG
+    assert raw == JSONResponse(BIG).body
+
+
+@pytest.mark.parametrize("path", ["/small", "/download", "/partial"])
+def test_small_binary_and_partial_bodies_pass_through(path):
+    response, raw = _get(_app(), path)
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(raw)
+
+
+def test_streamed_body_is_compressed_as_it_goes():
+    response, raw = _get(_app(), "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == b"line of text\n" * 300
+
+
+def test_bodies_with_an_etag_are_compressed_once(monkeypatch):
+    app = _app()
+    calls = []
+    compress = compression.compress
+
+    def counting_compress(body, encoding):
+        calls.append(encoding)
+        return compress(body, encoding)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+
+    first = _get(app, "/json")[1]
+    assert _get(app, "/json")[1] == first
+    assert calls == ["gzip"]
+
+
+# ---------------- through the app ----------------
+
+def test_weakened_etag_revalidates_to_304(client):
+    slides = [{"layout": "bullet", "title": f"Point {n}", "bullets": ["detail"] * 8} for n in range(12)]
+    created = client.post("/api/v1/presentations/", json={"topic": "Compressed", "custom_content": slides})
+    assert created.status_code == 200, created.text
+    url = f"/api/v1/presentations/{created.json()['presentation_id']}"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    tag = response.headers["etag"]
+    assert tag.startswith('W/"')
+
+    revalidated = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"].removeprefix("W/") == tag.removeprefix("W/")
@@ -0,0 +1,66 @@
+# backend/tests/test_document_queries.py
+
+import pytest
+
+from core.dbutils import count_queries
+
+# Statements per document route; must not grow with the number of sections.
+QUERY_BUDGET = {"create": 10, "get": 3, "refine": 10}
+
+
+@pytest.fixture(autouse=True)
+def fake_gemini(monkeypatch):
+    import routers.documents as documents
+
+    def sections(topic, section_headings):
+        return [
+            {"heading": h, "order_index": i + 1, "content": f"Content for {h}."}
+            for i, h in enumerate(section_headings)
+        ]
+
+    def refine(topic, heading, current_content, instruction):
+        return f"{current_content or ''}\nRefined: {instruction}"
+
+    monkeypatch.setattr(documents, "generate_word_sections_with_gemini", sections)
+    monkeypatch.setattr(documents, "refine_word_section_with_gemini", refine)
+
+
+def _route_queries(client, num_sections: int) -> dict:
+    body = {
+        "title": "Report",
+        "topic": "Quarterly results",
+        "doc_type": "docx",
+        "sections": [{"title": f"Section {i}", "order_index": i + 1} for i in range(num_sections)],
+    }
+    counts = {}
+
+    with count_queries() as counter:
+        response = client.post("/api/v1/documents/", json=body)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["sections"]) == num_sections
+    counts["create"] = counter.count
+    project_id = response.json()["id"]
+
+    with count_queries() as counter:
+        response = client.get(f"/api/v1/documents/{project_id}")
+    assert response.status_code == 200, response.text
+    counts["get"] = counter.count
+    section_id = response.json()["sections"][-1]["id"]
+
+    with count_queries() as counter:
+        response = client.post(
+            f"/api/v1/documents/{project_id}/sections/{section_id}/refine",
+            json={"prompt": "shorter"},
+        )
+    assert response.status_code == 200, response.text
+    counts["refine"] = counter.count
+    return counts
+
+
+def test_document_routes_query_count_does_not_grow_with_sections(client):
+    one = _route_queries(client, 1)
+    many = _route_queries(client, 12)
+
+    assert one == many
+    for route, count in many.items():
+        assert count <= QUERY_BUDGET[route], f"{route}: {count} queries"
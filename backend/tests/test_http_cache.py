@@ -0,0 +1,119 @@
+# backend/tests/test_http_cache.py
+
+import pytest
+from starlette.requests import Request
+
+from core import http_cache
+
+BODY = bytes(range(100))
+TAG = http_cache.etag("test", 1)
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _respond(**headers):
+    return http_cache.content_response(_request(**headers), TAG, lambda: BODY, "application/octet-stream")
+
+
+# ---------------- byte_range ----------------
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 10)),
+        ("bytes=90-", (90, 100)),
+        ("bytes=95-200", (95, 100)),
+        ("bytes=-10", (90, 100)),  # suffix: the last 10 bytes
+        ("bytes=-500", (0, 100)),  # suffix longer than the body: all of it
+        ("bytes=0-1,5-6", None),  # several ranges: answered with a full 200
+        ("bytes=9-3", None),
+        ("items=0-9", None),
+        ("bytes=-", None),
+    ],
+)
+def test_byte_range(header, expected):
+    assert http_cache.byte_range(header, len(BODY)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-160", "bytes=-0"])
+def test_byte_range_not_satisfiable(header):
+    with pytest.raises(http_cache.RangeNotSatisfiable):
+        http_cache.byte_range(header, len(BODY))
+
+
+# ---------------- content_response ----------------
+
+def test_suffix_range_is_partial():
+    response = _respond(range="bytes=-10")
+    assert response.status_code == 206
+    assert response.body == BODY[-10:]
+    assert response.headers["content-range"] == "bytes 90-99/100"
+
+
+def test_range_past_the_end_is_416():
+    response = _respond(range="bytes=100-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_multi_range_gets_the_full_body():
+    response = _respond(range="bytes=0-1,5-6")
+    assert response.status_code == 200
+    assert response.body == BODY
+
+
+def test_if_range_must_name_the_current_tag():
+    matching = _respond(range="bytes=10-19", if_range=TAG)
+    assert matching.status_code == 206
+    assert matching.body == BODY[10:20]
+
+    stale = _respond(range="bytes=10-19", if_range='"an-older-build"')
+    assert stale.status_code == 200
+    assert stale.body == BODY
+
+
+def test_if_none_match_skips_rendering():
+    def render():
+        raise AssertionError("rendered despite a matching If-None-Match")
+
+    response = http_cache.content_response(_request(if_none_match=TAG), TAG, render, "image/jpeg")
+    assert response.status_code == 304
+    assert response.headers["etag"] == TAG
+
+
+# ---------------- downloads ----------------
+
+def test_download_resumes_only_against_the_same_bytes(client):
+    slides = [
+        {"layout": "title", "title": "Ranges"},
+        {"layout": "bullet", "title": "Points", "bullets": ["one", "two"]},
+    ]
+    created = client.post("/api/v1/presentations/", json={"topic": "Ranges", "custom_content": slides})
+    assert created.status_code == 200, created.text
+    url = f"/api/v1/presentations/{created.json()['presentation_id']}/download"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    tag = full.headers["etag"]
+    size = len(full.content)
+
+    resumed = client.get(url, headers={"Range": "bytes=100-", "If-Range": tag})
+    assert resumed.status_code == 206
+    assert resumed.content == full.content[100:]
+    assert resumed.headers["content-range"] == f"bytes 100-{size - 1}/{size}"
+
+    suffix = client.get(url, headers={"Range": "bytes=-64"})
+    assert suffix.status_code == 206
+    assert suffix.content == full.content[-64:]
+
+    stale = client.get(url, headers={"Range": "bytes=100-", "If-Range": '"an-older-build"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
+
+    past_end = client.get(url, headers={"Range": f"bytes={size}-"})
+    assert past_end.status_code == 416
+
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
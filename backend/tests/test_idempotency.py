@@ -0,0 +1,196 @@
+# backend/tests/test_idempotency.py
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import IdempotencyKey, Presentation
+from services import idempotency
+
+URL = "/api/v1/presentations/"
+
+
+class HeldGeneration:
+    """Stands in for Gemini: counts calls and blocks until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, topic, num_slides):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(10)
+        return [{"layout": "title", "title": topic}]
+
+
+@pytest.fixture
+def generation(monkeypatch):
+    import routers.presentations as presentations
+
+    held = HeldGeneration()
+    monkeypatch.setattr(presentations, "generate_content_with_gemini", held)
+    return held
+
+
+def _key() -> dict:
+    return {idempotency.HEADER: uuid.uuid4().hex}
+
+
+def _presentations(topic: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Presentation).filter(Presentation.topic == topic).count()
+    finally:
+        db.close()
+
+
+def _row(user_id: int, key: str) -> IdempotencyKey:
+    db = SessionLocal()
+    try:
+        return db.query(IdempotencyKey).filter_by(user_id=user_id, key=key).first()
+    finally:
+        db.close()
+
+
+def test_overlapping_requests_run_once(client, generation, monkeypatch):
+    attempts = []
+    try_claim = idempotency._try_claim
+
+    def recording_try_claim(*args):
+        result = try_claim(*args)
+        attempts.append(type(result).__name__)
+        return result
+
+    monkeypatch.setattr(idempotency, "_try_claim", recording_try_claim)
+    headers = _key()
+    body = {"topic": f"Overlap {uuid.uuid4().hex}", "num_slides": 1}
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(client.post, URL, json=body, headers=headers)
+        assert generation.started.wait(10)
+        second = pool.submit(client.post, URL, json=body, headers=headers)
+        # the duplicate found the key pending and is polling it
+        deadline = time.monotonic() + 10
+        while "NoneType" not in attempts and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "NoneType" in attempts
+        generation.release.set()
+        first, second = first.result(), second.result()
+
+    assert generation.calls == 1
+    assert _presentations(body["topic"]) == 1
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert attempts[0] == "Claim" and attempts[-1] == "Stored"
+
+
+def test_duplicate_still_running_gets_409(client, generation, monkeypatch):
+    monkeypatch.setattr(Config, "IDEMPOTENCY_WAIT_TIMEOUT", 0.2)
+    headers = _key()
+    body = {"topic": "Slow", "num_slides": 1}
+
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(client.post, URL, json=body, headers=headers)
+        assert generation.started.wait(10)
+        try:
+            duplicate = client.post(URL, json=body, headers=headers)
+        finally:
+            generation.release.set()
+        assert first.result().status_code == 200
+
+    assert duplicate.status_code == 409
+    assert duplicate.headers["retry-after"] == "5"
+    assert generation.calls == 1
+
+
+def test_same_key_for_another_request_is_422(client, generation):
+    generation.release.set()
+    headers = _key()
+    assert client.post(URL, json={"topic": "First", "num_slides": 1}, headers=headers).status_code == 200
+
+    other = client.post(URL, json={"topic": "Second", "num_slides": 1}, headers=headers)
+    assert other.status_code == 422
+    assert generation.calls == 1
+
+
+def test_failed_request_lets_a_retry_run(app, user, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import routers.presentations as presentations
+
+    outcomes = [RuntimeError("Gemini unavailable"), [{"layout": "title", "title": "Retried"}]]
+
+    def flaky(topic, num_slides):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(presentations, "generate_content_with_gemini", flaky)
+    headers = _key()
+    body = {"topic": "Flaky", "num_slides": 1}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.post(URL, json=body, headers=headers).status_code == 500
+        assert _row(user.id, headers[idempotency.HEADER]) is None
+        retried = client.post(URL, json=body, headers=headers)
+    assert retried.status_code == 200
+    assert "idempotent-replayed" not in retried.headers
+    assert outcomes == []
+
+
+def test_expired_keys_are_purged_and_reusable(client, user, generation):
+    generation.release.set()
+    headers = _key()
+    key = headers[idempotency.HEADER]
+    body = {"topic": "Expiring", "num_slides": 1}
+    assert client.post(URL, json=body, headers=headers).status_code == 200
+
+    db = SessionLocal()
+    try:
+        fresh = IdempotencyKey(user_id=user.id, key=f"fresh-{key}", fingerprint="x", status="done")
+        abandoned = IdempotencyKey(user_id=user.id, key=f"abandoned-{key}", fingerprint="x", status="pending")
+        db.add_all([fresh, abandoned])
+        db.commit()
+        now = datetime.now()
+        for row_key, age in (
+            (key, Config.IDEMPOTENCY_TTL + 60),
+            (f"abandoned-{key}", Config.IDEMPOTENCY_PENDING_TIMEOUT + 60),
+        ):
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user.id, IdempotencyKey.key == row_key)
+                .values(updated_at=now - timedelta(seconds=age))
+            )
+        db.commit()
+
+        # an expired key is claimed afresh: the request runs again
+        again = client.post(URL, json=body, headers=headers)
+        assert again.status_code == 200
+        assert "idempotent-replayed" not in again.headers
+        assert generation.calls == 2
+
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user.id, IdempotencyKey.key == key)
+            .values(updated_at=now - timedelta(seconds=Config.IDEMPOTENCY_TTL + 60))
+        )
+        db.commit()
+        assert idempotency.purge_expired(db) >= 2
+        db.commit()
+    finally:
+        db.close()
+
+    assert _row(user.id, key) is None
+    assert _row(user.id, f"abandoned-{key}") is None
+    assert _row(user.id, f"fresh-{key}") is not None
@@ -0,0 +1,17 @@
+# backend/tests/test_import_time.py
+
+import statistics
+
+import bench
+
+
+def test_cold_import_stays_within_budget():
+    runs = [bench._import_main_once() for _ in range(3)]
+
+    eager = [name for name in bench.LAZY_MODULES if name in runs[-1]]
+    assert not eager, f"imported at startup but should be lazy: {eager}"
+
+    median_ms = statistics.median(run["main"] for run in runs) / 1000
+    assert median_ms <= bench.IMPORT_BUDGET_MS, (
+        f"cold `import main` takes {median_ms:.0f} ms, over the {bench.IMPORT_BUDGET_MS} ms budget"
+    )
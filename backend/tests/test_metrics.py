@@ -0,0 +1,109 @@
+# backend/tests/test_metrics.py
+
+from types import SimpleNamespace
+
+from core import metrics
+
+ROUTE = "/api/v1/presentations/{presentation_id}"
+
+
+def _samples(text: str) -> dict:
+    """Exposition text -> {'name{labels}': value} (comments skipped)."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = float(value)
+    return samples
+
+
+def _scrape(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    return _samples(response.text)
+
+
+# ---------------- exposition format ----------------
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.Registry()
+    requests = registry.counter("demo_requests_total", "Requests.", ("path",))
+    in_flight = registry.gauge("demo_in_flight", "In flight.")
+    latency = registry.histogram("demo_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+
+    requests.inc(path='/a "quoted"\\path')
+    requests.inc(2, path='/a "quoted"\\path')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, op="x")
+
+    text = registry.render()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert lines[:2] == ["# HELP demo_requests_total Requests.", "# TYPE demo_requests_total counter"]
+    assert "# TYPE demo_in_flight gauge" in lines
+    assert "# TYPE demo_seconds histogram" in lines
+    assert _samples(text) == {
+        'demo_requests_total{path="/a \\"quoted\\"\\\\path"}': 3,
+        "demo_in_flight": 1,
+        # buckets are cumulative; a value on a bound falls in that bucket
+        'demo_seconds_bucket{op="x",le="0.1"}': 2,
+        'demo_seconds_bucket{op="x",le="1"}': 3,
+        'demo_seconds_bucket{op="x",le="+Inf"}': 4,
+        'demo_seconds_sum{op="x"}': 3.65,
+        'demo_seconds_count{op="x"}': 4,
+    }
+
+
+# ---------------- /metrics ----------------
+
+def test_requests_are_counted_by_route_template(client):
+    created = client.post(
+        "/api/v1/presentations/",
+        json={"topic": "Metrics", "custom_content": [{"layout": "title", "title": "Cover"}]},
+    )
+    assert created.status_code == 200, created.text
+    url = f"/api/v1/presentations/{created.json()['presentation_id']}"
+
+    before = _scrape(client)
+    assert client.get(url).status_code == 200
+    assert client.get("/no/such/route").status_code == 404
+    after = _scrape(client)
+
+    def delta(series):
+        return after.get(series, 0) - before.get(series, 0)
+
+    assert delta(f'http_requests_total{{method="GET",route="{ROUTE}",status="200"}}') == 1
+    assert delta('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert delta(f'http_request_duration_seconds_count{{method="GET",route="{ROUTE}"}}') == 1
+    assert delta(f'db_queries_per_request_count{{route="{ROUTE}"}}') == 1
+    assert delta(f'db_queries_per_request_sum{{route="{ROUTE}"}}') >= 1
+    assert delta("db_queries_total") >= 1
+    # the only request in flight while scraping is the scrape itself
+    assert after["http_requests_in_flight"] == 1
+
+
+def test_llm_calls_and_renders_are_exposed(client, tmp_path):
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+    metrics.record_llm_call("test_op", 0.3, ok=True, response=SimpleNamespace(usage_metadata=usage))
+    metrics.record_llm_call("test_op", 0.1, ok=False)
+
+    @metrics.instrument_render("test_kind")
+    def render():
+        path = tmp_path / "out.bin"
+        path.write_bytes(b"x" * 20_000)
+        return str(path)
+
+    render()
+    samples = _scrape(client)
+    assert samples['llm_requests_total{operation="test_op",status="ok"}'] == 1
+    assert samples['llm_requests_total{operation="test_op",status="error"}'] == 1
+    assert samples['llm_tokens_total{operation="test_op",kind="prompt"}'] == 120
+    assert samples['llm_tokens_total{operation="test_op",kind="completion"}'] == 30
+    assert samples['llm_request_duration_seconds_count{operation="test_op"}'] == 2
+    assert samples['render_duration_seconds_count{kind="test_kind"}'] == 1
+    assert samples['render_output_bytes_bucket{kind="test_kind",le="16000"}'] == 0
+    assert samples['render_output_bytes_bucket{kind="test_kind",le="64000"}'] == 1
@@ -0,0 +1,145 @@
+# backend/tests/test_quotas.py
+
+from datetime import datetime, timezone
+
+import pytest
+
+from core.dbutils import SessionLocal
+from models.models import UserUsage
+from services import quotas
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self.now = start.timestamp()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _usage(user_id: int, day: str):
+    db = SessionLocal()
+    try:
+        row = db.query(UserUsage).filter(UserUsage.user_id == user_id, UserUsage.day == day).first()
+        return (row.requests, row.tokens) if row else None
+    finally:
+        db.close()
+
+
+# ---------------- QuotaManager ----------------
+
+def test_charge_within_the_daily_budget(user):
+    clock = FakeClock(datetime(2030, 1, 1, 12, tzinfo=timezone.utc))
+    manager = quotas.QuotaManager(max_concurrent=0, requests_per_minute=0, daily_tokens=100, clock=clock)
+
+    ticket = manager.acquire(user.id)
+    assert ticket.headers["X-Quota-Tokens-Remaining"] == "100"
+    assert ticket.headers["X-Quota-Tokens-Reset"] == str(12 * 3600)
+    ticket.charge(40)
+    ticket.release()
+    assert _usage(user.id, "2030-01-01") == (1, 40)
+
+    ticket = manager.acquire(user.id)
+    assert ticket.headers["X-Quota-Tokens-Remaining"] == "60"
+    ticket.release()
+    assert _usage(user.id, "2030-01-01") == (2, 40)
+
+
+def test_over_the_limit_is_rejected(user):
+    clock = FakeClock(datetime(2030, 1, 2, 12, tzinfo=timezone.utc))
+    manager = quotas.QuotaManager(max_concurrent=0, requests_per_minute=2, daily_tokens=100, clock=clock)
+
+    manager.acquire(user.id).release()
+    clock.advance(15)
+    ticket = manager.acquire(user.id)
+    assert ticket.headers["X-RateLimit-Remaining"] == "0"
+    ticket.release()
+
+    with pytest.raises(quotas.QuotaExceeded) as exceeded:
+        manager.acquire(user.id)
+    assert exceeded.value.limit == "requests per minute"
+    assert exceeded.value.retry_after == 45  # the first request leaves the window then
+
+    # a new manager shares the day's usage through the database
+    spent = quotas.QuotaManager(max_concurrent=0, requests_per_minute=0, daily_tokens=100, clock=clock)
+    ticket = spent.acquire(user.id)
+    ticket.charge(100)
+    ticket.release()
+    with pytest.raises(quotas.QuotaExceeded) as exceeded:
+        spent.acquire(user.id)
+    assert exceeded.value.limit == "daily token budget"
+    assert exceeded.value.retry_after == 12 * 3600 - 15  # until the UTC day ends
+
+
+def test_concurrent_slot_is_released(user):
+    clock = FakeClock(datetime(2030, 1, 3, tzinfo=timezone.utc))
+    manager = quotas.QuotaManager(max_concurrent=1, requests_per_minute=0, daily_tokens=0, clock=clock)
+
+    ticket = manager.acquire(user.id)
+    with pytest.raises(quotas.QuotaExceeded) as exceeded:
+        manager.acquire(user.id)
+    assert exceeded.value.limit == "concurrent generations"
+
+    ticket.release()
+    ticket.release()  # idempotent: frees one slot, not two
+    manager.acquire(user.id)
+    with pytest.raises(quotas.QuotaExceeded):
+        manager.acquire(user.id)
+
+
+def test_windows_reset(user):
+    clock = FakeClock(datetime(2030, 1, 4, 23, 59, 30, tzinfo=timezone.utc))
+    manager = quotas.QuotaManager(max_concurrent=0, requests_per_minute=1, daily_tokens=10, clock=clock)
+
+    ticket = manager.acquire(user.id)
+    ticket.charge(10)
+    ticket.release()
+    with pytest.raises(quotas.QuotaExceeded) as exceeded:
+        manager.acquire(user.id)
+    assert exceeded.value.limit == "requests per minute"
+
+    clock.advance(59)
+    with pytest.raises(quotas.QuotaExceeded):
+        manager.acquire(user.id)
+
+    # a minute later the request window is clear, and it is a new UTC day
+    clock.advance(1)
+    ticket = manager.acquire(user.id)
+    assert ticket.day == "2030-01-05"
+    assert ticket.headers["X-Quota-Tokens-Remaining"] == "10"
+    ticket.release()
+    assert _usage(user.id, "2030-01-04") == (1, 10)
+    assert _usage(user.id, "2030-01-05") == (1, 0)
+
+
+# ---------------- routes ----------------
+
+def test_failed_generation_releases_its_slot(app, user, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import routers.presentations as presentations
+
+    def failing(topic, num_slides):
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(presentations, "generate_content_with_gemini", failing)
+    clock = FakeClock(datetime(2030, 1, 6, tzinfo=timezone.utc))
+    quotas.set_manager(quotas.QuotaManager(max_concurrent=1, requests_per_minute=2, daily_tokens=0, clock=clock))
+    try:
+        with TestClient(app, raise_server_exceptions=False) as client:
+            body = {"topic": "Quota", "num_slides": 2}
+            first = client.post("/api/v1/presentations/", json=body)
+            assert first.status_code == 500
+            # the failed request gave its concurrency slot back...
+            second = client.post("/api/v1/presentations/", json=body)
+            assert second.status_code == 500
+            # ...but still counted against the per-minute window
+            third = client.post("/api/v1/presentations/", json=body)
+            assert third.status_code == 429
+            assert third.headers["retry-after"] == "60"
+            assert third.headers["x-ratelimit-remaining"] == "0"
+    finally:
+        quotas.set_manager(None)
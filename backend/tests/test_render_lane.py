@@ -0,0 +1,60 @@
+# backend/tests/test_render_lane.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import scheduler
+from core.config import Config
+
+
+@pytest.fixture
+def single_render_slot(monkeypatch):
+    """A render lane with one slot and no queue, so a second render is turned away."""
+    monkeypatch.setattr(Config, "SCHED_RENDER_CONCURRENCY", 1)
+    monkeypatch.setattr(Config, "SCHED_RENDER_QUEUE", 0)
+    scheduler.reset()
+    yield
+    scheduler.reset()
+
+
+def _deck(client, title: str) -> str:
+    created = client.post(
+        "/api/v1/presentations/",
+        json={"topic": title, "custom_content": [{"layout": "title", "title": title}]},
+    )
+    assert created.status_code == 200, created.text
+    return f"/api/v1/presentations/{created.json()['presentation_id']}/download"
+
+
+def test_only_renders_wait_for_the_render_lane(client, single_render_slot, monkeypatch):
+    import services.pptx_generator as pptx_generator
+
+    cached_url, busy_url, other_url = (_deck(client, t) for t in ("Cached", "Busy", "Other"))
+    cached = client.get(cached_url)
+    assert cached.status_code == 200
+
+    started, release = threading.Event(), threading.Event()
+    build_pptx = pptx_generator.build_pptx
+
+    def held_build(*args, **kwargs):
+        started.set()
+        assert release.wait(10)
+        return build_pptx(*args, **kwargs)
+
+    monkeypatch.setattr(pptx_generator, "build_pptx", held_build)
+    with ThreadPoolExecutor(1) as pool:
+        busy = pool.submit(client.get, busy_url)
+        try:
+            assert started.wait(10)
+            # the lane's only slot is taken: cached answers still go through...
+            assert client.get(cached_url, headers={"If-None-Match": cached.headers["etag"]}).status_code == 304
+            assert client.get(cached_url).content == cached.content
+            # ...while another render is turned away
+            rejected = client.get(other_url)
+            assert rejected.status_code == 429
+            assert "retry-after" in rejected.headers
+        finally:
+            release.set()
+        assert busy.result().status_code == 200
@@ -0,0 +1,132 @@
+# backend/tests/test_search.py
+
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.dbutils import SessionLocal, engine
+from models.models import Presentation, User
+from services import search_index
+
+URL = "/api/v1/search"
+
+
+def _deck(client, topic: str, *bullets: str) -> int:
+    slides = [
+        {"layout": "title", "title": "Cover"},
+        {"layout": "bullet", "title": "Notes", "bullets": list(bullets) or ["nothing to see"]},
+    ]
+    created = client.post("/api/v1/presentations/", json={"topic": topic, "custom_content": slides})
+    assert created.status_code == 200, created.text
+    return created.json()["presentation_id"]
+
+
+def _document(client, title: str, topic: str) -> int:
+    created = client.post(
+        "/api/v1/documents/",
+        json={"title": title, "topic": topic, "doc_type": "docx", "sections": []},
+    )
+    assert created.status_code == 200, created.text
+    return created.json()["id"]
+
+
+def _give_away(presentation_id: int) -> None:
+    """Hand a deck to another user and re-index it under them."""
+    db = SessionLocal()
+    try:
+        other = User(email=f"other-{uuid.uuid4().hex}@example.com", hashed_password="not_used")
+        db.add(other)
+        db.flush()
+        presentation = db.get(Presentation, presentation_id)
+        presentation.owner_id = other.id
+        search_index.index_presentation(db, presentation)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _found(client, q: str, **params) -> list:
+    response = client.get(URL, params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [(item["type"], item["id"]) for item in response.json()["items"]]
+
+
+@pytest.fixture(autouse=True)
+def fake_gemini(monkeypatch):
+    import routers.documents as documents
+
+    monkeypatch.setattr(documents, "generate_word_sections_with_gemini", lambda topic, section_headings: [])
+
+
+@pytest.fixture
+def word():
+    """A search term no other test's data contains."""
+    return f"zq{uuid.uuid4().hex[:8]}"
+
+
+# ---------------- FTS5 ----------------
+
+def test_search_only_sees_the_users_own_items(client, word):
+    mine = _deck(client, f"Mine {word}")
+    theirs = _deck(client, f"Theirs {word}")
+    _give_away(theirs)
+
+    assert _found(client, word) == [("pptx", mine)]
+
+
+def test_search_matches_slide_text_prefixes_and_ranks_titles_first(client, word):
+    in_body = _deck(client, "Roadmap", f"ship {word} next quarter")
+    in_title = _deck(client, f"All about {word}")
+    project = _document(client, f"Report on {word}", "Planning")
+
+    found = _found(client, word)
+    assert set(found) == {("pptx", in_body), ("pptx", in_title), ("docx", project)}
+    assert found[-1] == ("pptx", in_body)
+
+    # the last word is a prefix match while typing
+    assert set(_found(client, f"roadmap {word[:4]}")) >= {("pptx", in_body)}
+    response = client.get(URL, params={"q": f"ship {word}"}).json()
+    assert "[" in response["items"][0]["snippet"]
+
+
+def test_search_pages_and_treats_fts_syntax_as_text(client, word):
+    ids = {_deck(client, f"Deck {n} {word}") for n in range(3)}
+
+    first = client.get(URL, params={"q": word, "limit": 2}).json()
+    rest = client.get(URL, params={"q": word, "limit": 2, "offset": 2}).json()
+    assert first["has_more"] and not rest["has_more"]
+    assert {item["id"] for item in first["items"] + rest["items"]} == ids
+
+    # operators and column filters in the query are searched for, not parsed
+    for q in (f'{word} OR owner_tag:u0', f'"{word}', f"{word} NEAR(", "*"):
+        assert client.get(URL, params={"q": q}).status_code == 200
+    assert _found(client, "owner_tag") == []
+
+
+def test_another_worker_starting_keeps_search_working(client, user, word):
+    mine = _deck(client, f"Restart {word}")
+    with engine.connect() as conn:
+        db = Session(bind=conn)
+        assert search_index.search(db, user.id, word, 5, 0)["items"][0]["id"] == mine
+        # another worker's startup, on another connection of the pool
+        search_index.ensure_search_index(engine)
+        assert search_index.search(db, user.id, word, 5, 0)["items"][0]["id"] == mine
+        db.close()
+
+
+# ---------------- LIKE fallback ----------------
+
+def test_fallback_without_fts5_searches_own_titles(client, word, monkeypatch):
+    monkeypatch.setattr(search_index, "is_supported", lambda bind: False)
+    deck = _deck(client, f"Fallback {word}", f"body only {word}body")
+    project = _document(client, "Minutes", f"Topic {word}")
+    theirs = _deck(client, f"Theirs {word}")
+    _give_away(theirs)
+    _deck(client, "Untitled", f"{word} only in the slides")
+
+    assert set(_found(client, word.upper())) == {("pptx", deck), ("docx", project)}
+    assert _found(client, f"{word}body") == []  # slide text isn't searched
+
+    first = client.get(URL, params={"q": word, "limit": 1}).json()
+    assert len(first["items"]) == 1 and first["has_more"]
@@ -0,0 +1,152 @@
+# backend/tests/test_section_history.py
+
+import pytest
+
+from core.dbutils import SessionLocal, count_queries
+from models.models import Project, Section, SectionRevision
+from services import section_history
+
+WRITES = ("INSERT", "UPDATE", "DELETE", "SAVEPOINT")
+
+
+def _section(user, content: str = "line 1\nline 2\nline 3", history=None) -> tuple:
+    db = SessionLocal()
+    try:
+        project = Project(owner_id=user.id, title="History", topic="History", doc_type="docx")
+        db.add(project)
+        db.flush()
+        section = Section(project_id=project.id, title="Body", order_index=1, content=content, history=history)
+        db.add(section)
+        db.commit()
+        return project.id, section.id
+    finally:
+        db.close()
+
+
+def _refine(section_id: int, content: str, prompt: str) -> None:
+    db = SessionLocal()
+    try:
+        section = db.get(Section, section_id)
+        section_history.record_revision(db, section, content, prompt)
+        section.content = content
+        db.commit()
+    finally:
+        db.close()
+
+
+def _versions(section_id: int) -> list:
+    db = SessionLocal()
+    try:
+        rows = db.query(SectionRevision.version).filter(SectionRevision.section_id == section_id)
+        return sorted(version for version, in rows)
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def fake_gemini(monkeypatch):
+    import routers.documents as documents
+
+    monkeypatch.setattr(
+        documents,
+        "refine_word_section_with_gemini",
+        lambda topic, heading, current_content, instruction: f"{current_content}\n{instruction}",
+    )
+
+
+def test_every_version_round_trips(client, user):
+    texts = ["intro\nbody\noutro"]
+    project_id, section_id = _section(user, texts[0])
+    db = SessionLocal()
+    try:
+        section_history.add_initial_revisions(db, project_id)
+        db.commit()
+    finally:
+        db.close()
+
+    # past two snapshots, with lines added, changed and removed
+    for n in range(1, 2 * section_history.SNAPSHOT_EVERY + 3):
+        lines = texts[-1].split("\n")
+        if n % 3 == 0:
+            del lines[1]
+        elif n % 3 == 1:
+            lines.insert(1, f"added {n}")
+        else:
+            lines[0] = f"intro v{n}"
+        texts.append("\n".join(lines))
+        _refine(section_id, texts[-1], f"edit {n}")
+
+    db = SessionLocal()
+    try:
+        section = db.get(Section, section_id)
+        for version, text in enumerate(texts, start=1):
+            revision = section_history.get_version(db, section, version)
+            assert (revision.version, revision.content) == (version, text)
+        assert section_history.get_version(db, section, len(texts) + 1) is None
+        snapshots = [r.version for r in section_history.list_revisions(db, section) if r.is_snapshot]
+        assert snapshots == [1, 11, 21]
+    finally:
+        db.close()
+
+    url = f"/api/v1/documents/{project_id}/sections/{section_id}/history"
+    assert client.get(f"{url}/12").json()["content"] == texts[11]
+    assert [r["prompt"] for r in client.get(url).json()][:2] == [section_history.INITIAL_PROMPT, "edit 1"]
+
+
+def test_concurrent_refines_take_the_next_free_version(user):
+    project_id, section_id = _section(user, "one")
+    _refine(section_id, "one\ntwo", "first")
+
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # both load version 1 ("one\ntwo") and go for version 2...
+        a, b = first.get(Section, section_id), second.get(Section, section_id)
+        assert a.content == b.content == "one\ntwo"
+        section_history.record_revision(first, a, "one\ntwo\nthree", "a")
+        a.content = "one\ntwo\nthree"
+        first.commit()
+
+        # ...the loser builds on the winner's text as version 3
+        revision = section_history.record_revision(second, b, "zero\none\ntwo\nthree", "b")
+        b.content = "zero\none\ntwo\nthree"
+        second.commit()
+        assert revision.version == 3
+    finally:
+        first.close()
+        second.close()
+
+    db = SessionLocal()
+    try:
+        section = db.get(Section, section_id)
+        assert [section_history.get_version(db, section, v).content for v in (1, 2, 3)] == [
+            "one\ntwo",
+            "one\ntwo\nthree",
+            "zero\none\ntwo\nthree",
+        ]
+    finally:
+        db.close()
+
+
+def test_legacy_history_moves_on_first_write_or_migrate(client, user):
+    legacy = [{"prompt": "first", "content": "a"}, {"prompt": "second", "content": "a\nb"}]
+    project_id, written_id = _section(user, "a\nb", history=legacy)
+    _, migrated_id = _section(user, "a\nb", history=legacy)
+
+    # reading history never writes, even for a section not migrated yet
+    with count_queries() as counter:
+        assert client.get(f"/api/v1/documents/{project_id}/sections/{written_id}/history").json() == []
+    assert not [s for s in counter.statements if s.lstrip().upper().startswith(WRITES)]
+
+    _refine(written_id, "a\nb\nc", "third")
+    assert _versions(written_id) == [1, 2, 3]
+
+    db = SessionLocal()
+    try:
+        assert section_history.migrate_all_legacy_history(db) >= 1
+        db.commit()
+        assert db.get(Section, migrated_id).history is None
+        section = db.get(Section, written_id)
+        assert [section_history.get_version(db, section, v).content for v in (1, 2, 3)] == ["a", "a\nb", "a\nb\nc"]
+    finally:
+        db.close()
+    assert _versions(migrated_id) == [1, 2]
@@ -0,0 +1,105 @@
+# backend/tests/test_slide_positions.py
+
+import pytest
+
+from core.dbutils import SessionLocal
+from models.models import Slide
+from services import slide_store
+
+# splits of one POSITION_STEP gap that still leave at least MIN_POSITION_GAP
+SPLITS_PER_GAP = 30
+
+
+@pytest.fixture
+def renumbers(monkeypatch):
+    calls = []
+    renumber = slide_store._renumber
+
+    def counting_renumber(db, presentation_id):
+        calls.append(presentation_id)
+        renumber(db, presentation_id)
+
+    monkeypatch.setattr(slide_store, "_renumber", counting_renumber)
+    return calls
+
+
+def _titles(response) -> list:
+    assert response.status_code == 200, response.text
+    return [slide["title"] for slide in response.json()["content"]]
+
+
+def _positions(presentation_id: int) -> list:
+    db = SessionLocal()
+    try:
+        rows = db.query(Slide.position).filter(Slide.presentation_id == presentation_id).order_by(Slide.position)
+        return [position for position, in rows]
+    finally:
+        db.close()
+
+
+def _deck(client, titles) -> str:
+    created = client.post(
+        "/api/v1/presentations/",
+        json={"topic": "Positions", "custom_content": [{"layout": "title", "title": t} for t in titles]},
+    )
+    assert _titles(created) == titles
+    return f"/api/v1/presentations/{created.json()['presentation_id']}"
+
+
+def test_inserts_into_one_gap_renumber_and_keep_the_order(client, renumbers):
+    url = _deck(client, ["A", "B", "C"])
+    expected = ["A", "B", "C"]
+
+    # always between "A" and the slide inserted last: the same gap, halved each time
+    for n in range(SPLITS_PER_GAP):
+        title = f"Insert {n}"
+        response = client.post(f"{url}/slides", json={"index": 1, "slide": {"layout": "title", "title": title}})
+        expected.insert(1, title)
+        assert _titles(response) == expected
+    assert renumbers == []
+
+    response = client.post(f"{url}/slides", json={"index": 1, "slide": {"layout": "title", "title": "Rebalanced"}})
+    expected.insert(1, "Rebalanced")
+    assert _titles(response) == expected
+    assert len(renumbers) == 1
+
+    pid = int(url.rsplit("/", 1)[1])
+    positions = _positions(pid)
+    assert len(set(positions)) == len(expected)
+    # every slide but the new one sits on a POSITION_STEP multiple again
+    assert sum(p % slide_store.POSITION_STEP != 0 for p in positions) == 1
+    assert _titles(client.get(url)) == expected
+
+
+def test_moves_into_one_gap_renumber_and_keep_the_order(client, renumbers):
+    url = _deck(client, ["A", "B", "C", "D"])
+    expected = ["A", "B", "C", "D"]
+
+    # the last slide moves in right after "A", over and over
+    for _ in range(SPLITS_PER_GAP + 1):
+        response = client.post(f"{url}/slides/{len(expected) - 1}/move", json={"to_index": 1})
+        expected.insert(1, expected.pop())
+        assert _titles(response) == expected
+    assert len(renumbers) == 1
+    assert _titles(client.get(url)) == expected
+
+
+def test_deletes_keep_the_order_without_renumbering(client, renumbers):
+    titles = [f"Slide {n}" for n in range(6)]
+    url = _deck(client, titles)
+    for _ in range(SPLITS_PER_GAP + 1):
+        client.post(f"{url}/slides", json={"index": 1, "slide": {"layout": "title", "title": "Squeezed"}})
+    assert len(renumbers) == 1
+
+    expected = _titles(client.get(url))
+    for index in (len(expected) - 1, 3, 1, 0):
+        response = client.delete(f"{url}/slides/{index}")
+        del expected[index]
+        assert _titles(response) == expected
+    assert len(renumbers) == 1
+
+    # the gaps left by deletes are wide enough for the next insert
+    response = client.post(f"{url}/slides", json={"index": 1, "slide": {"layout": "title", "title": "Last"}})
+    expected.insert(1, "Last")
+    assert _titles(response) == expected
+    assert len(renumbers) == 1
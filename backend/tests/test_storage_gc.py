@@ -0,0 +1,197 @@
+# backend/tests/test_storage_gc.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from core.config import Config
+from core.dbutils import SessionLocal
+from models.models import Presentation
+from services import artifacts, render_cache, storage_gc
+
+DAY = 86400
+MISSING_ID = 10**9  # no deck has this id
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch, app):
+    """Empty render directories and artifact store for one GC run."""
+    dirs = {"pptx": tmp_path / "storage", "docx": tmp_path / "storage" / "docs"}
+    for directory in dirs.values():
+        directory.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(storage_gc, "_render_dirs", lambda: {kind: str(d) for kind, d in dirs.items()})
+    monkeypatch.setattr(Config, "STORAGE_GC_RENDER_MAX_AGE", 7 * DAY)
+    monkeypatch.setattr(Config, "STORAGE_GC_TMP_MAX_AGE", 3600)
+    artifacts.set_store(artifacts.LocalArtifactStore(str(tmp_path / "artifacts")))
+    yield dirs["pptx"]
+    artifacts.set_store(None)
+
+
+@pytest.fixture
+def deck_id(user):
+    db = SessionLocal()
+    try:
+        deck = Presentation(topic="GC", owner_id=user.id)
+        db.add(deck)
+        db.commit()
+        return deck.presentation_id
+    finally:
+        db.close()
+
+
+def _file(directory, name: str, size: int = 100, age: float = 0):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+def _run(**kwargs):
+    return storage_gc.run(pause=0, **kwargs)
+
+
+def test_orphan_renders_are_deleted(storage, deck_id):
+    orphan = _file(storage, f"presentation_{MISSING_ID}.pptx")
+    orphan_manifest = _file(storage, f"presentation_{MISSING_ID}.pptx.manifest.json", 10)
+    stray_manifest = _file(storage, f"presentation_{MISSING_ID + 1}.pptx.manifest.json", 10)
+    live = _file(storage, f"presentation_{deck_id}.pptx")
+    unrelated = _file(storage, "notes.txt")
+
+    report = _run()
+
+    assert not orphan.exists() and not orphan_manifest.exists() and not stray_manifest.exists()
+    assert live.exists() and unrelated.exists()
+    assert report.by_reason == {"orphan": 120}
+    assert report.kept_render_bytes == 100
+
+
+def test_expired_renders_and_old_temp_files_are_deleted(storage, deck_id):
+    expired = _file(storage, f"presentation_{deck_id}.pptx", age=8 * DAY)
+    old_tmp = _file(storage, "presentation_1.pptx.abc.tmp", 30, age=2 * 3600)
+    old_image = _file(storage, "tmp_img_1_2.jpg", 20, age=2 * 3600)
+    new_tmp = _file(storage, "presentation_2.pptx.def.tmp", 30)
+
+    report = _run()
+
+    assert not expired.exists() and not old_tmp.exists() and not old_image.exists()
+    assert new_tmp.exists()  # may belong to a render in progress
+    assert report.by_reason == {"expired": 100, "temp": 50}
+
+
+def test_dry_run_deletes_nothing(storage, deck_id):
+    files = [
+        _file(storage, f"presentation_{MISSING_ID}.pptx"),
+        _file(storage, f"presentation_{deck_id}.pptx", age=8 * DAY),
+        _file(storage, "tmp_img_1_2.jpg", 20, age=2 * 3600),
+    ]
+
+    report = _run(dry_run=True)
+
+    assert all(path.exists() for path in files)
+    assert report.by_reason == {"orphan": 100, "expired": 100, "temp": 20}
+
+
+def test_budget_drops_the_oldest_renders(storage, user):
+    ids = []
+    db = SessionLocal()
+    try:
+        for _ in range(3):
+            deck = Presentation(topic="GC budget", owner_id=user.id)
+            db.add(deck)
+            db.flush()
+            ids.append(deck.presentation_id)
+        db.commit()
+    finally:
+        db.close()
+    oldest, middle, newest = (
+        _file(storage, f"presentation_{i}.pptx", age=age) for i, age in zip(ids, (3 * DAY, 2 * DAY, DAY))
+    )
+
+    report = _run(max_bytes=250)
+
+    assert not oldest.exists() and middle.exists() and newest.exists()
+    assert report.by_reason == {"budget": 100}
+    assert report.kept_render_bytes == 200
+
+
+def test_renders_in_progress_are_left_alone(storage, deck_id):
+    busy = _file(storage, f"presentation_{deck_id}.pptx", age=8 * DAY)
+    busy_orphan = _file(storage, f"presentation_{MISSING_ID}.pptx")
+
+    holding, done = threading.Event(), threading.Event()
+
+    def render():
+        with render_cache.render_lock(str(busy)), render_cache.render_lock(str(busy_orphan)):
+            holding.set()
+            done.wait(10)
+
+    renderer = threading.Thread(target=render)
+    renderer.start()
+    try:
+        assert holding.wait(10)
+        report = _run()
+    finally:
+        done.set()
+        renderer.join()
+
+    assert busy.exists() and busy_orphan.exists()
+    assert report.busy == 2
+    assert report.by_reason == {}
+
+    # once the render is done, the next run collects them
+    assert _run().by_reason == {"expired": 100, "orphan": 100}
+
+
+def test_render_rewritten_since_the_scan_is_kept(storage, deck_id, monkeypatch):
+    path = _file(storage, f"presentation_{deck_id}.pptx", age=8 * DAY)
+    sweep = storage_gc._sweep_render_dir
+
+    def sweep_then_rerender(*args):
+        # a download finishes a fresh render between the scan and the delete
+        existing = storage_gc._existing_ids
+
+        def rerender_first(*a):
+            os.utime(path)
+            return existing(*a)
+
+        monkeypatch.setattr(storage_gc, "_existing_ids", rerender_first)
+        return sweep(*args)
+
+    monkeypatch.setattr(storage_gc, "_sweep_render_dir", sweep_then_rerender)
+    report = _run()
+
+    assert path.exists()
+    assert report.busy == 1
+
+
+def test_unreferenced_blobs_are_deleted(storage, tmp_path, deck_id):
+    store = artifacts.get_store()
+    rendered = _file(tmp_path, "render.pptx")
+    db = SessionLocal()
+    try:
+        artifact = artifacts.publish(db, "pptx", deck_id, "default", "v1", str(rendered))
+        db.commit()
+        referenced = artifact.storage_key
+    finally:
+        db.close()
+    stale = os.path.join(store.root, "ab", "abcd.pptx")
+    fresh = os.path.join(store.root, "cd", "cdef.pptx")
+    for path, age in ((stale, 2 * 3600), (fresh, 0)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"y" * 10)
+        if age:
+            os.utime(path, (time.time() - age,) * 2)
+    old = time.time() - 2 * 3600
+    os.utime(store.local_path(referenced), (old, old))
+
+    report = _run()
+
+    assert store.exists(referenced)
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)  # a publish may not have committed its row yet
+    assert report.by_reason.get("unreferenced") == 10
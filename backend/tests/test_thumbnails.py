@@ -0,0 +1,78 @@
+# backend/tests/test_thumbnails.py
+
+import pytest
+
+from services import thumbnails
+
+SLIDES = [
+    {"layout": "title", "title": "Quarterly review"},
+    {"layout": "bullet", "title": "Points", "bullets": ["one", "two"]},
+]
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Slides actually drawn (not served from the thumbnail cache)."""
+    drawn = []
+    render = thumbnails._render
+
+    def counting(slide, look, style, width):
+        drawn.append(slide["title"])
+        return render(slide, look, style, width)
+
+    monkeypatch.setattr(thumbnails, "_render", counting)
+    thumbnails._thumbs.clear()
+    return drawn
+
+
+def test_unchanged_slide_is_served_from_the_cache(renders):
+    config = {"theme_id": "ppt2"}
+    first = thumbnails.render_thumbnail(SLIDES[0], config)
+    again = thumbnails.render_thumbnail(dict(SLIDES[0]), config)
+    assert again == first
+    assert renders == ["Quarterly review"]
+
+    # a strip reuses the slide thumbnails already rendered
+    thumbnails.render_strip(SLIDES, config)
+    assert renders == ["Quarterly review", "Points"]
+
+    # the key covers everything that changes the picture
+    key = thumbnails.thumbnail_key(SLIDES[0], config)
+    assert thumbnails.thumbnail_key(SLIDES[0], {"theme_id": "ppt3"}) != key
+    assert thumbnails.thumbnail_key(SLIDES[0], {**config, "font_color": "#FF0000"}) != key
+    assert thumbnails.thumbnail_key(SLIDES[0], config, width=640) != key
+    assert thumbnails.thumbnail_key({**SLIDES[0], "title": "Edited"}, config) != key
+
+
+def test_thumbnail_etag_follows_the_slide(client, renders):
+    created = client.post("/api/v1/presentations/", json={"topic": "Previews", "custom_content": SLIDES})
+    assert created.status_code == 200, created.text
+    assert len(created.json()["content"]) == len(SLIDES)
+    base = f"/api/v1/presentations/{created.json()['presentation_id']}"
+
+    def thumbnail(index):
+        response = client.get(f"{base}/slides/{index}/thumbnail")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == thumbnails.MEDIA_TYPE
+        return response
+
+    first = thumbnail(0)
+    tag = first.headers["etag"]
+    strip_tag = client.get(f"{base}/thumbnails").headers["etag"]
+    assert thumbnail(0).headers["etag"] == tag
+    assert client.get(f"{base}/slides/0/thumbnail", headers={"If-None-Match": tag}).status_code == 304
+
+    # editing another slide keeps this one's ETag, but not the strip's
+    edited = client.put(f"{base}/slides/1", json={"title": "More points"})
+    assert edited.status_code == 200, edited.text
+    assert thumbnail(0).headers["etag"] == tag
+    assert client.get(f"{base}/thumbnails").headers["etag"] != strip_tag
+
+    # editing the slide itself changes it
+    edited = client.put(f"{base}/slides/0", json={"title": "Renamed"})
+    assert edited.status_code == 200, edited.text
+    renamed = thumbnail(0)
+    assert renamed.headers["etag"] != tag
+    assert renamed.content != first.content
+    assert client.get(f"{base}/slides/0/thumbnail", headers={"If-None-Match": tag}).status_code == 200
+    assert renders.count("Quarterly review") == 1
@@ -0,0 +1,42 @@
+# backend/tests/test_tracing.py
+
+import json
+
+from core import tracing
+from core.config import Config
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_are_appended_to_the_trace_file(tmp_path, monkeypatch):
+    first, second = tmp_path / "first.jsonl", tmp_path / "second.jsonl"
+    monkeypatch.setattr(Config, "TRACE_FILE", str(first))
+
+    with tracing.span("outer", kind="test") as outer:
+        with tracing.span("inner"):
+            pass
+    tracing.exporter.flush()
+
+    records = _lines(first)
+    assert [r["name"] for r in records] == ["inner", "outer"]
+    assert records[0]["parent_id"] == outer.span_id
+    assert records[1]["attributes"] == {"kind": "test"}
+
+    # the writer follows a changed TRACE_FILE
+    monkeypatch.setattr(Config, "TRACE_FILE", str(second))
+    with tracing.span("later"):
+        pass
+    tracing.exporter.flush()
+    assert [r["name"] for r in _lines(second)] == ["later"]
+    assert len(_lines(first)) == 2
+
+
+def test_no_trace_file_keeps_spans_in_memory_only(monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_FILE", None)
+    with tracing.span("memory-only") as current:
+        pass
+    tracing.exporter.flush()
+    assert [s["name"] for s in tracing.exporter.get(current.trace_id)] == ["memory-only"]